@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark of JSON decoding for WebSocket frames and /info responses.
+
+Compares the previous path (bytes -> str -> json.loads, i.e. response.json() / json.loads on
+every frame) with codec.loads and with LazyFrame routing, which only peeks the channel/coin.
+
+Run from the repository root:
+    python analysis/benchmark_json_codec.py [--iterations N]
+
+Sample results (orjson 3.8.3, CPython 3.11.7, x86_64; microseconds per payload):
+
+    payload                 bytes   json.loads   codec.loads   lazy route   speedup
+    trades (20)              5883         13.7           6.6          1.1      2.1x
+    l2Book (20x2)            1855          8.5           4.5          1.0      1.9x
+    allMids (200)            4372         16.5           8.7          9.5      1.9x
+    candleSnapshot (500)    80161        253.7         174.3            -      1.5x
+
+"lazy route" is what the WebSocket receive loop now pays per frame; for coin-keyed channels the
+full decode runs once on a consumer thread (allMids has no coin, so it is decoded to route).
+Without orjson installed, codec.loads falls back to the stdlib and the speedup column is ~1x,
+but the lazy routing gain remains.
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "src" / "hyperliquid_wrapper" / "api"))
+
+from codec import BACKEND, LazyFrame, loads  # noqa: E402
+
+COINS = ["BTC", "ETH", "SOL", "ARB", "DOGE", "AVAX", "OP", "MATIC"]
+
+
+def _px(base: float) -> str:
+    return f"{base * (1 + random.uniform(-0.001, 0.001)):.2f}"
+
+
+def sample_payloads():
+    """Realistic Hyperliquid payloads as raw bytes, keyed by label."""
+    now = int(time.time() * 1000)
+    trades = {"channel": "trades", "data": [
+        {"coin": "BTC", "side": random.choice("AB"), "px": _px(67000), "sz": f"{random.random():.5f}",
+         "time": now + i, "hash": "0x" + "%064x" % random.getrandbits(256), "tid": random.getrandbits(48),
+         "users": ["0x" + "%040x" % random.getrandbits(160), "0x" + "%040x" % random.getrandbits(160)]}
+        for i in range(20)]}
+    l2_book = {"channel": "l2Book", "data": {"coin": "ETH", "time": now, "levels": [
+        [{"px": _px(3500 - i), "sz": f"{random.uniform(0, 50):.4f}", "n": random.randint(1, 30)} for i in range(20)],
+        [{"px": _px(3500 + i), "sz": f"{random.uniform(0, 50):.4f}", "n": random.randint(1, 30)} for i in range(20)]]}}
+    all_mids = {"channel": "allMids", "data": {"mids": {
+        f"{COINS[i % len(COINS)]}{i}": _px(random.uniform(0.01, 70000)) for i in range(200)}}}
+    candles = [
+        {"t": now - (500 - i) * 60000, "T": now - (499 - i) * 60000 - 1, "s": "BTC", "i": "1m",
+         "o": _px(67000), "c": _px(67000), "h": _px(67100), "l": _px(66900),
+         "v": f"{random.uniform(0, 100):.5f}", "n": random.randint(1, 2000)}
+        for i in range(500)]
+
+    return [
+        ("trades (20)", json.dumps(trades).encode(), True),
+        ("l2Book (20x2)", json.dumps(l2_book).encode(), True),
+        ("allMids (200)", json.dumps(all_mids).encode(), True),
+        ("candleSnapshot (500)", json.dumps(candles).encode(), False),
+    ]
+
+
+def _time_per_call(fn, payload, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn(payload)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def _stdlib_path(raw: bytes):
+    return json.loads(raw.decode("utf-8"))
+
+
+def _lazy_route(raw: bytes):
+    return LazyFrame(raw).routing_key(lambda channel, data: (channel, None))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the JSON codec against stdlib json")
+    parser.add_argument("--iterations", type=int, default=2000, help="Decodes per payload")
+    args = parser.parse_args()
+
+    random.seed(7)
+    print(f"Codec backend: {BACKEND}\n")
+    print(f"{'payload':<22}{'bytes':>7}{'json.loads':>13}{'codec.loads':>14}{'lazy route':>13}{'speedup':>10}")
+    for label, raw, is_frame in sample_payloads():
+        iterations = args.iterations if len(raw) < 20000 else max(args.iterations // 10, 1)
+        baseline = _time_per_call(_stdlib_path, raw, iterations)
+        fast = _time_per_call(loads, raw, iterations)
+        lazy = f"{_time_per_call(_lazy_route, raw, iterations):.1f}" if is_frame else "-"
+        print(f"{label:<22}{len(raw):>7}{baseline:>13.1f}{fast:>14.1f}{lazy:>13}{baseline / fast:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,7 +7,6 @@ import statistics
 from pathlib import Path
 from typing import Dict, List, Any, Optional
 from datetime import datetime
-import pandas as pd
 
 class LatencyAnalyzer:
     """Analyzes timing data collected by TimingTracker."""
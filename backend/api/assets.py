@@ -1,5 +1,6 @@
-from fastapi import APIRouter, HTTPException
-from typing import List, Dict, Any, Optional
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, List, Dict, Any, Optional
 from datetime import datetime, timedelta
 import sys
 import os
@@ -9,36 +10,46 @@ import time
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 from src.hyperliquid_wrapper.api.hyperliquid_client import HyperClient
-from hyperliquid.info import Info
-from hyperliquid.utils import constants
+from src.hyperliquid_wrapper.api.async_hyperliquid_client import AsyncHyperClient
+from src.hyperliquid_wrapper.api.codec import dumps
+from src.hyperliquid_wrapper.database_handlers.candle_store import CandleStore, INTERVAL_MS
+from src.hyperliquid_wrapper.data_handlers.candle_resampler import resample_candles, select_source_interval
+from backend.api import market_streams
 from backend.api.models import PriceData, CurrentPrice, AssetInfo, LivePriceData, UserTrade
 from src.config import config
+from analysis.timing_tracker import timing_tracker
+from analysis.timing_middleware import get_request_id
 
 router = APIRouter()
 
+STREAM_FORMAT_PATTERN = "^(json|ndjson|json-stream)$"  # 'format' values of the history endpoints
+
+def _create_async_client() -> AsyncHyperClient:
+    """Create the non-blocking client used by the asset routes."""
+    return AsyncHyperClient(account_address=config.account_address, testnet=config.is_testnet)
+
+# The routes await async_client; the sync HyperClient is kept for trading and streams.
+# AsyncHyperClient makes no network calls on construction, so it is always available.
+async_client = _create_async_client()
+
 # Initialize client using config
 try:
     client = HyperClient(**config.get_hyperliquid_client_params())
     print(f"[Assets API] Initialized HyperClient for {config.network_name}")
-    
-    # Also initialize Info directly for candles
-    info = Info(constants.MAINNET_API_URL if config.is_mainnet else constants.TESTNET_API_URL, skip_ws=True)
     client_initialized = True
 except Exception as e:
     print(f"[Assets API] WARNING: Failed to initialize HyperClient: {e}")
     print(f"[Assets API] The API will start but asset endpoints may not work until the Hyperliquid API is available")
     client = None
-    info = None
     client_initialized = False
 
 def ensure_client():
-    """Ensure the client is initialized before using it."""
-    global client, info, client_initialized
+    """Ensure the sync client is initialized before using it."""
+    global client, client_initialized
     
     if not client_initialized:
         try:
             client = HyperClient(**config.get_hyperliquid_client_params())
-            info = Info(constants.MAINNET_API_URL if config.is_mainnet else constants.TESTNET_API_URL, skip_ws=True)
             client_initialized = True
             print(f"[Assets API] Successfully initialized HyperClient for {config.network_name}")
         except Exception as e:
@@ -47,10 +58,173 @@ def ensure_client():
                 detail=f"Hyperliquid API is currently unavailable: {str(e)}. Please try again later."
             )
     
-    return client, info
+    return client
+
+async def reset_clients():
+    """
+    Recreate both clients for the current network (e.g., after a network switch).
+    Closes the previous async client's connection pool.
+    """
+    global client, async_client, client_initialized
+    
+    previous_async_client = async_client
+    async_client = _create_async_client()
+    await previous_async_client.aclose()
+    
+    try:
+        client = HyperClient(**config.get_hyperliquid_client_params())
+        client_initialized = True
+    except Exception as e:
+        print(f"[Assets API] Warning: Failed to initialize HyperClient after network switch: {e}")
+        client = None
+        client_initialized = False
+    
+    # Point the background streams at the new network
+    await market_streams.restart_market_streams()
+
+# Persistent candle cache: repeat chart loads only fetch the missing tail and gaps
+candle_store = CandleStore()
+
+async def fetch_candles(symbol: str, interval: str, start_time_ms: int, end_time_ms: int) -> List[Dict[str, Any]]:
+    """
+    Read candles through the local candle store, requesting only uncached ranges upstream.
+    Intervals the store can't align (e.g. "1M") go straight to Hyperliquid.
+    """
+    if interval not in INTERVAL_MS:
+        return await async_client.get_candles(symbol, interval, start_time_ms, end_time_ms)
+    
+    # Bind the client now so a network switch mid-request can't mix networks
+    upstream = async_client
+    return await candle_store.aget_candles(
+        config.network_name, symbol, interval, start_time_ms, end_time_ms,
+        fetch=lambda start, end: upstream.get_candles(symbol, interval, start, end)
+    )
+
+async def stream_price_points(symbol: str, source_interval: str, candle_interval: str,
+                              start_time_ms: int, end_time_ms: int) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    Yield price-history points window by window from the candle store, resampling each window
+    when the source interval is finer (windows are aligned so no bucket spans two of them).
+    """
+    if source_interval not in INTERVAL_MS:
+        candles = await async_client.get_candles(symbol, source_interval, start_time_ms, end_time_ms)
+        yield [point for point in map(_price_point, candles or []) if point is not None]
+        return
+
+    upstream = async_client
+    chunks = candle_store.aiter_candles(
+        config.network_name, symbol, source_interval, start_time_ms, end_time_ms,
+        fetch=lambda start, end: upstream.get_candles(symbol, source_interval, start, end),
+        align_ms=INTERVAL_MS.get(candle_interval)
+    )
+    async for candles in chunks:
+        if source_interval != candle_interval:
+            candles = resample_candles(candles, source_interval, candle_interval)
+        yield [point for point in map(_price_point, candles) if point is not None]
+
+async def close_clients():
+    """Release pooled connections on application shutdown."""
+    await async_client.aclose()
+
+def _price_point(candle: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Convert a Hyperliquid candle to a price-history point (None if it has no open time).
+
+    Candle format from Hyperliquid:
+    {"t": open_time_ms, "T": close_time_ms, "s": symbol, "i": interval, "o": open_price,
+     "c": close_price, "h": high_price, "l": low_price, "v": volume, "n": number_of_trades}
+    """
+    timestamp_ms = candle.get("t", 0)
+    if not timestamp_ms:
+        return None
+    return {
+        "date": datetime.fromtimestamp(timestamp_ms / 1000).strftime("%Y-%m-%d"),
+        "timestamp": timestamp_ms,
+        "price": float(candle.get("c", 0)),  # Using close price as the main price
+        "open": float(candle.get("o", 0)),
+        "high": float(candle.get("h", 0)),
+        "low": float(candle.get("l", 0)),
+        "close": float(candle.get("c", 0)),
+        "volume": float(candle.get("v", 0)),  # Volume is already in asset terms
+        "partial": candle.get("partial", False)  # Bucket still open or incomplete
+    }
+
+def _user_trade(fill: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a Hyperliquid fill to the user-trades row format."""
+    return {
+        "timestamp": fill.get("time", 0),
+        "date": datetime.fromtimestamp(fill.get("time", 0) / 1000).strftime("%Y-%m-%d %H:%M:%S"),
+        "price": float(fill.get("px", 0)),
+        "size": float(fill.get("sz", 0)),
+        "side": fill.get("side", ""),  # "B" for buy, "A" for sell (ask)
+        "direction": fill.get("dir", ""),  # "Open Long", "Close Short", etc.
+        "fee": float(fill.get("fee", 0)),
+        "pnl": float(fill.get("closedPnl", 0)),
+        "order_id": fill.get("oid", 0),
+        "trade_id": fill.get("tid", 0)
+    }
+
+def _fill_matches(fill: Dict[str, Any], symbol: str, quote: str) -> bool:
+    """Handle both perpetual (e.g., "BTC") and spot (e.g., "@107") formats."""
+    fill_coin = fill.get("coin", "")
+    return fill_coin == symbol or (fill_coin.startswith("@") and quote != "USD")
+
+async def _stream_rows(chunks: AsyncIterator[List[Dict[str, Any]]], response_format: str,
+                       envelope: Dict[str, Any], rows_key: str = "data") -> StreamingResponse:
+    """
+    Stream rows as they are produced instead of building the whole response first.
+
+    The first chunk is awaited before the response starts, so failures up front still
+    return an error status.
+
+    Args:
+        chunks: Async iterator of row lists
+        response_format: 'ndjson' (one row per line; envelope fields as X-* headers) or
+                         'json-stream' (the buffered response shape, with the rows streamed
+                         and "count" written last)
+        envelope: Fields other than the rows and "count"
+        rows_key: Name of the rows array in the buffered response
+    """
+    try:
+        first = await chunks.__anext__()
+    except StopAsyncIteration:
+        first = []
+
+    async def body():
+        count = 0
+        try:
+            if response_format == "json-stream":
+                yield dumps(envelope)[:-1] + f',"{rows_key}":['
+            rows = first
+            while True:
+                if rows:
+                    if response_format == "ndjson":
+                        yield "".join(dumps(row) + "\n" for row in rows)
+                    else:
+                        yield ("," if count else "") + ",".join(dumps(row) for row in rows)
+                    count += len(rows)
+                try:
+                    rows = await chunks.__anext__()
+                except StopAsyncIteration:
+                    break
+            if response_format == "json-stream":
+                yield f'],"count":{count}}}'
+        except Exception as e:
+            # Headers are already sent: an NDJSON error line, or a truncated (invalid) JSON body
+            print(f"[Assets API] Stream failed after {count} rows: {e}")
+            if response_format == "ndjson":
+                yield dumps({"error": str(e)}) + "\n"
+        finally:
+            await chunks.aclose()
+
+    if response_format == "ndjson":
+        headers = {f"X-{key.replace('_', '-').title()}": str(value) for key, value in envelope.items()}
+        return StreamingResponse(body(), media_type="application/x-ndjson", headers=headers)
+    return StreamingResponse(body(), media_type="application/json")
 
 @router.get("/assets/{symbol}/price-history")
-async def get_price_history(symbol: str, days: int = 180, quote: str = "USD", interval: Optional[str] = None):
+async def get_price_history(symbol: str, days: int = 180, quote: str = "USD", interval: Optional[str] = None,
+                            response_format: str = Query("json", alias="format", pattern=STREAM_FORMAT_PATTERN)):
     """
     Get price history for an asset using Hyperliquid's candle data.
     
@@ -59,11 +233,9 @@ async def get_price_history(symbol: str, days: int = 180, quote: str = "USD", in
         days: Number of days of history to return (default: 180 for 6 months)
         quote: Quote asset (default: "USD"). Note: Hyperliquid primarily supports USD pairs.
         interval: Candle interval (optional: "5m", "1h", "1d"). If not provided, auto-selects based on days.
+        format: 'json' (default), or 'ndjson' / 'json-stream' to stream the candles window by window
     """
     try:
-        # Ensure client is initialized
-        _, info = ensure_client()
-        
         # Special handling for known invalid symbols
         if symbol.upper() == "HYP":
             raise HTTPException(
@@ -105,56 +277,31 @@ async def get_price_history(symbol: str, days: int = 180, quote: str = "USD", in
             else:
                 candle_interval = "1d"  # Daily candles for longer periods
         
-        # Fetch candle data from Hyperliquid using the info.post method
-        request_body = {
-            "type": "candleSnapshot",
-            "req": {
-                "coin": symbol,
-                "interval": candle_interval,
-                "startTime": start_time_ms,
-                "endTime": end_time_ms
-            }
-        }
-        
-        print(f"Requesting candle data for {symbol} with interval {candle_interval}")
-        # The post method expects (url_path, json_body)
-        candle_data = info.post("/info", request_body)
+        # Derive the interval from the finest stored series that fits the window, so
+        # switching chart intervals reuses cached candles instead of another upstream call
+        source_interval = candle_interval
+        if candle_interval in INTERVAL_MS:
+            step = INTERVAL_MS[candle_interval]
+            start_time_ms = (start_time_ms // step) * step  # Start on a bucket boundary
+            source_interval = select_source_interval(candle_interval, end_time_ms - start_time_ms)
+        
+        print(f"Requesting candle data for {symbol} with interval {candle_interval} (source {source_interval})")
+        if response_format != "json":
+            envelope = {"symbol": symbol, "quote": quote, "days": days,
+                        "interval": candle_interval, "source_interval": source_interval}
+            return await _stream_rows(
+                stream_price_points(symbol, source_interval, candle_interval, start_time_ms, end_time_ms),
+                response_format, envelope)
+        candle_data = await fetch_candles(symbol, source_interval, start_time_ms, end_time_ms)
+        if source_interval != candle_interval:
+            candle_data = resample_candles(candle_data, source_interval, candle_interval)
         print(f"Received candle data: {type(candle_data)}, length: {len(candle_data) if candle_data else 0}")
         
         # Transform candle data to our format
         price_history = []
         
         if candle_data and isinstance(candle_data, list):
-            for candle in candle_data:
-                # Candle format from Hyperliquid:
-                # {
-                #   "t": open_time_ms,
-                #   "T": close_time_ms,
-                #   "s": symbol,
-                #   "i": interval,
-                #   "o": open_price,
-                #   "c": close_price,
-                #   "h": high_price,
-                #   "l": low_price,
-                #   "v": volume,
-                #   "n": number_of_trades
-                # }
-                
-                # Convert timestamp to date
-                timestamp_ms = candle.get("t", 0)
-                if timestamp_ms:
-                    date = datetime.fromtimestamp(timestamp_ms / 1000)
-                    
-                    price_history.append({
-                        "date": date.strftime("%Y-%m-%d"),
-                        "timestamp": timestamp_ms,
-                        "price": float(candle.get("c", 0)),  # Using close price as the main price
-                        "open": float(candle.get("o", 0)),
-                        "high": float(candle.get("h", 0)),
-                        "low": float(candle.get("l", 0)),
-                        "close": float(candle.get("c", 0)),
-                        "volume": float(candle.get("v", 0))  # Volume is already in asset terms
-                    })
+            price_history = [point for point in map(_price_point, candle_data) if point is not None]
         
         # If we're using hourly or 4-hour data but want daily representation,
         # we might want to aggregate. For now, we'll return as-is.
@@ -164,6 +311,7 @@ async def get_price_history(symbol: str, days: int = 180, quote: str = "USD", in
             "quote": quote,
             "days": days,
             "interval": candle_interval,
+            "source_interval": source_interval,
             "data": price_history,
             "count": len(price_history)
         }
@@ -177,7 +325,7 @@ async def get_price_history(symbol: str, days: int = 180, quote: str = "USD", in
         raise HTTPException(status_code=500, detail=error_msg)
 
 @router.get("/assets/{symbol}/current")
-async def get_current_price(symbol: str, quote: str = "USD"):
+async def get_current_price(symbol: str, request: Request, quote: str = "USD"):
     """
     Get current price and market data for an asset including bid/ask spread and 24h stats
     
@@ -198,11 +346,19 @@ async def get_current_price(symbol: str, quote: str = "USD"):
             print(f"Warning: Non-USD quote requested: {symbol}/{quote}. Hyperliquid primarily supports USD pairs.")
         
         # Get comprehensive market data from Hyperliquid
-        market_data = client.get_full_market_data(symbol)
+        market_data = await async_client.get_full_market_data(symbol)
+        # Keep this coin's 24h stats and book in memory so later requests skip the REST calls
+        market_streams.track_coin(symbol)
+        
+        # Record how long each concurrent upstream leg took
+        request_id = get_request_id(request)
+        for leg, duration_ms in market_data.get("leg_timings_ms", {}).items():
+            timing_tracker.record_event(request_id, f"upstream_{leg}", duration_ms=duration_ms,
+                                        metadata={"error": market_data["errors"].get(leg)})
         
         # If we couldn't get full data, fall back to just mid price
         if not market_data.get("mid_price"):
-            price = client.get_mid_price(symbol)
+            price = await async_client.get_mid_price(symbol)
             return {
                 "symbol": symbol,
                 "quote": quote,
@@ -224,7 +380,9 @@ async def get_current_price(symbol: str, quote: str = "USD"):
             "price_24h_ago": market_data.get("price_24h_ago"),
             "price_change": market_data.get("price_change"),
             "price_change_percent": market_data.get("price_change_percent"),
-            "timestamp": market_data["timestamp"]
+            "timestamp": market_data["timestamp"],
+            "partial": market_data.get("partial", False),
+            "leg_timings_ms": market_data.get("leg_timings_ms")
         }
         
     except HTTPException:
@@ -244,7 +402,7 @@ async def get_available_assets():
     """
     try:
         # Get all mid prices to see available assets
-        all_mids = client.get_all_mids()
+        all_mids = await async_client.get_all_mids()
         
         # Extract symbols and their current prices
         assets = []
@@ -299,19 +457,9 @@ async def get_live_price_data(symbol: str, minutes: int = 30, quote: str = "USD"
         # Use 1-minute interval for live data
         interval = "1m"
         
-        # Fetch candle data from Hyperliquid
-        request_body = {
-            "type": "candleSnapshot",
-            "req": {
-                "coin": symbol,
-                "interval": interval,
-                "startTime": start_time_ms,
-                "endTime": end_time_ms
-            }
-        }
-        
+        # Fetch candle data (cached history plus the open candle from Hyperliquid)
         print(f"Requesting live data for {symbol} with interval {interval} for {minutes} minutes")
-        candle_data = info.post("/info", request_body)
+        candle_data = await fetch_candles(symbol, interval, start_time_ms, end_time_ms)
         print(f"Received live data: {type(candle_data)}, length: {len(candle_data) if candle_data else 0}")
         
         # Transform candle data to our format
@@ -355,7 +503,8 @@ async def get_live_price_data(symbol: str, minutes: int = 30, quote: str = "USD"
         raise HTTPException(status_code=500, detail=error_msg)
 
 @router.get("/assets/{symbol}/user-trades")
-async def get_user_trades(symbol: str, days: int = 180, quote: str = "USD"):
+async def get_user_trades(symbol: str, days: int = 180, quote: str = "USD",
+                          response_format: str = Query("json", alias="format", pattern=STREAM_FORMAT_PATTERN)):
     """
     Get user's trades for a specific asset.
     
@@ -363,6 +512,7 @@ async def get_user_trades(symbol: str, days: int = 180, quote: str = "USD"):
         symbol: Asset symbol (e.g., "BTC", "ETH")
         days: Number of days of history to return (default: 180 for 6 months)
         quote: Quote asset (default: "USD"). Note: Hyperliquid primarily supports USD pairs.
+        format: 'json' (default), or 'ndjson' / 'json-stream' to stream fills page by page
     """
     try:
         # Calculate time range
@@ -373,30 +523,18 @@ async def get_user_trades(symbol: str, days: int = 180, quote: str = "USD"):
         start_time_ms = int(start_time.timestamp() * 1000)
         end_time_ms = int(end_time.timestamp() * 1000)
         
+        if response_format != "json":
+            # Page through userFillsByTime, so histories beyond one response are complete too
+            pages = async_client.iter_user_fills_by_time(start_time_ms, end_time_ms, aggregate_by_time=True)
+            chunks = ([_user_trade(fill) for fill in page if _fill_matches(fill, symbol, quote)] async for page in pages)
+            return await _stream_rows(chunks, response_format, {"symbol": symbol, "quote": quote, "days": days},
+                                      rows_key="trades")
+        
         # Get user fills for the time range
-        fills = client.get_user_fills_by_time(start_time_ms, end_time_ms, aggregate_by_time=True)
-        
-        # Filter fills for the specific symbol
-        symbol_fills = []
-        for fill in fills:
-            # Check if the fill is for the requested symbol
-            fill_coin = fill.get("coin", "")
-            
-            # Handle both perpetual (e.g., "BTC") and spot (e.g., "@107") formats
-            if fill_coin == symbol or (fill_coin.startswith("@") and quote != "USD"):
-                # Transform fill data to our format
-                symbol_fills.append({
-                    "timestamp": fill.get("time", 0),
-                    "date": datetime.fromtimestamp(fill.get("time", 0) / 1000).strftime("%Y-%m-%d %H:%M:%S"),
-                    "price": float(fill.get("px", 0)),
-                    "size": float(fill.get("sz", 0)),
-                    "side": fill.get("side", ""),  # "B" for buy, "A" for sell (ask)
-                    "direction": fill.get("dir", ""),  # "Open Long", "Close Short", etc.
-                    "fee": float(fill.get("fee", 0)),
-                    "pnl": float(fill.get("closedPnl", 0)),
-                    "order_id": fill.get("oid", 0),
-                    "trade_id": fill.get("tid", 0)
-                })
+        fills = await async_client.get_user_fills_by_time(start_time_ms, end_time_ms, aggregate_by_time=True)
+        
+        # Filter fills for the specific symbol and transform them to our format
+        symbol_fills = [_user_trade(fill) for fill in fills if _fill_matches(fill, symbol, quote)]
         
         # Sort by timestamp
         symbol_fills.sort(key=lambda x: x["timestamp"])
@@ -415,4 +553,4 @@ async def get_user_trades(symbol: str, days: int = 180, quote: str = "USD"):
         print(f"Error type: {type(e)}")
         import traceback
         traceback.print_exc()
-        raise HTTPException(status_code=500, detail=error_msg) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=error_msg) 
@@ -10,7 +10,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(
 
 from src.reasoning.llm_client import LLMClient
 from src.reasoning.chat import ResponseManager
-from src.hyperliquid_wrapper.database_handlers.database_manager import DBManager
+from src.hyperliquid_wrapper.database_handlers.async_database_manager import AsyncDBManager
 from src.config import config
 from src.network_context import network_context
 from analysis.timing_tracker import timing_tracker
@@ -21,7 +21,11 @@ router = APIRouter()
 # Initialize services
 llm_client = LLMClient()
 response_manager = ResponseManager()
-db_manager = DBManager()
+db_manager = AsyncDBManager()
+
+async def close_db_manager():
+    """Close the chat database connections (called on app shutdown)."""
+    await db_manager.close()
 
 class ChatMessage(BaseModel):
     message: str
@@ -54,12 +58,12 @@ async def chat(message: ChatMessage, request: Request):
             # Track database operations
             timing_tracker.start_stage(request_id, "db_add_user_message")
             # Add user message to conversation history
-            db_manager.add_conversation_message(session_id, "user", message.message)
+            await db_manager.add_conversation_message(session_id, "user", message.message)
             timing_tracker.end_stage(request_id, "db_add_user_message")
             
             # Get conversation history
             timing_tracker.start_stage(request_id, "db_get_history")
-            history = db_manager.get_conversation_history(session_id)
+            history = await db_manager.get_conversation_history(session_id)
             timing_tracker.end_stage(request_id, "db_get_history")
             
             # Convert history to format expected by LLM
@@ -101,7 +105,7 @@ async def chat(message: ChatMessage, request: Request):
             # Track final database operation
             timing_tracker.start_stage(request_id, "db_add_assistant_message")
             # Add assistant response to conversation history
-            db_manager.add_conversation_message(session_id, "assistant", response_message)
+            await db_manager.add_conversation_message(session_id, "assistant", response_message)
             timing_tracker.end_stage(request_id, "db_add_assistant_message")
             
             # Log the final response being sent
@@ -150,26 +154,12 @@ async def set_network(network: str):
     try:
         config.set_network(network)
         
-        # Reinitialize the HyperClient with new network settings
+        # Reinitialize the Hyperliquid clients with new network settings
         from backend.api import assets
-        from src.hyperliquid_wrapper.api.hyperliquid_client import HyperClient
-        from hyperliquid.info import Info
-        from hyperliquid.utils import constants
         
         # Use network context to ensure proper initialization
         with network_context(network):
-            try:
-                assets.client = HyperClient(**config.get_hyperliquid_client_params())
-                assets.info = Info(
-                    constants.MAINNET_API_URL if config.is_mainnet else constants.TESTNET_API_URL, 
-                    skip_ws=True
-                )
-                assets.client_initialized = True
-            except Exception as e:
-                print(f"[Network API] Warning: Failed to initialize HyperClient after network switch: {e}")
-                assets.client = None
-                assets.info = None
-                assets.client_initialized = False
+            await assets.reset_clients()
         
         return {
             "success": True,
@@ -0,0 +1,78 @@
+"""
+Background Hyperliquid WebSocket streams owned by the backend process.
+
+Streams feed the shared in-memory market data caches so request handlers can answer
+from memory. Each stream runs in its own task and is restarted if it drops.
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Dict, List
+
+STREAM_RESTART_DELAY = 5  # Seconds to wait before reconnecting a dropped stream
+MAX_TRACKED_COINS = 16  # Coins whose 24h stats and L2 book are maintained in memory
+
+_tasks: Dict[str, asyncio.Task] = {}
+_tracked_coins: List[str] = []
+
+
+async def _run_forever(name: str, stream_factory: Callable[[object], Awaitable[None]]):
+    """Keep a stream alive, recreating it with the current HyperClient after failures."""
+    # Imported lazily: the assets router imports this module
+    from backend.api import assets
+
+    while True:
+        try:
+            client = assets.ensure_client()
+            await stream_factory(client)
+            print(f"[Market Streams] {name} ended. Restarting in {STREAM_RESTART_DELAY}s")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[Market Streams] {name} failed: {e}. Restarting in {STREAM_RESTART_DELAY}s")
+        await asyncio.sleep(STREAM_RESTART_DELAY)
+
+
+def start_stream(name: str, stream_factory: Callable[[object], Awaitable[None]]):
+    """Start a named background stream unless it is already running."""
+    task = _tasks.get(name)
+    if task is None or task.done():
+        _tasks[name] = asyncio.create_task(_run_forever(name, stream_factory))
+        print(f"[Market Streams] Started {name}")
+
+
+def _start_coin_streams(coin: str):
+    start_stream(f"stats24h({coin})", lambda client: client.stream_24h_stats(coin))
+    start_stream(f"l2Book({coin})", lambda client: client.stream_order_book(coin))
+
+
+def track_coin(coin: str):
+    """
+    Maintain rolling 24h stats and the L2 book for a coin from now on (no-op if already
+    tracked or at the cap). Must be called from the running event loop.
+    """
+    if coin in _tracked_coins or len(_tracked_coins) >= MAX_TRACKED_COINS:
+        return
+    _tracked_coins.append(coin)
+    _start_coin_streams(coin)
+
+
+def start_market_streams():
+    """Start the always-on streams. Must be called from the running event loop."""
+    start_stream("allMids", lambda client: client.stream_all_mids())
+    for coin in _tracked_coins:
+        _start_coin_streams(coin)
+
+
+async def stop_market_streams():
+    """Cancel every running stream and wait for them to finish."""
+    tasks = list(_tasks.values())
+    _tasks.clear()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def restart_market_streams():
+    """Restart all streams, e.g. after a network switch."""
+    await stop_market_streams()
+    start_market_streams()
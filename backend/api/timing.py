@@ -12,6 +12,8 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(
 
 from analysis.timing_tracker import timing_tracker
 from analysis.latency_analyzer import LatencyAnalyzer
+from src.hyperliquid_wrapper.api.transport import get_shared_transport
+from src.hyperliquid_wrapper.api.ws_manager import get_ws_manager_stats
 
 router = APIRouter()
 
@@ -70,6 +72,20 @@ async def get_visualization_data(request_id: str):
         raise HTTPException(status_code=404, detail=data["error"])
     return data
 
+@router.get("/timing/connections")
+async def get_connection_stats():
+    """Get per-host HTTP connection reuse counters for the shared Hyperliquid transport."""
+    return {
+        "hosts": get_shared_transport().get_connection_stats()
+    }
+
+@router.get("/timing/websockets")
+async def get_websocket_stats():
+    """Get WebSocket pool, reconnect and frame queue depth/lag metrics per endpoint."""
+    return {
+        "endpoints": get_ws_manager_stats()
+    }
+
 @router.delete("/timing/request/{request_id}")
 async def clear_request_timing(request_id: str):
     """Clear timing data for a specific request."""
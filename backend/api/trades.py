@@ -0,0 +1,83 @@
+"""
+API endpoints for the locally recorded trade history.
+"""
+
+from fastapi import APIRouter, HTTPException, Query
+from typing import Optional
+import sys
+import os
+
+# Add parent directories to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.hyperliquid_wrapper.database_handlers.async_database_manager import AsyncDBManager
+from src.hyperliquid_wrapper.database_handlers.database_manager import DEFAULT_TRADE_PAGE_SIZE, MAX_TRADE_PAGE_SIZE
+
+router = APIRouter()
+
+db_manager = AsyncDBManager(readers=2)
+
+async def close_trades_db():
+    """Close the trade query connections (called on app shutdown)."""
+    await db_manager.close()
+
+@router.get("/trades")
+async def get_trades(
+    coin: Optional[str] = None,
+    side: Optional[str] = None,
+    start_time: Optional[int] = None,
+    end_time: Optional[int] = None,
+    columns: Optional[str] = Query(None, description="Comma-separated columns to return, e.g. 'timestamp,coin,side,price,size'"),
+    limit: int = Query(DEFAULT_TRADE_PAGE_SIZE, ge=1, le=MAX_TRADE_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    network: Optional[str] = None
+):
+    """
+    Get one page of recorded trades.
+
+    Args:
+        coin: Only trades of this coin
+        side: 'B'/'buy' or 'A'/'sell'
+        start_time: Inclusive lower bound on the fill time (ms)
+        end_time: Exclusive upper bound on the fill time (ms)
+        columns: Comma-separated projection (default: all columns)
+        limit: Page size
+        cursor: next_cursor from the previous page
+        order: 'desc' (newest first) or 'asc'
+        network: 'mainnet' or 'testnet' (default: the current network)
+    """
+    try:
+        return await db_manager.query_trades(
+            network=network,
+            coin=coin.upper() if coin else None,
+            side=side,
+            start_time=start_time,
+            end_time=end_time,
+            columns=[column.strip() for column in columns.split(",") if column.strip()] if columns else None,
+            limit=limit,
+            cursor=cursor,
+            ascending=order == "asc"
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/trades/summary")
+async def get_trade_summary(
+    coin: Optional[str] = None,
+    side: Optional[str] = None,
+    start_time: Optional[int] = None,
+    end_time: Optional[int] = None,
+    network: Optional[str] = None
+):
+    """Get trade count, volume, fees and realized PnL per coin plus totals."""
+    try:
+        return await db_manager.aggregate_trades(
+            network=network,
+            coin=coin.upper() if coin else None,
+            side=side,
+            start_time=start_time,
+            end_time=end_time
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -1,15 +1,22 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+import asyncio
 import sys
 import os
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from backend.api.chat import router as chat_router
-from backend.api.assets import router as assets_router
+from backend.api.chat import router as chat_router, close_db_manager
+from backend.api.assets import router as assets_router, close_clients
 from backend.api.timing import router as timing_router
-from src.hyperliquid_wrapper.database_handlers.database_manager import DBManager
+from backend.api.trades import router as trades_router, close_trades_db
+from backend.api.market_streams import start_market_streams, stop_market_streams
+from src.hyperliquid_wrapper.database_handlers.database_manager import DBManager, close_all_connections
+from src.hyperliquid_wrapper.database_handlers.db_writer import get_db_writer, shutdown_db_writer
+from src.hyperliquid_wrapper.database_handlers.position_book import get_position_book
+from src.hyperliquid_wrapper.database_handlers.conversation_retention import get_conversation_retention
+from src.network_context import get_current_network
 from analysis.timing_middleware import TimingMiddleware
 
 # Initialize FastAPI app
@@ -42,6 +49,32 @@ print("[Backend] Database initialized successfully.")
 app.include_router(chat_router, prefix="/api")
 app.include_router(assets_router, prefix="/api")
 app.include_router(timing_router, prefix="/api")
+app.include_router(trades_router, prefix="/api")
+
+@app.on_event("startup")
+async def startup():
+    """Start background market data streams (allMids cache refresh), position checkpoints and conversation retention."""
+    start_market_streams()
+    book = get_position_book()
+    # Rebuild positions from the last checkpoint + later trades before the first request needs them
+    await asyncio.get_running_loop().run_in_executor(None, book.ensure_loaded, get_current_network())
+    book.start_checkpoints(submit=lambda: get_db_writer().checkpoint_positions())
+    get_conversation_retention().start()  # Archives old conversations while the database is idle
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Stop background streams and close pooled upstream and database connections."""
+    await stop_market_streams()
+    await close_clients()
+    await close_db_manager()
+    await close_trades_db()
+    get_conversation_retention().stop()
+    book = get_position_book()
+    # Stop the timer first: a tick after shutdown_db_writer() would start a new writer
+    book.stop_checkpoints(final_checkpoint=False)
+    shutdown_db_writer()  # Flushes queued writes before the connections close
+    book.stop_checkpoints()  # Final checkpoint, including fills the flush applied
+    close_all_connections()
 
 # Root endpoint
 @app.get("/")
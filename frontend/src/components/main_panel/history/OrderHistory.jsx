@@ -1,6 +1,16 @@
 import React, { useState, useEffect } from 'react'
 import './OrderHistory.css'
 
+const API_URL = 'http://localhost:8000/api'
+
+const emptySummary = {
+  totalTrades: 0,
+  totalVolume: 0,
+  totalFees: 0,
+  totalPnl: 0,
+  winRate: 0
+}
+
 const OrderHistory = ({ filter = 'all' }) => {
   const [historyData, setHistoryData] = useState(null)
   const [loading, setLoading] = useState(true)
@@ -8,114 +18,87 @@ const OrderHistory = ({ filter = 'all' }) => {
   const [activeFilter, setActiveFilter] = useState(filter)
   const [sortBy, setSortBy] = useState('date')
   const [sortOrder, setSortOrder] = useState('desc')
+  const [nextCursor, setNextCursor] = useState(null)
+  const [loadingMore, setLoadingMore] = useState(false)
 
   useEffect(() => {
     fetchHistoryData()
   }, [activeFilter])
 
+  // Only the columns the table shows; the backend pages on (timestamp, id)
+  const TRADE_COLUMNS = 'id,timestamp,coin,side,price,size,fee,closed_pnl,dir'
+  const PAGE_SIZE = 50
+
+  const sideParam = () => {
+    switch (activeFilter) {
+      case 'buys':
+        return '&side=buy'
+      case 'sells':
+        return '&side=sell'
+      default:
+        return ''
+    }
+  }
+
+  const toRow = (trade) => ({
+    id: trade.id,
+    timestamp: trade.timestamp,
+    symbol: trade.coin,
+    side: trade.side === 'B' ? 'Buy' : 'Sell',
+    size: trade.size,
+    price: trade.price,
+    total: trade.price * trade.size,
+    fee: trade.fee || 0,
+    pnl: trade.closed_pnl || null,
+    status: 'Filled',
+    orderType: trade.dir || '-'
+  })
+
+  const fetchTradePage = async (cursor) => {
+    const cursorParam = cursor ? `&cursor=${encodeURIComponent(cursor)}` : ''
+    const response = await fetch(
+      `${API_URL}/trades?columns=${TRADE_COLUMNS}&limit=${PAGE_SIZE}${sideParam()}${cursorParam}`
+    )
+    if (!response.ok) {
+      throw new Error(`HTTP error! status: ${response.status}`)
+    }
+    return response.json()
+  }
+
   const fetchHistoryData = async () => {
     try {
-      // Mock data for now - in production this would call the actual API
-      const mockData = {
-        trades: [
-          {
-            id: '1001',
-            timestamp: new Date().getTime() - 3600000,
-            symbol: 'BTC',
-            side: 'Buy',
-            size: 0.1,
-            price: 47500,
-            total: 4750,
-            fee: 2.38,
-            pnl: 125.50,
-            status: 'Filled',
-            orderType: 'Market'
-          },
-          {
-            id: '1002',
-            timestamp: new Date().getTime() - 7200000,
-            symbol: 'ETH',
-            side: 'Buy',
-            size: 2.5,
-            price: 3200,
-            total: 8000,
-            fee: 4.00,
-            pnl: null,
-            status: 'Filled',
-            orderType: 'Limit'
-          },
-          {
-            id: '1003',
-            timestamp: new Date().getTime() - 10800000,
-            symbol: 'SOL',
-            side: 'Sell',
-            size: 50,
-            price: 150,
-            total: 7500,
-            fee: 3.75,
-            pnl: -25.00,
-            status: 'Filled',
-            orderType: 'Market'
-          },
-          {
-            id: '1004',
-            timestamp: new Date().getTime() - 14400000,
-            symbol: 'BTC',
-            side: 'Sell',
-            size: 0.05,
-            price: 47000,
-            total: 2350,
-            fee: 1.18,
-            pnl: 75.00,
-            status: 'Filled',
-            orderType: 'Limit'
-          },
-          {
-            id: '1005',
-            timestamp: new Date().getTime() - 18000000,
-            symbol: 'MATIC',
-            side: 'Buy',
-            size: 1000,
-            price: 1.25,
-            total: 1250,
-            fee: 0.63,
-            pnl: null,
-            status: 'Cancelled',
-            orderType: 'Limit'
-          }
-        ],
-        summary: {
-          totalTrades: 5,
-          totalVolume: 23850,
-          totalFees: 11.94,
-          totalPnl: 175.50,
-          winRate: 66.67
-        }
+      setLoading(true)
+      // The trades table only records fills, so there are no cancelled trades to list
+      if (activeFilter === 'cancelled') {
+        setHistoryData({ trades: [], summary: emptySummary })
+        setNextCursor(null)
+        setLoading(false)
+        return
       }
 
-      // Apply filter
-      let filteredTrades = mockData.trades
-      if (activeFilter !== 'all') {
-        filteredTrades = mockData.trades.filter(trade => {
-          switch (activeFilter) {
-            case 'buys':
-              return trade.side === 'Buy'
-            case 'sells':
-              return trade.side === 'Sell'
-            case 'filled':
-              return trade.status === 'Filled'
-            case 'cancelled':
-              return trade.status === 'Cancelled'
-            default:
-              return true
+      const [page, summaryResponse] = await Promise.all([
+        fetchTradePage(null),
+        fetch(`${API_URL}/trades/summary?${sideParam().slice(1)}`).then(response => {
+          if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`)
           }
+          return response.json()
         })
-      }
+      ])
 
+      const total = summaryResponse.total
       setHistoryData({
-        ...mockData,
-        trades: filteredTrades
+        trades: page.trades.map(toRow),
+        summary: {
+          totalTrades: total.trade_count,
+          totalVolume: total.volume,
+          totalFees: total.fees,
+          totalPnl: total.realized_pnl,
+          winRate: total.closing_trades ? Math.round((total.winning_trades / total.closing_trades) * 10000) / 100 : 0
+        }
       })
+      setNextCursor(page.next_cursor)
+      setError(null)
       setLoading(false)
     } catch (err) {
       console.error('Error fetching history data:', err)
@@ -124,6 +107,23 @@ const OrderHistory = ({ filter = 'all' }) => {
     }
   }
 
+  const loadMore = async () => {
+    if (!nextCursor || loadingMore) return
+    try {
+      setLoadingMore(true)
+      const page = await fetchTradePage(nextCursor)
+      setHistoryData(previous => ({
+        ...previous,
+        trades: [...previous.trades, ...page.trades.map(toRow)]
+      }))
+      setNextCursor(page.next_cursor)
+    } catch (err) {
+      console.error('Error fetching more trades:', err)
+    } finally {
+      setLoadingMore(false)
+    }
+  }
+
   const handleSort = (field) => {
     if (sortBy === field) {
       setSortOrder(sortOrder === 'asc' ? 'desc' : 'asc')
@@ -303,6 +303,12 @@ const OrderHistory = ({ filter = 'all' }) => {
           ))
         )}
       </div>
+
+      {nextCursor && (
+        <button className="load-more-btn" onClick={loadMore} disabled={loadingMore}>
+          {loadingMore ? 'Loading...' : 'Load more'}
+        </button>
+      )}
     </div>
   )
 }
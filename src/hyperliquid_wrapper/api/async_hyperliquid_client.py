@@ -0,0 +1,437 @@
+"""
+Async Hyperliquid Client
+
+Native asyncio counterpart to HyperClient for read-only market and account queries.
+Built on a pooled ``httpx.AsyncClient`` (HTTP/2 when the ``h2`` package is installed),
+so FastAPI routes can await Hyperliquid without blocking the event loop.
+
+Usage:
+    async with AsyncHyperClient("ACCOUNT_ADDRESS", testnet=True) as client:
+        btc_price = await client.get_mid_price("BTC")
+        candles = await client.get_candles("BTC", "1h", start_ms, end_ms)
+
+Trading (order signing) stays on the synchronous HyperClient.
+"""
+
+import asyncio
+import importlib.util
+import time
+from typing import AsyncIterator, Dict, Optional, Any, List
+
+import httpx
+
+from ..data_handlers.mids_cache import get_mids_cache
+from ..data_handlers.rolling_stats import get_rolling_stats
+from ..data_handlers.order_book import get_order_books
+from ..data_handlers.price_vector import MidsSnapshot
+from .codec import loads
+from .response_parsers import (
+    parse_l2_book, best_bid_ask_from_book, build_24h_candle_request, build_candle_request,
+    compute_24h_stats, assemble_market_data, parse_spot_balances, equity_from_user_state,
+    margin_summary_from_user_state, positions_from_user_state, parse_fills
+)
+
+MAINNET_API_URL = "https://api.hyperliquid.xyz"
+TESTNET_API_URL = "https://api.hyperliquid-testnet.xyz"
+
+DEFAULT_MAX_CONNECTIONS = 20
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 10
+DEFAULT_LEG_TIMEOUT = 5  # Seconds allowed for each leg of get_full_market_data
+USER_FILLS_PAGE_LIMIT = 2000  # userFillsByTime returns at most this many fills per request
+
+
+async def _timed_leg(leg, timeout: float):
+    """Await one fan-out leg, returning (value, error_message, elapsed_ms) without raising."""
+    started = time.perf_counter()
+    try:
+        value = await asyncio.wait_for(leg, timeout=timeout)
+        return value, None, (time.perf_counter() - started) * 1000
+    except asyncio.TimeoutError:
+        return None, f"timed out after {timeout}s", (time.perf_counter() - started) * 1000
+    except Exception as e:
+        return None, str(e), (time.perf_counter() - started) * 1000
+
+
+class AsyncHyperClient:
+    """
+    An asyncio client for Hyperliquid's /info endpoint.
+
+    Mirrors the read-side HyperClient surface: prices, L2 book, candles, fills and user_state.
+    """
+
+    def __init__(self, account_address: Optional[str] = None, testnet: bool = False, timeout: float = 10,
+                 max_connections: int = DEFAULT_MAX_CONNECTIONS,
+                 max_keepalive_connections: int = DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+                 http2: Optional[bool] = None):
+        """
+        Initialize the async client.
+
+        Args:
+            account_address: Wallet address used for user queries (fills, user_state, balances)
+            testnet: Whether to use testnet (default: False)
+            timeout: Default request timeout in seconds
+            max_connections: Upper bound on concurrent connections in the pool
+            max_keepalive_connections: Idle connections kept open for reuse
+            http2: Force HTTP/2 on or off. Defaults to on when ``h2`` is installed.
+        """
+        self.account_address = account_address
+        self.testnet = testnet
+        self.base_url = TESTNET_API_URL if testnet else MAINNET_API_URL
+        
+        # Shared with HyperClient: one allMids snapshot per network for the whole process
+        self.mids_cache = get_mids_cache(self.base_url)
+        self._mids_refresh_lock: Optional[asyncio.Lock] = None  # Created lazily inside the running loop
+        self.rolling_stats = get_rolling_stats(self.base_url)
+        self.order_books = get_order_books(self.base_url)
+
+        if http2 is None:
+            http2 = importlib.util.find_spec("h2") is not None
+        self.http2 = http2
+
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            http2=http2,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections
+            ),
+            headers={"Content-Type": "application/json"}
+        )
+
+    async def __aenter__(self) -> "AsyncHyperClient":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+
+    async def aclose(self):
+        """Close the underlying connection pool."""
+        await self._client.aclose()
+
+    async def _post_info(self, body: Dict[str, Any], timeout: Optional[float] = None) -> Any:
+        """
+        POST a request body to the /info endpoint.
+
+        Args:
+            body: Request payload (e.g., {"type": "allMids"})
+            timeout: Optional per-request timeout override in seconds
+
+        Returns:
+            Parsed JSON response
+        """
+        if timeout is None:
+            response = await self._client.post("/info", json=body)
+        else:
+            response = await self._client.post("/info", json=body, timeout=timeout)
+        response.raise_for_status()
+        return loads(response.content)
+
+    def _require_account(self) -> str:
+        if not self.account_address:
+            raise ValueError("account_address is required for user queries")
+        return self.account_address
+
+    # ============================================================================
+    # 1. PRICE DATA RETRIEVAL
+    # ============================================================================
+
+    async def _get_mids_snapshot(self, max_staleness: Optional[float] = None) -> MidsSnapshot:
+        """
+        Return the cached allMids map, refetching over HTTP only when it is older than
+        max_staleness (defaults to the cache TTL). Pass max_staleness=0 to force a refetch.
+        """
+        if self.mids_cache.is_fresh(max_staleness):
+            return self.mids_cache.snapshot()
+
+        if self._mids_refresh_lock is None:
+            self._mids_refresh_lock = asyncio.Lock()
+        async with self._mids_refresh_lock:
+            # Another task may have refreshed while we waited
+            if self.mids_cache.is_fresh(max_staleness):
+                return self.mids_cache.snapshot()
+            try:
+                self.mids_cache.update(await self._post_info({"type": "allMids"}), source="http")
+            except httpx.HTTPError as e:
+                raise Exception(f"Failed to fetch mid-prices: {e}")
+            return self.mids_cache.snapshot()
+
+    async def get_all_mids(self, max_staleness: Optional[float] = None) -> MidsSnapshot:
+        """
+        Get snapshot of mid-prices for all trading pairs.
+
+        Served from the shared mids cache when it is fresh enough.
+
+        Args:
+            max_staleness: Maximum acceptable snapshot age in seconds (defaults to the cache TTL)
+
+        Returns:
+            MidsSnapshot: Compact symbol -> mid-price vector with a ``timestamp``.
+                Supports ``snapshot["BTC"]``, ``.get()``, ``.items()``, ``.take([...])``;
+                call ``.to_series()`` for a pandas view.
+        """
+        return await self._get_mids_snapshot(max_staleness)
+
+    async def get_mid_price(self, symbol: str, max_staleness: Optional[float] = None) -> float:
+        """
+        Get current mid-price for a specific symbol.
+
+        Args:
+            symbol: Trading symbol (e.g., "BTC", "ETH")
+            max_staleness: Maximum acceptable price age in seconds (defaults to the cache TTL)
+
+        Returns:
+            float: Current mid-price
+        """
+        try:
+            price = (await self._get_mids_snapshot(max_staleness)).get(symbol)
+            if price is None:
+                raise ValueError(f"Symbol {symbol} not found in available markets")
+            return price
+        except Exception as e:
+            raise Exception(f"Failed to fetch price for {symbol}: {e}")
+
+    async def get_l2_book(self, symbol: str, n_sig_figs: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Get L2 order book snapshot for a specific symbol.
+        Served from the locally maintained book when it is streaming, otherwise via REST.
+
+        Args:
+            symbol: Trading symbol (e.g., "BTC", "ETH")
+            n_sig_figs: Optional number of significant figures for price aggregation (2-5)
+
+        Returns:
+            dict: Order book with bids and asks
+        """
+        if n_sig_figs is None:
+            book = self.order_books.live_book(symbol)
+            if book is not None:
+                return book.to_book()
+
+        try:
+            body = {
+                "type": "l2Book",
+                "coin": symbol
+            }
+            if n_sig_figs is not None and n_sig_figs in [2, 3, 4, 5]:
+                body["nSigFigs"] = n_sig_figs
+            return parse_l2_book(await self._post_info(body))
+        except Exception as e:
+            raise Exception(f"Failed to fetch L2 book for {symbol}: {e}")
+
+    async def get_best_bid_ask(self, symbol: str) -> Dict[str, Optional[float]]:
+        """
+        Get best bid and ask prices for a symbol.
+
+        Returns:
+            dict: {"bid": best_bid_price, "ask": best_ask_price, "spread": spread}
+        """
+        book = self.order_books.live_book(symbol)
+        if book is not None:
+            return book.best_bid_ask()
+
+        try:
+            return best_bid_ask_from_book(await self.get_l2_book(symbol))
+        except Exception as e:
+            raise Exception(f"Failed to get best bid/ask for {symbol}: {e}")
+
+    async def get_candles(self, symbol: str, interval: str, start_time: int, end_time: int) -> List[Dict[str, Any]]:
+        """
+        Get raw candles for a symbol.
+
+        Args:
+            symbol: Trading symbol (e.g., "BTC", "ETH")
+            interval: Candle interval (e.g., "1m", "5m", "1h", "4h", "1d")
+            start_time: Start time in milliseconds
+            end_time: End time in milliseconds
+
+        Returns:
+            List of Hyperliquid candle dicts ({"t", "T", "s", "i", "o", "c", "h", "l", "v", "n"})
+        """
+        try:
+            candles = await self._post_info(build_candle_request(symbol, interval, start_time, end_time))
+            return candles if isinstance(candles, list) else []
+        except Exception as e:
+            raise Exception(f"Failed to fetch {interval} candles for {symbol}: {e}")
+
+    async def get_24h_stats(self, symbol: str) -> Dict[str, Any]:
+        """
+        Get 24-hour statistics for a symbol.
+        Served from the rolling trade-stream window when it is live, otherwise from hourly candles.
+
+        Returns:
+            dict: 24h stats including high, low, volume, price change
+        """
+        stats = self.rolling_stats.live_snapshot(symbol)
+        if stats is not None:
+            return stats
+
+        try:
+            candles = await self._post_info(build_24h_candle_request(symbol))
+            return compute_24h_stats(candles)
+        except Exception as e:
+            raise Exception(f"Failed to get 24h stats for {symbol}: {e}")
+
+    async def get_full_market_data(self, symbol: str, leg_timeout: float = DEFAULT_LEG_TIMEOUT) -> Dict[str, Any]:
+        """
+        Get comprehensive market data including price, bid/ask, and 24h stats.
+
+        The three upstream requests run concurrently. A leg that fails or exceeds
+        leg_timeout leaves its fields as None instead of failing the call.
+
+        Args:
+            symbol: Trading symbol (e.g., "BTC", "ETH")
+            leg_timeout: Seconds allowed for each upstream request
+
+        Returns:
+            dict: Complete market data, plus "leg_timings_ms", "errors" and "partial"
+        """
+        try:
+            legs = {
+                "mid_price": self.get_mid_price(symbol),
+                "bid_ask": self.get_best_bid_ask(symbol),
+                "stats_24h": self.get_24h_stats(symbol),
+            }
+            outcomes = await asyncio.gather(*(_timed_leg(leg, leg_timeout) for leg in legs.values()))
+
+            results, errors, timings = {}, {}, {}
+            for name, (value, error, elapsed_ms) in zip(legs, outcomes):
+                results[name] = value
+                timings[name] = round(elapsed_ms, 2)
+                if error is not None:
+                    errors[name] = error
+            return assemble_market_data(symbol, results, errors, timings)
+        except Exception as e:
+            raise Exception(f"Failed to get full market data for {symbol}: {e}")
+
+    # ============================================================================
+    # 2. PORTFOLIO & BALANCE QUERIES
+    # ============================================================================
+
+    async def get_user_state(self) -> Dict[str, Any]:
+        """Get the perpetuals clearinghouse state (equivalent to SDK ``Info.user_state``)."""
+        try:
+            return await self._post_info({"type": "clearinghouseState", "user": self._require_account()})
+        except Exception as e:
+            raise Exception(f"Failed to fetch portfolio data (user_state): {e}")
+
+    async def get_portfolio(self) -> Dict[str, Any]:
+        return await self.get_user_state()
+
+    async def get_equity(self) -> float:
+        try:
+            return equity_from_user_state(await self.get_user_state())
+        except Exception as e:
+            raise Exception(f"Failed to fetch or parse equity from user_state: {e}")
+
+    async def get_margin_summary(self) -> Dict[str, Any]:
+        try:
+            return margin_summary_from_user_state(await self.get_user_state())
+        except Exception as e:
+            raise Exception(f"Failed to fetch margin summary from user_state: {e}")
+
+    async def get_positions(self) -> List[Dict[str, Any]]:
+        try:
+            return positions_from_user_state(await self.get_user_state())
+        except Exception as e:
+            raise Exception(f"Failed to fetch positions from user_state: {e}")
+
+    async def get_balance(self) -> Dict[str, float]:
+        try:
+            data = await self._post_info({"type": "spotClearinghouseState", "user": self._require_account()})
+            return parse_spot_balances(data)
+        except Exception as e:
+            raise Exception(f"Failed to fetch spot balances: {e}")
+
+    async def get_user_fills_by_time(self, start_time: int, end_time: Optional[int] = None,
+                                     aggregate_by_time: bool = False) -> List[Dict[str, Any]]:
+        """
+        Get user fills within a time range.
+
+        Args:
+            start_time: Start time in milliseconds (inclusive)
+            end_time: End time in milliseconds (inclusive). Defaults to current time.
+            aggregate_by_time: When true, partial fills are combined
+
+        Returns:
+            List of fill dictionaries containing trade information
+        """
+        try:
+            body = {
+                "type": "userFillsByTime",
+                "user": self._require_account(),
+                "startTime": start_time,
+                "endTime": end_time if end_time is not None else int(time.time() * 1000)
+            }
+            if aggregate_by_time:
+                body["aggregateByTime"] = True
+            return parse_fills(await self._post_info(body))
+        except Exception as e:
+            raise Exception(f"Failed to fetch user fills: {e}")
+
+    async def iter_user_fills_by_time(self, start_time: int, end_time: Optional[int] = None,
+                                      aggregate_by_time: bool = False) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Page through user fills in a time range, oldest page first.
+
+        userFillsByTime returns at most USER_FILLS_PAGE_LIMIT fills per request; a full page is
+        followed by a request starting at its last fill time. Fills at that boundary millisecond
+        that were already yielded are skipped.
+
+        Args:
+            start_time: Start time in milliseconds (inclusive)
+            end_time: End time in milliseconds (inclusive). Defaults to current time.
+            aggregate_by_time: When true, partial fills are combined
+
+        Yields:
+            Lists of fill dictionaries, each sorted by time
+        """
+        end_time = end_time if end_time is not None else int(time.time() * 1000)
+        boundary_fills = set()
+        while start_time <= end_time:
+            page = await self.get_user_fills_by_time(start_time, end_time, aggregate_by_time)
+            full_page = len(page) >= USER_FILLS_PAGE_LIMIT
+            page.sort(key=lambda fill: fill.get("time", 0))
+            fills = [fill for fill in page
+                     if fill.get("time", 0) != start_time or (fill.get("tid"), fill.get("oid")) not in boundary_fills]
+            if fills:
+                yield fills
+            if not full_page or not fills:
+                return
+            start_time = page[-1].get("time", 0)
+            boundary_fills = {(fill.get("tid"), fill.get("oid")) for fill in page if fill.get("time", 0) == start_time}
+
+    async def get_user_fills(self, aggregate_by_time: bool = False) -> List[Dict[str, Any]]:
+        """
+        Get recent user fills (up to 2000 most recent).
+
+        Returns:
+            List of fill dictionaries containing trade information
+        """
+        try:
+            body = {
+                "type": "userFills",
+                "user": self._require_account()
+            }
+            if aggregate_by_time:
+                body["aggregateByTime"] = True
+            return parse_fills(await self._post_info(body))
+        except Exception as e:
+            raise Exception(f"Failed to fetch user fills: {e}")
+
+    # ============================================================================
+    # UTILITY METHODS
+    # ============================================================================
+
+    async def get_exchange_info(self) -> Dict[str, Any]:
+        try:
+            return await self._post_info({"type": "meta"})
+        except Exception as e:
+            raise Exception(f"Failed to fetch exchange info (meta): {e}")
+
+    async def health_check(self) -> bool:
+        try:
+            await self.get_all_mids()
+            return True
+        except Exception:
+            return False
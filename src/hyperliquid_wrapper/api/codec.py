@@ -0,0 +1,156 @@
+"""
+JSON codec for WebSocket frames and /info responses.
+
+Uses ``orjson`` when it is installed and falls back to the stdlib ``json`` module otherwise.
+Both paths parse ``bytes`` directly, so binary frames and HTTP bodies never go through an
+intermediate ``.decode()``.
+
+``LazyFrame`` wraps a raw WebSocket frame and answers routing questions (channel, coin/user)
+by scanning the raw text; the full document is only decoded the first time a handler reads
+a field other than those.
+
+Usage:
+    from .codec import loads, dumps, LazyFrame
+
+    data = loads(response.content)
+    frame = LazyFrame(raw_message)
+    if frame.channel == "trades":
+        trades = frame["data"]        # Decoded here, once
+"""
+
+import json
+import re
+from typing import Any, Iterator, Optional, Tuple, Union
+
+try:
+    import orjson
+except ImportError:  # Optional dependency
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+# Hyperliquid frames start with {"channel":"...","data":...}; the channel is found in the head
+_CHANNEL_RE = re.compile(rb'"channel"\s*:\s*"([^"]*)"')
+_COIN_RE = re.compile(rb'"coin"\s*:\s*"([^"]*)"')
+_CHANNEL_PEEK_BYTES = 64
+
+# Channels whose only "coin" field is the one that identifies the subscription
+_COIN_KEYED_CHANNELS = {"trades", "l2Book", "bbo", "activeAssetCtx"}
+
+
+def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+    """Parse JSON from bytes or str with the fastest available backend."""
+    if orjson is not None:
+        return orjson.loads(data)
+    if isinstance(data, memoryview):
+        data = bytes(data)
+    return json.loads(data)  # The stdlib detects UTF-8/16/32 in bytes itself
+
+
+def dumps(obj: Any) -> str:
+    """Serialize to a JSON string (text frames and request bodies)."""
+    if orjson is not None:
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj, separators=(",", ":"))
+
+
+def _as_bytes(raw: Union[bytes, str]) -> bytes:
+    return raw if isinstance(raw, bytes) else raw.encode("utf-8")
+
+
+class LazyFrame:
+    """
+    Read-only, dict-like view of a WebSocket frame that decodes on first real access.
+
+    ``channel`` and ``routing_key()`` are answered from the raw text; ``frame["data"]``,
+    ``frame.get(...)``, iteration and ``frame.parsed`` trigger one full decode.
+    """
+
+    __slots__ = ("raw", "_raw_bytes", "_parsed", "_channel")
+
+    def __init__(self, raw: Union[bytes, str, dict]):
+        self.raw = raw
+        self._raw_bytes: Optional[bytes] = None
+        self._parsed: Any = raw if isinstance(raw, dict) else None
+        self._channel: Optional[str] = None
+
+    def _bytes(self) -> bytes:
+        if self._raw_bytes is None:
+            self._raw_bytes = _as_bytes(self.raw)
+        return self._raw_bytes
+
+    @property
+    def decoded(self) -> bool:
+        return self._parsed is not None
+
+    @property
+    def parsed(self) -> Any:
+        """The fully decoded frame (decoded once, then cached)."""
+        if self._parsed is None:
+            self._parsed = loads(self.raw)
+        return self._parsed
+
+    @property
+    def channel(self) -> Optional[str]:
+        """The frame's channel, read from the head of the raw text when possible."""
+        if self._channel is None:
+            if self._parsed is not None:
+                self._channel = self._parsed.get("channel") if isinstance(self._parsed, dict) else None
+            else:
+                match = _CHANNEL_RE.search(self._bytes(), 0, _CHANNEL_PEEK_BYTES)
+                if match is not None:
+                    self._channel = match.group(1).decode("utf-8")
+                else:
+                    parsed = self.parsed
+                    self._channel = parsed.get("channel") if isinstance(parsed, dict) else None
+        return self._channel
+
+    def peek_coin(self) -> Optional[str]:
+        """The coin for coin-keyed channels without decoding the frame (None if not found)."""
+        if self._parsed is None and self.channel in _COIN_KEYED_CHANNELS:
+            match = _COIN_RE.search(self._bytes())
+            if match is not None:
+                return match.group(1).decode("utf-8")
+        return None
+
+    def routing_key(self, decode_key) -> Tuple[Optional[str], Optional[str]]:
+        """
+        (channel, coin/user) for routing. Coin-keyed channels are answered by peeking;
+        anything else falls back to ``decode_key(channel, data)`` on the decoded frame.
+        """
+        channel = self.channel
+        coin = self.peek_coin()
+        if coin is not None:
+            return channel, coin
+        parsed = self.parsed
+        return decode_key(channel, parsed.get("data") if isinstance(parsed, dict) else None)
+
+    # Mapping-style access used by handlers
+
+    def __getitem__(self, key: str) -> Any:
+        if key == "channel":
+            return self.channel
+        return self.parsed[key]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key == "channel":
+            return self.channel if self.channel is not None else default
+        parsed = self.parsed
+        return parsed.get(key, default) if isinstance(parsed, dict) else default
+
+    def __contains__(self, key: str) -> bool:
+        parsed = self.parsed
+        return isinstance(parsed, dict) and key in parsed
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.parsed)
+
+    def keys(self):
+        return self.parsed.keys()
+
+    def items(self):
+        return self.parsed.items()
+
+    def __repr__(self) -> str:
+        state = "decoded" if self.decoded else "raw"
+        return f"LazyFrame(channel={self.channel!r}, {state})"
@@ -0,0 +1,136 @@
+"""
+Bounded frame queue between WebSocket receive loops and handler consumers.
+
+The receive loop only reads and enqueues; consumers drain the queue and run handlers. When
+the queue is full, the overflow policy decides what happens:
+
+    "block"        the receiver waits for room (backpressure onto the socket)
+    "drop_oldest"  the oldest droppable frame is discarded to make room
+    "coalesce"     a pending snapshot frame for the same (channel, coin) is replaced in place
+                   by the newer one; other frames block
+
+Frames from lossless channels (user fills, order updates, ...) are never dropped or coalesced,
+and only snapshot-style channels (l2Book, allMids, candle, ...) are coalesced.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, Dict, Optional, Tuple
+
+BLOCK = "block"
+DROP_OLDEST = "drop_oldest"
+COALESCE = "coalesce"
+OVERFLOW_POLICIES = (BLOCK, DROP_OLDEST, COALESCE)
+
+# Channels whose frames are full snapshots, so only the newest pending one matters
+COALESCIBLE_CHANNELS = {"l2Book", "allMids", "bbo", "candle", "activeAssetCtx", "webData2"}
+# Channels whose frames must all be delivered
+LOSSLESS_CHANNELS = {"userFills", "orderUpdates", "userEvents", "userFundings",
+                     "userNonFundingLedgerUpdates", "subscriptionResponse"}
+
+
+class QueuedFrame:
+    """One received frame waiting for a consumer."""
+
+    __slots__ = ("connection", "key", "payload", "received_at")
+
+    def __init__(self, connection: Any, key: Tuple[Any, Any], payload: Any):
+        self.connection = connection
+        self.key = key
+        self.payload = payload  # Usually a codec.LazyFrame, decoded by the consumer
+        self.received_at = time.monotonic()
+
+    @property
+    def channel(self) -> Optional[str]:
+        return self.key[0]
+
+
+class FrameQueue:
+    """Bounded FIFO of QueuedFrames with an overflow policy and depth/lag metrics."""
+
+    def __init__(self, maxsize: int = 1000, policy: str = BLOCK):
+        """
+        Args:
+            maxsize: Maximum frames waiting before the overflow policy applies
+            policy: One of "block", "drop_oldest", "coalesce"
+        """
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {policy}")
+        self.maxsize = maxsize
+        self.policy = policy
+        self._items: deque = deque()
+        self._pending: Dict[Tuple[Any, Any], QueuedFrame] = {}  # Coalescible frames still queued
+        self._changed = asyncio.Condition()
+
+        self.enqueued = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.max_depth = 0
+        self.last_lag_ms = 0.0
+        self.max_lag_ms = 0.0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    async def put(self, frame: QueuedFrame):
+        """Enqueue a frame, applying the overflow policy when the queue is full."""
+        async with self._changed:
+            coalescible = (self.policy == COALESCE and frame.key[1] is not None
+                           and frame.channel in COALESCIBLE_CHANNELS)
+            if coalescible:
+                pending = self._pending.get(frame.key)
+                if pending is not None:
+                    # Keep the queue position and original receive time, deliver the newest data
+                    pending.payload = frame.payload
+                    self.coalesced += 1
+                    return
+
+            while len(self._items) >= self.maxsize:
+                if self.policy == DROP_OLDEST and self._drop_oldest():
+                    break
+                await self._changed.wait()
+
+            self._items.append(frame)
+            if coalescible:
+                self._pending[frame.key] = frame
+            self.enqueued += 1
+            self.max_depth = max(self.max_depth, len(self._items))
+            self._changed.notify_all()
+
+    def _drop_oldest(self) -> bool:
+        for frame in self._items:
+            if frame.channel not in LOSSLESS_CHANNELS:
+                self._items.remove(frame)
+                if self._pending.get(frame.key) is frame:
+                    del self._pending[frame.key]
+                self.dropped += 1
+                return True
+        return False  # Only lossless frames queued: fall back to blocking
+
+    async def get(self) -> QueuedFrame:
+        """Wait for and remove the oldest frame, recording its queueing lag."""
+        async with self._changed:
+            while not self._items:
+                await self._changed.wait()
+            frame = self._items.popleft()
+            if self._pending.get(frame.key) is frame:
+                del self._pending[frame.key]
+            self._changed.notify_all()
+
+        self.last_lag_ms = (time.monotonic() - frame.received_at) * 1000
+        self.max_lag_ms = max(self.max_lag_ms, self.last_lag_ms)
+        return frame
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "depth": len(self._items),
+            "max_depth": self.max_depth,
+            "capacity": self.maxsize,
+            "policy": self.policy,
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "last_lag_ms": round(self.last_lag_ms, 3),
+            "max_lag_ms": round(self.max_lag_ms, 3)
+        }
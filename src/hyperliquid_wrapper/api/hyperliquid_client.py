@@ -20,9 +20,7 @@ Usage:
 """
 
 import requests
-import pandas as pd
 import time
-import json
 import asyncio
 import websockets
 from typing import Dict, Optional, Any, List, Union, Callable
@@ -30,12 +28,42 @@ from eth_account import Account
 from hyperliquid.exchange import Exchange
 from hyperliquid.info import Info
 import traceback
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 
 # Import the new handler functions
 # Adjusted path for being inside api/ directory, model_handlers is a sibling
 from ..model_handlers.model_stream_handler import simple_trade_data_handler, detailed_trade_data_handler
 # Import for userFills
 from ..data_handlers.fill_handler import user_fill_handler
+from ..database_handlers.database_manager import get_last_trade_timestamp
+from src.network_context import network_context
+from ..data_handlers.mids_cache import get_mids_cache
+from ..data_handlers.rolling_stats import get_rolling_stats, WINDOW_MS
+from ..data_handlers.order_book import get_order_books, BOOK_STALE_AFTER
+from ..data_handlers.price_vector import MidsSnapshot
+from .ws_manager import get_ws_manager
+from .transport import PooledTransport, get_shared_transport
+from .codec import loads
+from .response_parsers import (
+    parse_l2_book, best_bid_ask_from_book, build_24h_candle_request, build_candle_request, compute_24h_stats,
+    build_market_data, assemble_market_data, parse_spot_balances, equity_from_user_state,
+    margin_summary_from_user_state, positions_from_user_state, parse_fills
+)
+
+DEFAULT_LEG_TIMEOUT = 5  # Seconds allowed for each leg of get_full_market_data
+USER_FILLS_PAGE_LIMIT = 2000  # Max fills returned by one userFillsByTime request
+
+# Shared by all clients so network switches (which recreate clients) don't leak threads
+_fanout_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="hyperclient-fanout")
+
+
+def _timed_leg(leg: Callable[[], Any]):
+    """Run one fan-out leg, returning (value, error_message, elapsed_ms) without raising."""
+    started = time.perf_counter()
+    try:
+        return leg(), None, (time.perf_counter() - started) * 1000
+    except Exception as e:
+        return None, str(e), (time.perf_counter() - started) * 1000
 
 
 class HyperClient:
@@ -45,7 +73,8 @@ class HyperClient:
     Provides basic functionality for price data, trading, and portfolio management.
     """
     
-    def __init__(self, account_address: str, api_secret: str, testnet: bool = False):
+    def __init__(self, account_address: str, api_secret: str, testnet: bool = False,
+                 transport: Optional[PooledTransport] = None):
         """
         Initialize the Hyperliquid client.
         
@@ -53,10 +82,13 @@ class HyperClient:
             account_address: Your main wallet public key (0x...)
             api_secret: Your API wallet private key
             testnet: Whether to use testnet (default: False)
+            transport: Optional pooled HTTP transport. Defaults to the process-wide shared
+                       transport so every client reuses the same keep-alive connections.
         """
         self.account_address = account_address
         self.api_secret = api_secret # Storing for potential re-use or audit, though wallet object is primary
         self.testnet = testnet
+        self.transport = transport if transport is not None else get_shared_transport()
         
         # Set base URLs
         if testnet:
@@ -66,6 +98,13 @@ class HyperClient:
             self.base_url = "https://api.hyperliquid.xyz"
             self.ws_url = "wss://api.hyperliquid.xyz/ws"
         
+        # Shared allMids snapshot for this network (fed by stream_all_mids or HTTP fallback)
+        self.mids_cache = get_mids_cache(self.base_url)
+        # Per-coin rolling 24h stats (fed by stream_24h_stats)
+        self.rolling_stats = get_rolling_stats(self.base_url)
+        # Locally maintained L2 books (fed by stream_order_book)
+        self.order_books = get_order_books(self.base_url)
+        
         # Initialize SDK components
         try:
             # Create wallet from private key
@@ -79,87 +118,120 @@ class HyperClient:
             # skip_ws=True for Info if not using its WebSocket features directly, 
             # as our client has its own ws stream_trades method.
             self.info = Info(base_url=self.base_url, skip_ws=True) 
+            
+            # Route SDK HTTP calls through the same pooled keep-alive session
+            self.transport.attach(self.exchange)
+            self.transport.attach(self.info)
         except Exception as e:
             raise Exception(f"Failed to initialize Hyperliquid client: {e}")
     
+    def _post_info(self, body: Dict[str, Any], timeout: float = 10) -> Any:
+        """
+        POST a request body to the /info endpoint over the pooled transport.
+        
+        Args:
+            body: Request payload (e.g., {"type": "allMids"})
+            timeout: Request timeout in seconds
+            
+        Returns:
+            Parsed JSON response
+        """
+        response = self.transport.post(f"{self.base_url}/info", json=body, timeout=timeout)
+        response.raise_for_status()
+        return loads(response.content)
+    
+    def get_connection_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get per-host connection reuse counters for the pooled HTTP transport.
+        
+        Returns:
+            dict: {host: {"requests", "new_connections", "reused", "reuse_rate"}}
+        """
+        return self.transport.get_connection_stats()
+    
     # ============================================================================
     # 1. PRICE DATA RETRIEVAL
     # ============================================================================
     
-    def get_all_mids(self) -> pd.Series:
+    def _get_mids_snapshot(self, timeout: float = 10, max_staleness: Optional[float] = None) -> MidsSnapshot:
+        """
+        Return the cached allMids map, refetching over HTTP only when it is older than
+        max_staleness (defaults to the cache TTL). Pass max_staleness=0 to force a refetch.
+        """
+        if self.mids_cache.is_fresh(max_staleness):
+            return self.mids_cache.snapshot()
+        
+        with self.mids_cache.refresh_lock:
+            # Another thread may have refreshed while we waited
+            if self.mids_cache.is_fresh(max_staleness):
+                return self.mids_cache.snapshot()
+            try:
+                self.mids_cache.update(self._post_info({"type": "allMids"}, timeout=timeout), source="http")
+            except requests.exceptions.RequestException as e:
+                raise Exception(f"Failed to fetch mid-prices: {e}")
+            return self.mids_cache.snapshot()
+    
+    def get_all_mids(self, timeout: float = 10, max_staleness: Optional[float] = None) -> MidsSnapshot:
         """
         Get snapshot of mid-prices for all trading pairs.
         
+        Served from the shared mids cache when it is fresh enough.
+        
+        Args:
+            timeout: Request timeout in seconds (HTTP fallback only)
+            max_staleness: Maximum acceptable snapshot age in seconds (defaults to the cache TTL)
+            
         Returns:
-            pandas.Series: Mid-prices indexed by symbol with timestamp as name
+            MidsSnapshot: Compact symbol -> mid-price vector with a ``timestamp``.
+                Supports ``snapshot["BTC"]``, ``.get()``, ``.items()``, ``.take([...])``;
+                call ``.to_series()`` for a pandas view.
         """
-        try:
-            body = {"type": "allMids"}
-            response = requests.post(f"{self.base_url}/info", json=body, timeout=10)
-            response.raise_for_status()
-            
-            return pd.Series(response.json(), name=time.time())
-        except requests.exceptions.RequestException as e:
-            raise Exception(f"Failed to fetch mid-prices: {e}")
+        return self._get_mids_snapshot(timeout=timeout, max_staleness=max_staleness)
     
-    def get_mid_price(self, symbol: str) -> float:
+    def get_mid_price(self, symbol: str, timeout: float = 10, max_staleness: Optional[float] = None) -> float:
         """
         Get current mid-price for a specific symbol.
         
         Args:
             symbol: Trading symbol (e.g., "BTC", "ETH")
+            timeout: Request timeout in seconds (HTTP fallback only)
+            max_staleness: Maximum acceptable price age in seconds (defaults to the cache TTL)
             
         Returns:
             float: Current mid-price
         """
         try:
-            mids = self.get_all_mids()
-            if symbol not in mids.index: # Check if symbol exists in the Series index
+            price = self._get_mids_snapshot(timeout=timeout, max_staleness=max_staleness).get(symbol)
+            if price is None:
                 raise ValueError(f"Symbol {symbol} not found in available markets")
             
-            return float(mids[symbol])
+            return price
         except Exception as e: 
             raise Exception(f"Failed to fetch price for {symbol}: {e}")
     
-    async def _manage_websocket_stream(self, subscription_details: dict, message_handler_callback: Callable, stream_description: str):
+    async def _manage_websocket_stream(self, subscription_details: dict, message_handler_callback: Callable, stream_description: str,
+                                       supervised: bool = False, on_reconnect: Optional[Callable] = None):
         """
         Private helper to manage a generic WebSocket stream lifecycle.
+        Subscriptions share multiplexed connections through the WebSocketManager for this
+        ws_url and are unsubscribed when the caller is cancelled. Unsupervised streams raise
+        when the carrying connection drops; supervised streams are reconnected and resubscribed
+        with jittered backoff and keep running.
 
         Args:
             subscription_details (dict): The specific subscription payload (e.g., {"type": "trades", "coin": "BTC"}).
-            message_handler_callback (Callable): A callback function that takes (parsed_message, stream_description) and processes it.
+            message_handler_callback (Callable): A callback function that takes (parsed_message, stream_description, raw_message) and processes it.
             stream_description (str): A descriptive name for the stream for logging (e.g., "TradesStream(BTC)").
+            supervised (bool): Survive disconnects by reconnecting and resubscribing.
+            on_reconnect (Callable): Optional sync or async hook run after each reconnect, e.g. to backfill missed data.
         """
-        print(f"[HyperClient._manage_websocket_stream] Attempting to connect to {stream_description} at {self.ws_url}")
+        print(f"[HyperClient._manage_websocket_stream] Subscribing to {stream_description} at {self.ws_url}")
+        handle = None
         try:
-            async with websockets.connect(self.ws_url) as websocket:
-                full_subscribe_msg = {"method": "subscribe", "subscription": subscription_details}
-                await websocket.send(json.dumps(full_subscribe_msg))
-                print(f"[HyperClient._manage_websocket_stream] Subscribed to {stream_description}. Waiting for messages...")
-
-                while True:
-                    message = await websocket.recv()
-                    raw_message_for_reporting = message # Keep a reference for detailed error reporting if needed
-                    parsed_message = None
-                    try:
-                        if isinstance(message, str):
-                            parsed_message = json.loads(message)
-                        elif isinstance(message, bytes):
-                            parsed_message = json.loads(message.decode('utf-8'))
-                        else:
-                            # Should ideally be JSON string or bytes, but pass as is if not handled by specific handler
-                            parsed_message = message 
-                        
-                        # Pass to the specific message handler provided by the public stream method
-                        message_handler_callback(parsed_message, stream_description, raw_message_for_reporting)
-
-                    except json.JSONDecodeError as e_json:
-                        print(f"[HyperClient._manage_websocket_stream] JSONDecodeError for {stream_description}: {e_json}. Raw message: {raw_message_for_reporting}")
-                        # Optionally, notify handler of error: message_handler_callback({"error": "JSONDecodeError", ...}, ...)
-                    except Exception as e_callback_or_parse: # Catch errors from within the message_handler_callback too
-                        print(f"[HyperClient._manage_websocket_stream] Error in message_handler_callback for {stream_description}: {e_callback_or_parse}.")
-                        traceback.print_exc()
-                        # Optionally, notify handler of error
+            handle = await get_ws_manager(self.ws_url).subscribe(subscription_details, message_handler_callback, stream_description,
+                                                                 supervised=supervised, on_reconnect=on_reconnect)
+            print(f"[HyperClient._manage_websocket_stream] Subscribed to {stream_description}. Waiting for messages...")
+            await handle.wait_closed()
         
         except websockets.exceptions.ConnectionClosed as e_closed:
             print(f"[HyperClient._manage_websocket_stream] WebSocket connection for {stream_description} closed: Code {e_closed.code}, Reason: {e_closed.reason}")
@@ -167,10 +239,15 @@ class HyperClient:
         except websockets.exceptions.WebSocketException as e_ws:
             print(f"[HyperClient._manage_websocket_stream] WebSocketException for {stream_description}: {e_ws}")
             raise # Re-raise
+        except asyncio.CancelledError:
+            raise
         except Exception as e_general:
             print(f"[HyperClient._manage_websocket_stream] Unexpected error in {stream_description}: {e_general}")
             traceback.print_exc()
             raise # Re-raise
+        finally:
+            if handle is not None:
+                await handle.unsubscribe()
 
     async def stream_trades(self, symbol: str = "BTC", callback: Optional[Callable[[Dict[str, Any]], None]] = None):
         """
@@ -199,14 +276,134 @@ class HyperClient:
 
         await self._manage_websocket_stream(subscription_details, internal_message_handler, stream_description)
 
-    async def stream_user_fills(self, callback: Optional[Callable[[Dict[str, Any]], None]] = None):
+    async def stream_all_mids(self, callback: Optional[Callable[[Dict[str, Any]], None]] = None):
+        """
+        Streams allMids snapshots via WebSocket.
+        By default each snapshot refreshes the shared mids cache, so price lookups need no HTTP call.
+        """
+        final_mids_handler = callback if callback is not None else self.mids_cache.handle_all_mids_message
+        
+        subscription_details = {"type": "allMids"}
+        stream_description = "AllMidsStream"
+        
+        def internal_message_handler(parsed_message, stream_desc, raw_message):
+            try:
+                final_mids_handler(parsed_message)
+            except Exception as e_callback:
+                print(f"[HyperClient.stream_all_mids] Error in callback for {stream_desc}: {e_callback}.")
+                traceback.print_exc()
+        
+        await self._manage_websocket_stream(subscription_details, internal_message_handler, stream_description)
+
+    async def stream_24h_stats(self, symbol: str):
+        """
+        Maintains rolling 24h stats for a symbol from the trades stream.
+        Seeds the window from 1m candles, then folds in every trade until the stream ends.
+        """
+        stats = self.rolling_stats.get(symbol)
+        now_ms = int(time.time() * 1000)
+        loop = asyncio.get_running_loop()
+        candles = await loop.run_in_executor(None, self.get_candles, symbol, "1m", now_ms - WINDOW_MS, now_ms)
+        stats.seed(candles, now_ms)
+        print(f"[HyperClient.stream_24h_stats] Seeded {symbol} with {len(candles)} candles")
+        
+        try:
+            await self.stream_trades(symbol, callback=self.rolling_stats.handle_trades_message)
+        finally:
+            # Missed trades would make the window wrong; fall back to HTTP until reseeded
+            stats.live = False
+
+    async def stream_order_book(self, symbol: str):
+        """
+        Maintains the local L2 book for a symbol from the l2Book stream.
+        If no frame arrives for BOOK_STALE_AFTER seconds the book is resynced from REST.
+        """
+        book = self.order_books.get(symbol)
+        loop = asyncio.get_running_loop()
+        
+        async def resync_when_stale():
+            while True:
+                await asyncio.sleep(BOOK_STALE_AFTER)
+                if book.is_stale():
+                    try:
+                        data = await loop.run_in_executor(None, self._post_info, {"type": "l2Book", "coin": symbol})
+                        book.apply_snapshot(data["levels"], data.get("time"))
+                        print(f"[HyperClient.stream_order_book] Resynced stale {symbol} book from REST")
+                    except Exception as e:
+                        print(f"[HyperClient.stream_order_book] Resync failed for {symbol}: {e}")
+        
+        def internal_message_handler(parsed_message, stream_desc, raw_message):
+            try:
+                self.order_books.handle_l2_book_message(parsed_message)
+            except Exception as e_callback:
+                print(f"[HyperClient.stream_order_book] Error in callback for {stream_desc}: {e_callback}.")
+                traceback.print_exc()
+        
+        watchdog = asyncio.create_task(resync_when_stale())
+        try:
+            await self._manage_websocket_stream({"type": "l2Book", "coin": symbol}, internal_message_handler,
+                                                f"L2BookStream({symbol})")
+        finally:
+            watchdog.cancel()
+            book.live = False
+
+    def backfill_user_fills(self, fill_handler: Optional[Callable[[Any], None]] = None, since: Optional[int] = None) -> int:
+        """
+        Replays fills missed while no userFills stream was connected.
+        Pages through userFillsByTime from the newest persisted fill (or `since`) to now and
+        passes each page to fill_handler; fills already stored are skipped by the trades table's
+        unique key.
+        
+        Args:
+            fill_handler: Receives a list of fills (defaults to user_fill_handler)
+            since: Start time in ms. Defaults to the last persisted trade time for this network.
+            
+        Returns:
+            int: Number of fills replayed
+        """
+        fill_handler = fill_handler if fill_handler is not None else user_fill_handler
+        network = "testnet" if self.testnet else "mainnet"
+        
+        with network_context(network):
+            if since is None:
+                since = get_last_trade_timestamp(network)
+            if since is None:
+                return 0  # Nothing persisted yet; the subscription snapshot covers recent fills
+            
+            replayed = 0
+            while True:
+                fills = self.get_user_fills_by_time(since)
+                if not fills:
+                    break
+                fill_handler(fills)
+                replayed += len(fills)
+                newest = max(int(fill["time"]) for fill in fills)
+                if len(fills) < USER_FILLS_PAGE_LIMIT or newest <= since:
+                    break
+                since = newest
+        
+        print(f"[HyperClient.backfill_user_fills] Replayed {replayed} fills on {network}")
+        return replayed
+
+    async def stream_user_fills(self, callback: Optional[Callable[[Dict[str, Any]], None]] = None, supervised: bool = True):
         """
         Streams real-time user fill events for the authenticated user via WebSocket.
         Passes parsed fill data to the callback.
+        
+        When supervised (the default), the stream reconnects after disconnects and backfills
+        fills missed in the meantime via userFillsByTime, starting from the last persisted
+        trade. The same backfill runs once at startup.
         """
         final_fill_handler = callback if callback is not None else user_fill_handler
         if callback is None:
             print(f"[HyperClient.stream_user_fills] No custom callback, using default user_fill_handler.")
+        
+        async def backfill():
+            loop = asyncio.get_running_loop()
+            try:
+                await loop.run_in_executor(None, self.backfill_user_fills, final_fill_handler)
+            except Exception as e:
+                print(f"[HyperClient.stream_user_fills] Backfill failed: {e}")
 
         subscription_details = {"type": "userFills", "user": self.account_address}
         stream_description = "UserFillsStream"
@@ -227,7 +424,16 @@ class HyperClient:
                 # Optionally, if your handlers are designed to receive error dicts:
                 # final_fill_handler({"error": "CallbackProcessingError", "details": str(e_callback), "raw_message": raw_message})
         
-        await self._manage_websocket_stream(subscription_details, internal_message_handler, stream_description)
+        if not supervised:
+            await self._manage_websocket_stream(subscription_details, internal_message_handler, stream_description)
+            return
+        
+        startup_backfill = asyncio.create_task(backfill())
+        try:
+            await self._manage_websocket_stream(subscription_details, internal_message_handler, stream_description,
+                                                supervised=True, on_reconnect=backfill)
+        finally:
+            startup_backfill.cancel()
     
     # ============================================================================
     # 2. TRADING FUNCTIONALITY
@@ -291,64 +497,49 @@ class HyperClient:
     def get_equity(self) -> float:
         try:
             user_state = self.info.user_state(self.account_address)
-            if user_state:
-                if "crossMarginSummary" in user_state and isinstance(user_state["crossMarginSummary"], dict):
-                    return float(user_state["crossMarginSummary"].get("accountValue", 0.0))
-                if "marginSummary" in user_state and isinstance(user_state["marginSummary"], dict): 
-                    return float(user_state["marginSummary"].get("accountValue", 0.0))
-                if "accountValue" in user_state:
-                     return float(user_state["accountValue"])
-            return 0.0
+            return equity_from_user_state(user_state)
         except Exception as e:
             raise Exception(f"Failed to fetch or parse equity from user_state: {e}")
     
     def get_margin_summary(self) -> Dict[str, Any]:
         try:
             user_state = self.info.user_state(self.account_address)
-            if user_state:
-                if "crossMarginSummary" in user_state and isinstance(user_state["crossMarginSummary"], dict):
-                    return user_state["crossMarginSummary"]
-                if "marginSummary" in user_state and isinstance(user_state["marginSummary"], dict): 
-                    return user_state["marginSummary"]
-            return {}
+            return margin_summary_from_user_state(user_state)
         except Exception as e:
             raise Exception(f"Failed to fetch margin summary from user_state: {e}")
     
     def get_positions(self) -> List[Dict[str, Any]]:
         try:
             user_state = self.info.user_state(self.account_address)
-            if user_state and "assetPositions" in user_state and isinstance(user_state["assetPositions"], list):
-                return user_state["assetPositions"]
-            return []
+            return positions_from_user_state(user_state)
         except Exception as e:
             raise Exception(f"Failed to fetch positions from user_state: {e}")
     
     def get_balance(self) -> Dict[str, float]:
         try:
-            response = requests.post(
-                f"{self.base_url}/info",
-                json={"type": "spotClearinghouseState", "user": self.account_address},
-                timeout=10
-            )
-            response.raise_for_status()
-            data = response.json()
-            if "balances" in data and isinstance(data["balances"], list):
-                return {balance.get("coin", "UNKNOWN"): float(balance.get("total", 0.0)) for balance in data["balances"]}
-            return {}
+            data = self._post_info({"type": "spotClearinghouseState", "user": self.account_address})
+            return parse_spot_balances(data)
         except Exception as e:
             raise Exception(f"Failed to fetch spot balances: {e}")
     
-    def get_l2_book(self, symbol: str, n_sig_figs: Optional[int] = None) -> Dict[str, Any]:
+    def get_l2_book(self, symbol: str, n_sig_figs: Optional[int] = None, timeout: float = 10) -> Dict[str, Any]:
         """
         Get L2 order book snapshot for a specific symbol.
+        Served from the local book when stream_order_book is running, otherwise via REST.
         
         Args:
             symbol: Trading symbol (e.g., "BTC", "ETH")
             n_sig_figs: Optional number of significant figures for price aggregation (2-5)
+            timeout: Request timeout in seconds
             
         Returns:
             dict: Order book with bids and asks
         """
+        if n_sig_figs is None:
+            book = self.order_books.live_book(symbol)
+            if book is not None:
+                return book.to_book()
+        
         try:
             body = {
                 "type": "l2Book",
@@ -357,156 +548,110 @@ class HyperClient:
             if n_sig_figs is not None and n_sig_figs in [2, 3, 4, 5]:
                 body["nSigFigs"] = n_sig_figs
                 
-            response = requests.post(f"{self.base_url}/info", json=body, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            # Handle the actual response format from Hyperliquid
-            if isinstance(data, dict) and "levels" in data:
-                levels = data["levels"]
-                if isinstance(levels, list) and len(levels) == 2:
-                    return {
-                        "bids": levels[0],  # List of {"px": price, "sz": size, "n": num_orders}
-                        "asks": levels[1]   # List of {"px": price, "sz": size, "n": num_orders}
-                    }
-            # Handle the old format just in case
-            elif isinstance(data, list) and len(data) == 2:
-                return {
-                    "bids": data[0],
-                    "asks": data[1]
-                }
-            return {"bids": [], "asks": []}
+            data = self._post_info(body, timeout=timeout)
+            return parse_l2_book(data)
         except Exception as e:
             raise Exception(f"Failed to fetch L2 book for {symbol}: {e}")
     
-    def get_best_bid_ask(self, symbol: str) -> Dict[str, Optional[float]]:
+    def get_best_bid_ask(self, symbol: str, timeout: float = 10) -> Dict[str, Optional[float]]:
         """
         Get best bid and ask prices for a symbol.
         
         Args:
             symbol: Trading symbol (e.g., "BTC", "ETH")
+            timeout: Request timeout in seconds
             
         Returns:
             dict: {"bid": best_bid_price, "ask": best_ask_price, "spread": spread}
         """
+        live_book = self.order_books.live_book(symbol)
+        if live_book is not None:
+            return live_book.best_bid_ask()
+        
         try:
-            book = self.get_l2_book(symbol)
-            
-            best_bid = None
-            best_ask = None
-            
-            if book["bids"] and len(book["bids"]) > 0:
-                best_bid = float(book["bids"][0]["px"])
-                
-            if book["asks"] and len(book["asks"]) > 0:
-                best_ask = float(book["asks"][0]["px"])
-                
-            spread = None
-            if best_bid is not None and best_ask is not None:
-                spread = best_ask - best_bid
-                
-            return {
-                "bid": best_bid,
-                "ask": best_ask,
-                "spread": spread,
-                "spread_percentage": (spread / best_bid * 100) if best_bid and spread else None
-            }
+            book = self.get_l2_book(symbol, timeout=timeout)
+            return best_bid_ask_from_book(book)
         except Exception as e:
             raise Exception(f"Failed to get best bid/ask for {symbol}: {e}")
     
-    def get_24h_stats(self, symbol: str) -> Dict[str, Any]:
+    def get_24h_stats(self, symbol: str, timeout: float = 10) -> Dict[str, Any]:
         """
-        Get 24-hour statistics for a symbol using candle data.
+        Get 24-hour statistics for a symbol.
+        Served from the rolling trade-stream window when stream_24h_stats is running for
+        the symbol, otherwise computed from hourly candles.
         
         Args:
             symbol: Trading symbol (e.g., "BTC", "ETH")
+            timeout: Request timeout in seconds
             
         Returns:
             dict: 24h stats including high, low, volume, price change
         """
+        stats = self.rolling_stats.live_snapshot(symbol)
+        if stats is not None:
+            return stats
+        
         try:
-            # Get 24h candle data
-            end_time = int(time.time() * 1000)
-            start_time = end_time - (24 * 60 * 60 * 1000)  # 24 hours ago
-            
-            body = {
-                "type": "candleSnapshot",
-                "req": {
-                    "coin": symbol,
-                    "interval": "1h",
-                    "startTime": start_time,
-                    "endTime": end_time
-                }
-            }
-            
-            response = requests.post(f"{self.base_url}/info", json=body, timeout=10)
-            response.raise_for_status()
-            
-            candles = response.json()
-            
-            if not candles or not isinstance(candles, list):
-                return {}
-                
-            # Calculate 24h stats from hourly candles
-            high_24h = max(float(c["h"]) for c in candles)
-            low_24h = min(float(c["l"]) for c in candles)
-            volume_24h = sum(float(c["v"]) for c in candles)
-            
-            # Get price 24h ago and current price
-            price_24h_ago = float(candles[0]["o"])  # Open of first candle
-            current_price = float(candles[-1]["c"])  # Close of last candle
-            
-            price_change = current_price - price_24h_ago
-            price_change_percent = (price_change / price_24h_ago * 100) if price_24h_ago else 0
-            
-            return {
-                "high_24h": high_24h,
-                "low_24h": low_24h,
-                "volume_24h": volume_24h,
-                "price_24h_ago": price_24h_ago,
-                "current_price": current_price,
-                "price_change": price_change,
-                "price_change_percent": price_change_percent
-            }
+            candles = self._post_info(build_24h_candle_request(symbol), timeout=timeout)
+            return compute_24h_stats(candles)
         except Exception as e:
             raise Exception(f"Failed to get 24h stats for {symbol}: {e}")
-    
-    def get_full_market_data(self, symbol: str) -> Dict[str, Any]:
+
+    def get_candles(self, symbol: str, interval: str, start_time: int, end_time: int) -> List[Dict[str, Any]]:
+        """
+        Get raw candles for a symbol.
+
+        Args:
+            symbol: Trading symbol (e.g., "BTC", "ETH")
+            interval: Candle interval (e.g., "1m", "5m", "1h", "4h", "1d")
+            start_time: Start time in milliseconds
+            end_time: End time in milliseconds
+
+        Returns:
+            List of Hyperliquid candle dicts ({"t", "T", "s", "i", "o", "c", "h", "l", "v", "n"})
+        """
+        try:
+            candles = self._post_info(build_candle_request(symbol, interval, start_time, end_time))
+            return candles if isinstance(candles, list) else []
+        except Exception as e:
+            raise Exception(f"Failed to fetch {interval} candles for {symbol}: {e}")
+
+    def get_full_market_data(self, symbol: str, leg_timeout: float = DEFAULT_LEG_TIMEOUT) -> Dict[str, Any]:
         """
         Get comprehensive market data including price, bid/ask, and 24h stats.
         
+        The mid price, L2 book and 24h candle requests are issued concurrently. A leg that
+        fails or exceeds leg_timeout leaves its fields as None instead of failing the call.
+        
         Args:
             symbol: Trading symbol (e.g., "BTC", "ETH")
+            leg_timeout: Seconds allowed for each upstream request
             
         Returns:
-            dict: Complete market data
+            dict: Complete market data, plus "leg_timings_ms", "errors" and "partial"
         """
         try:
-            # Get mid price
-            mid_price = self.get_mid_price(symbol)
-            
-            # Get bid/ask data
-            bid_ask = self.get_best_bid_ask(symbol)
-            
-            # Get 24h stats
-            stats_24h = self.get_24h_stats(symbol)
-            
-            return {
-                "symbol": symbol,
-                "mid_price": mid_price,
-                "bid": bid_ask.get("bid"),
-                "ask": bid_ask.get("ask"),
-                "spread": bid_ask.get("spread"),
-                "spread_percentage": bid_ask.get("spread_percentage"),
-                "high_24h": stats_24h.get("high_24h"),
-                "low_24h": stats_24h.get("low_24h"),
-                "volume_24h": stats_24h.get("volume_24h"),
-                "price_24h_ago": stats_24h.get("price_24h_ago"),
-                "price_change": stats_24h.get("price_change"),
-                "price_change_percent": stats_24h.get("price_change_percent"),
-                "timestamp": int(time.time() * 1000)
+            legs = {
+                "mid_price": lambda: self.get_mid_price(symbol, timeout=leg_timeout),
+                "bid_ask": lambda: self.get_best_bid_ask(symbol, timeout=leg_timeout),
+                "stats_24h": lambda: self.get_24h_stats(symbol, timeout=leg_timeout),
             }
+            futures = {name: _fanout_executor.submit(_timed_leg, leg) for name, leg in legs.items()}
+            
+            # All legs start together, so one shared deadline gives each its own leg_timeout
+            deadline = time.perf_counter() + leg_timeout
+            results, errors, timings = {}, {}, {}
+            for name, future in futures.items():
+                try:
+                    value, error, elapsed_ms = future.result(timeout=max(deadline - time.perf_counter(), 0))
+                except FutureTimeoutError:
+                    value, error, elapsed_ms = None, f"timed out after {leg_timeout}s", leg_timeout * 1000
+                results[name] = value
+                timings[name] = round(elapsed_ms, 2)
+                if error is not None:
+                    errors[name] = error
+            
+            return assemble_market_data(symbol, results, errors, timings)
         except Exception as e:
             raise Exception(f"Failed to get full market data for {symbol}: {e}")
     
@@ -537,16 +682,8 @@ class HyperClient:
             if aggregate_by_time:
                 body["aggregateByTime"] = True
                 
-            response = requests.post(f"{self.base_url}/info", json=body, timeout=10)
-            response.raise_for_status()
-            
-            fills = response.json()
-            
-            # Return empty list if no fills
-            if not fills or not isinstance(fills, list):
-                return []
-                
-            return fills
+            fills = self._post_info(body)
+            return parse_fills(fills)
             
         except Exception as e:
             raise Exception(f"Failed to fetch user fills: {e}")
@@ -570,16 +707,8 @@ class HyperClient:
             if aggregate_by_time:
                 body["aggregateByTime"] = True
                 
-            response = requests.post(f"{self.base_url}/info", json=body, timeout=10)
-            response.raise_for_status()
-            
-            fills = response.json()
-            
-            # Return empty list if no fills
-            if not fills or not isinstance(fills, list):
-                return []
-                
-            return fills
+            fills = self._post_info(body)
+            return parse_fills(fills)
             
         except Exception as e:
             raise Exception(f"Failed to fetch user fills: {e}")
@@ -0,0 +1,199 @@
+"""
+Parsers for Hyperliquid /info responses.
+
+Shared by HyperClient and AsyncHyperClient so both clients return identical shapes
+regardless of how the response was fetched.
+"""
+
+import time
+from typing import Dict, Optional, Any, List
+
+
+def parse_l2_book(data: Any) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Normalize an l2Book response into {"bids": [...], "asks": [...]}.
+
+    Each level is {"px": price, "sz": size, "n": num_orders}.
+    """
+    # Handle the actual response format from Hyperliquid
+    if isinstance(data, dict) and "levels" in data:
+        levels = data["levels"]
+        if isinstance(levels, list) and len(levels) == 2:
+            return {
+                "bids": levels[0],
+                "asks": levels[1]
+            }
+    # Handle the old format just in case
+    elif isinstance(data, list) and len(data) == 2:
+        return {
+            "bids": data[0],
+            "asks": data[1]
+        }
+    return {"bids": [], "asks": []}
+
+
+def best_bid_ask_from_book(book: Dict[str, Any]) -> Dict[str, Optional[float]]:
+    """Compute best bid, best ask and spread from a normalized L2 book."""
+    best_bid = None
+    best_ask = None
+
+    if book["bids"] and len(book["bids"]) > 0:
+        best_bid = float(book["bids"][0]["px"])
+
+    if book["asks"] and len(book["asks"]) > 0:
+        best_ask = float(book["asks"][0]["px"])
+
+    spread = None
+    if best_bid is not None and best_ask is not None:
+        spread = best_ask - best_bid
+
+    return {
+        "bid": best_bid,
+        "ask": best_ask,
+        "spread": spread,
+        "spread_percentage": (spread / best_bid * 100) if best_bid and spread else None
+    }
+
+
+def build_24h_candle_request(symbol: str, end_time: Optional[int] = None) -> Dict[str, Any]:
+    """Build the candleSnapshot body covering the last 24 hours at 1h resolution."""
+    if end_time is None:
+        end_time = int(time.time() * 1000)
+    start_time = end_time - (24 * 60 * 60 * 1000)  # 24 hours ago
+    return build_candle_request(symbol, "1h", start_time, end_time)
+
+
+def build_candle_request(symbol: str, interval: str, start_time: int, end_time: int) -> Dict[str, Any]:
+    """Build a candleSnapshot request body."""
+    return {
+        "type": "candleSnapshot",
+        "req": {
+            "coin": symbol,
+            "interval": interval,
+            "startTime": start_time,
+            "endTime": end_time
+        }
+    }
+
+
+def compute_24h_stats(candles: Any) -> Dict[str, Any]:
+    """
+    Compute 24h high/low/volume/change from hourly candles.
+
+    Returns an empty dict when no candles are available.
+    """
+    if not candles or not isinstance(candles, list):
+        return {}
+
+    high_24h = max(float(c["h"]) for c in candles)
+    low_24h = min(float(c["l"]) for c in candles)
+    volume_24h = sum(float(c["v"]) for c in candles)
+
+    # Get price 24h ago and current price
+    price_24h_ago = float(candles[0]["o"])  # Open of first candle
+    current_price = float(candles[-1]["c"])  # Close of last candle
+
+    price_change = current_price - price_24h_ago
+    price_change_percent = (price_change / price_24h_ago * 100) if price_24h_ago else 0
+
+    return {
+        "high_24h": high_24h,
+        "low_24h": low_24h,
+        "volume_24h": volume_24h,
+        "price_24h_ago": price_24h_ago,
+        "current_price": current_price,
+        "price_change": price_change,
+        "price_change_percent": price_change_percent
+    }
+
+
+def build_market_data(symbol: str, mid_price: Optional[float], bid_ask: Dict[str, Any],
+                      stats_24h: Dict[str, Any]) -> Dict[str, Any]:
+    """Merge mid price, bid/ask and 24h stats into the full market data payload."""
+    return {
+        "symbol": symbol,
+        "mid_price": mid_price,
+        "bid": bid_ask.get("bid"),
+        "ask": bid_ask.get("ask"),
+        "spread": bid_ask.get("spread"),
+        "spread_percentage": bid_ask.get("spread_percentage"),
+        "high_24h": stats_24h.get("high_24h"),
+        "low_24h": stats_24h.get("low_24h"),
+        "volume_24h": stats_24h.get("volume_24h"),
+        "price_24h_ago": stats_24h.get("price_24h_ago"),
+        "price_change": stats_24h.get("price_change"),
+        "price_change_percent": stats_24h.get("price_change_percent"),
+        "timestamp": int(time.time() * 1000)
+    }
+
+
+def assemble_market_data(symbol: str, results: Dict[str, Any], errors: Dict[str, str],
+                         timings: Dict[str, float]) -> Dict[str, Any]:
+    """
+    Build full market data from the concurrent fan-out legs.
+
+    Args:
+        symbol: Trading symbol
+        results: {"mid_price": float, "bid_ask": dict, "stats_24h": dict}; failed legs are None
+        errors: {leg: error message} for legs that failed or timed out
+        timings: {leg: elapsed milliseconds}
+
+    Raises:
+        Exception: If every leg failed
+    """
+    if errors and len(errors) == len(results):
+        raise Exception("; ".join(f"{leg}: {error}" for leg, error in errors.items()))
+
+    market_data = build_market_data(
+        symbol,
+        results.get("mid_price"),
+        results.get("bid_ask") or {},
+        results.get("stats_24h") or {}
+    )
+    market_data["leg_timings_ms"] = timings
+    market_data["errors"] = errors
+    market_data["partial"] = bool(errors)
+    return market_data
+
+
+def parse_spot_balances(data: Any) -> Dict[str, float]:
+    """Map a spotClearinghouseState response to {coin: total}."""
+    if isinstance(data, dict) and "balances" in data and isinstance(data["balances"], list):
+        return {balance.get("coin", "UNKNOWN"): float(balance.get("total", 0.0)) for balance in data["balances"]}
+    return {}
+
+
+def equity_from_user_state(user_state: Optional[Dict[str, Any]]) -> float:
+    """Extract account value from a clearinghouseState (user_state) response."""
+    if user_state:
+        if "crossMarginSummary" in user_state and isinstance(user_state["crossMarginSummary"], dict):
+            return float(user_state["crossMarginSummary"].get("accountValue", 0.0))
+        if "marginSummary" in user_state and isinstance(user_state["marginSummary"], dict):
+            return float(user_state["marginSummary"].get("accountValue", 0.0))
+        if "accountValue" in user_state:
+            return float(user_state["accountValue"])
+    return 0.0
+
+
+def margin_summary_from_user_state(user_state: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Extract the margin summary from a clearinghouseState (user_state) response."""
+    if user_state:
+        if "crossMarginSummary" in user_state and isinstance(user_state["crossMarginSummary"], dict):
+            return user_state["crossMarginSummary"]
+        if "marginSummary" in user_state and isinstance(user_state["marginSummary"], dict):
+            return user_state["marginSummary"]
+    return {}
+
+
+def positions_from_user_state(user_state: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Extract assetPositions from a clearinghouseState (user_state) response."""
+    if user_state and "assetPositions" in user_state and isinstance(user_state["assetPositions"], list):
+        return user_state["assetPositions"]
+    return []
+
+
+def parse_fills(fills: Any) -> List[Dict[str, Any]]:
+    """Return the fills list, or an empty list for empty/malformed responses."""
+    if not fills or not isinstance(fills, list):
+        return []
+    return fills
@@ -0,0 +1,189 @@
+"""
+Pooled HTTP transport for Hyperliquid REST calls.
+
+A single keep-alive ``requests.Session`` is shared by every ``HyperClient`` (and the SDK
+``Info``/``Exchange`` objects they own), so repeated ``/info`` calls reuse open TCP+TLS
+connections instead of paying a fresh handshake per request.
+
+Usage:
+    transport = get_shared_transport()
+    response = transport.post("https://api.hyperliquid.xyz/info", json={"type": "allMids"}, timeout=10)
+    print(transport.get_connection_stats())
+"""
+
+import threading
+from typing import Dict, Any, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.poolmanager import PoolManager
+
+DEFAULT_POOL_CONNECTIONS = 4   # Number of distinct hosts to keep pools for
+DEFAULT_POOL_MAXSIZE = 16      # Max idle keep-alive connections kept per host
+
+
+class ConnectionStats:
+    """Thread-safe per-host counters for requests sent and connections opened."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._requests: Dict[str, int] = {}
+        self._connections: Dict[str, int] = {}
+
+    def record_request(self, host: str):
+        with self._lock:
+            self._requests[host] = self._requests.get(host, 0) + 1
+
+    def record_connection(self, host: str):
+        with self._lock:
+            self._connections[host] = self._connections.get(host, 0) + 1
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns per-host counters.
+
+        Returns:
+            dict: {host: {"requests", "new_connections", "reused", "reuse_rate"}}
+        """
+        with self._lock:
+            hosts = set(self._requests) | set(self._connections)
+            stats = {}
+            for host in sorted(hosts):
+                requests_sent = self._requests.get(host, 0)
+                new_connections = self._connections.get(host, 0)
+                reused = max(requests_sent - new_connections, 0)
+                stats[host] = {
+                    "requests": requests_sent,
+                    "new_connections": new_connections,
+                    "reused": reused,
+                    "reuse_rate": (reused / requests_sent) if requests_sent else None
+                }
+            return stats
+
+    def reset(self):
+        with self._lock:
+            self._requests.clear()
+            self._connections.clear()
+
+
+class _CountingPoolManager(PoolManager):
+    """PoolManager that reports every new socket it opens to a ConnectionStats instance."""
+
+    def __init__(self, *args, connection_stats: Optional[ConnectionStats] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.connection_stats = connection_stats
+
+    def _new_pool(self, scheme, host, port, request_context=None):
+        pool = super()._new_pool(scheme, host, port, request_context=request_context)
+        if self.connection_stats is not None:
+            new_conn = pool._new_conn
+            stats = self.connection_stats
+
+            def counting_new_conn():
+                stats.record_connection(host)
+                return new_conn()
+
+            pool._new_conn = counting_new_conn
+        return pool
+
+
+class _CountingHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that counts requests per host and uses a counting pool manager."""
+
+    def __init__(self, connection_stats: ConnectionStats, **kwargs):
+        # Must be set before HTTPAdapter.__init__, which calls init_poolmanager
+        self.connection_stats = connection_stats
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        self._pool_connections = connections
+        self._pool_maxsize = maxsize
+        self._pool_block = block
+        self.poolmanager = _CountingPoolManager(
+            num_pools=connections,
+            maxsize=maxsize,
+            block=block,
+            connection_stats=self.connection_stats,
+            **pool_kwargs
+        )
+
+    def send(self, request, **kwargs):
+        self.connection_stats.record_request(urlsplit(request.url).hostname or "unknown")
+        return super().send(request, **kwargs)
+
+
+class PooledTransport:
+    """
+    Keep-alive HTTP transport with a bounded connection pool and per-host reuse counters.
+
+    HTTP/2 is not offered here: the SDK ``Info``/``Exchange`` objects only speak to a
+    ``requests.Session``, which is HTTP/1.1, and sharing that session is what removes the
+    handshake cost for every caller.
+    """
+
+    def __init__(self, pool_connections: int = DEFAULT_POOL_CONNECTIONS, pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+                 max_retries: int = 0):
+        """
+        Initialize the transport.
+
+        Args:
+            pool_connections: Number of per-host pools to cache
+            pool_maxsize: Maximum number of keep-alive connections kept per host
+            max_retries: Connection-level retries passed to the adapter (default: 0)
+        """
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.stats = ConnectionStats()
+
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Content-Type": "application/json",
+            "Connection": "keep-alive"
+        })
+        adapter = _CountingHTTPAdapter(
+            self.stats,
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=max_retries
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def post(self, url: str, json: Any = None, timeout: Optional[float] = 10, **kwargs) -> requests.Response:
+        """POST through the pooled session. Mirrors ``requests.post``."""
+        return self.session.post(url, json=json, timeout=timeout, **kwargs)
+
+    def attach(self, sdk_api: Any):
+        """
+        Point an SDK ``API`` object (``Info``/``Exchange``) at this transport's session.
+
+        Args:
+            sdk_api: Any object exposing a ``session`` attribute used for its HTTP calls
+        """
+        previous_session = getattr(sdk_api, "session", None)
+        if previous_session is not None and previous_session is not self.session:
+            previous_session.close()
+        sdk_api.session = self.session
+
+    def get_connection_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Returns per-host connection reuse counters."""
+        return self.stats.snapshot()
+
+    def close(self):
+        """Close all pooled connections."""
+        self.session.close()
+
+
+_shared_transport: Optional[PooledTransport] = None
+_shared_transport_lock = threading.Lock()
+
+
+def get_shared_transport() -> PooledTransport:
+    """Returns the process-wide transport, creating it on first use."""
+    global _shared_transport
+    if _shared_transport is None:
+        with _shared_transport_lock:
+            if _shared_transport is None:
+                _shared_transport = PooledTransport()
+    return _shared_transport
@@ -0,0 +1,561 @@
+"""
+Multiplexed WebSocket connection manager.
+
+Instead of one socket (and one TLS handshake) per subscription, every subscription for a
+WebSocket URL shares a small pool of connections. Inbound frames are decoded once and routed
+by (channel, coin/user) to the handlers registered for that subscription. Subscriptions can be
+added and removed at runtime, and each connection carries at most
+``max_subscriptions_per_connection`` of them before another connection is opened.
+
+Every connection sends an application-level ping and is treated as dead when nothing has been
+received for ``HEARTBEAT_TIMEOUT`` seconds. When a connection drops, unsupervised handles fail
+(``wait_closed`` raises), while supervised handles stay registered: the connection reconnects
+with jittered exponential backoff, resubscribes, and calls each handle's ``on_reconnect`` hook
+so the owner can backfill anything missed.
+
+Usage:
+    manager = get_ws_manager("wss://api.hyperliquid.xyz/ws")
+    handle = await manager.subscribe({"type": "trades", "coin": "BTC"}, handler, "TradesStream(BTC)")
+    await handle.wait_closed()   # Raises when the underlying connection drops (unsupervised)
+    await handle.unsubscribe()
+
+Receive loops never run handlers themselves. Frames are pushed into bounded FrameQueues
+(sharded by routing key so each subscription stays in order) and consumer tasks run the
+handlers on a small thread pool, so slow handlers such as sqlite writes never stall reading
+the socket. See frame_queue.py for the overflow policies.
+
+Handlers are called as handler(parsed_message, description, raw_message), the same signature
+HyperClient._manage_websocket_stream callbacks use. Frames are routed from a peek at the raw
+text where possible (see codec.LazyFrame) and decoded once, on the consumer side; handlers
+registered with ``lazy=True`` receive the LazyFrame itself and only pay for what they read.
+
+The server sends snapshot frames (``isSnapshot``, e.g. the recent fills of a userFills
+subscription) only when it subscribes, so the last one is kept per subscription and replayed to
+handlers that join it later, before any newer frame of that subscription reaches them.
+"""
+
+import asyncio
+import itertools
+import random
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Dict, List, Optional, Any, Tuple, Union
+
+import websockets
+
+from .codec import LazyFrame, dumps
+from .frame_queue import FrameQueue, QueuedFrame, BLOCK
+
+DEFAULT_MAX_SUBSCRIPTIONS_PER_CONNECTION = 100
+DEFAULT_MAX_CONNECTIONS = 10  # Hyperliquid allows 1000 subscriptions per IP in total
+
+PING_INTERVAL = 20.0  # Seconds between {"method": "ping"} heartbeats (server drops idle sockets after 60s)
+HEARTBEAT_TIMEOUT = 45.0  # Seconds without any inbound frame before a connection is considered dead
+RECONNECT_BASE_DELAY = 1.0
+RECONNECT_MAX_DELAY = 30.0
+STABLE_CONNECTION_SECONDS = 60.0  # A connection that lived this long resets the backoff
+DEFAULT_QUEUE_SIZE = 1000  # Frames buffered per consumer before the overflow policy applies
+DEFAULT_CONSUMERS = 2
+# Channels whose first frame after subscribing is a snapshot flagged with "isSnapshot"
+SNAPSHOT_CHANNELS = {"userFills", "userFundings", "userNonFundingLedgerUpdates", "userTwapSliceFills",
+                     "userTwapHistory"}
+
+SubscriptionKey = Tuple[str, Optional[str]]
+ReconnectHook = Callable[[], Union[None, Awaitable[None]]]
+
+
+def subscription_key(subscription: Dict[str, Any]) -> SubscriptionKey:
+    """Routing key for a subscription payload: (type, coin/user identifier or None)."""
+    sub_type = subscription["type"]
+    if sub_type == "candle":
+        return sub_type, f"{subscription.get('coin')}:{subscription.get('interval')}"
+    if "coin" in subscription:
+        return sub_type, subscription["coin"]
+    if "user" in subscription:
+        return sub_type, str(subscription["user"]).lower()
+    return sub_type, None
+
+
+def frame_key(channel: str, data: Any) -> SubscriptionKey:
+    """Routing key for an inbound frame; the identifier is None when it can't be derived."""
+    if channel == "trades" and isinstance(data, list) and data and isinstance(data[0], dict):
+        return channel, data[0].get("coin")
+    if isinstance(data, dict):
+        if channel == "candle":
+            return channel, f"{data.get('s')}:{data.get('i')}"
+        if "coin" in data:
+            return channel, data["coin"]
+        if "user" in data:
+            return channel, str(data["user"]).lower()
+    return channel, None
+
+
+def _decode_routing_key(channel: Optional[str], data: Any) -> SubscriptionKey:
+    """Routing key from a decoded frame; subscription responses route to the subscription they confirm."""
+    if channel == "subscriptionResponse" and isinstance(data, dict) and isinstance(data.get("subscription"), dict):
+        return subscription_key(data["subscription"])
+    return frame_key(channel, data)
+
+
+def backoff_delay(attempt: int, base: float = RECONNECT_BASE_DELAY, cap: float = RECONNECT_MAX_DELAY) -> float:
+    """Exponential backoff with equal jitter: half the capped delay plus a random half."""
+    delay = min(cap, base * (2 ** attempt))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class _Subscription:
+    """One server-side subscription and the local handles sharing it."""
+
+    def __init__(self, key: SubscriptionKey, payload: Dict[str, Any], connection: "_Connection"):
+        self.key = key
+        self.payload = payload
+        self.connection = connection
+        self.handles: Dict[int, "SubscriptionHandle"] = {}
+        self.snapshot: Optional[LazyFrame] = None  # Last snapshot frame, replayed to joining handles
+
+
+class _Connection:
+    """One WebSocket connection carrying several subscriptions."""
+
+    def __init__(self, conn_id: int, websocket):
+        self.conn_id = conn_id
+        self.websocket = websocket
+        self.subscriptions: Dict[SubscriptionKey, _Subscription] = {}
+        self.runner: Optional[asyncio.Task] = None
+        self.closed = False
+        self.reconnecting = False
+        self.reconnects = 0
+        self.enqueue_blocked = False  # Receiver is waiting on a full queue, not on the server
+        loop = asyncio.get_running_loop()
+        self.connected_at = loop.time()
+        self.last_message_at = loop.time()
+
+    @property
+    def accepting(self) -> bool:
+        return not self.closed and not self.reconnecting
+
+
+class SubscriptionHandle:
+    """Returned by WebSocketManager.subscribe; tracks one registered handler."""
+
+    def __init__(self, manager: "WebSocketManager", subscription: _Subscription, handler_id: int,
+                 handler: Callable, description: str, supervised: bool, on_reconnect: Optional[ReconnectHook],
+                 lazy: bool = False):
+        self.manager = manager
+        self.subscription = subscription
+        self.key = subscription.key
+        self.handler_id = handler_id
+        self.handler = handler
+        self.description = description
+        self.supervised = supervised
+        self.on_reconnect = on_reconnect
+        self.lazy = lazy
+        self.active = True
+        self.replay: Optional[LazyFrame] = None  # Snapshot frame still owed to this handler
+        self._closed: asyncio.Future = asyncio.get_running_loop().create_future()
+
+    async def wait_closed(self):
+        """
+        Wait until this subscription ends: returns after unsubscribe, raises the connection
+        error when an unsupervised subscription's connection drops.
+        """
+        await asyncio.shield(self._closed)
+
+    async def unsubscribe(self):
+        """Remove this handler; the server subscription is dropped once no handler needs it."""
+        if self.active:
+            self.active = False
+            await self.manager._remove_handler(self)
+        if not self._closed.done():
+            self._closed.set_result(None)
+
+    def _fail(self, error: BaseException):
+        self.active = False
+        if not self._closed.done():
+            self._closed.set_exception(error)
+            self._closed.exception()  # Mark retrieved; wait_closed re-raises it
+
+
+class WebSocketManager:
+    """Shares a small pool of WebSocket connections across all subscriptions for one URL."""
+
+    def __init__(self, ws_url: str,
+                 max_subscriptions_per_connection: int = DEFAULT_MAX_SUBSCRIPTIONS_PER_CONNECTION,
+                 max_connections: int = DEFAULT_MAX_CONNECTIONS,
+                 queue_size: int = DEFAULT_QUEUE_SIZE,
+                 consumers: int = DEFAULT_CONSUMERS,
+                 overflow_policy: str = BLOCK):
+        """
+        Args:
+            ws_url: WebSocket endpoint (e.g. "wss://api.hyperliquid.xyz/ws")
+            max_subscriptions_per_connection: Subscriptions carried per socket before opening another
+            max_connections: Upper bound on sockets in the pool
+            queue_size: Frames buffered per consumer
+            consumers: Number of consumer tasks (and handler threads)
+            overflow_policy: "block", "drop_oldest" or "coalesce" (see frame_queue.py)
+        """
+        self.ws_url = ws_url
+        self.max_subscriptions_per_connection = max_subscriptions_per_connection
+        self.max_connections = max_connections
+        self.loop = asyncio.get_running_loop()
+        self._lock = asyncio.Lock()
+        self._connections: List[_Connection] = []
+        self._subscriptions: Dict[SubscriptionKey, _Subscription] = {}
+        self._handler_ids = itertools.count(1)
+        self._connection_ids = itertools.count(1)
+
+        self._queues = [FrameQueue(queue_size, overflow_policy) for _ in range(consumers)]
+        self._handler_pool = ThreadPoolExecutor(max_workers=consumers, thread_name_prefix="ws-handlers")
+        self.decode_errors = 0  # Frames that reached handlers but could not be decoded
+        self._consumers = [asyncio.create_task(self._consume(queue)) for queue in self._queues]
+
+    async def subscribe(self, subscription: Dict[str, Any], handler: Callable, description: str = "",
+                        supervised: bool = False, on_reconnect: Optional[ReconnectHook] = None,
+                        lazy: bool = False) -> SubscriptionHandle:
+        """
+        Register a handler for a subscription, subscribing on the server if it is new.
+
+        Args:
+            subscription: Hyperliquid subscription payload (e.g. {"type": "l2Book", "coin": "ETH"})
+            handler: Called as handler(parsed_message, description, raw_message) for each frame
+            description: Name used in logs
+            supervised: Keep the subscription across reconnects instead of failing the handle
+            on_reconnect: Sync or async callable run after each reconnect (supervised handles only)
+            lazy: Pass the handler a codec.LazyFrame instead of the decoded dict
+
+        Returns:
+            SubscriptionHandle for waiting on and removing the subscription
+        """
+        key = subscription_key(subscription)
+        async with self._lock:
+            sub = self._subscriptions.get(key)
+            if sub is None:
+                connection = await self._connection_with_capacity()
+                sub = _Subscription(key, subscription, connection)
+                connection.subscriptions[key] = sub
+                self._subscriptions[key] = sub
+                try:
+                    await connection.websocket.send(dumps({"method": "subscribe", "subscription": subscription}))
+                except Exception:
+                    del connection.subscriptions[key]
+                    del self._subscriptions[key]
+                    raise
+                print(f"[WebSocketManager] Subscribed {description or key} on connection {connection.conn_id} "
+                      f"({len(connection.subscriptions)} subscriptions)")
+
+            handle = SubscriptionHandle(self, sub, next(self._handler_ids), handler, description or str(key),
+                                        supervised, on_reconnect, lazy)
+            handle.replay = sub.snapshot
+            sub.handles[handle.handler_id] = handle
+
+        if handle.replay is not None:
+            # A frame-less entry on the subscription's queue, so the snapshot is delivered in order
+            # even if no newer frame arrives
+            await self._queue_for(key).put(QueuedFrame(sub.connection, key, None))
+        return handle
+
+    async def _remove_handler(self, handle: SubscriptionHandle):
+        async with self._lock:
+            sub = handle.subscription
+            if self._subscriptions.get(handle.key) is not sub:
+                return
+            sub.handles.pop(handle.handler_id, None)
+            if sub.handles:
+                return
+
+            connection = sub.connection
+            del self._subscriptions[handle.key]
+            connection.subscriptions.pop(handle.key, None)
+            if not connection.accepting:
+                return  # The reconnect loop only resubscribes what is still registered
+            try:
+                if connection.subscriptions:
+                    await connection.websocket.send(dumps({"method": "unsubscribe", "subscription": sub.payload}))
+                else:
+                    # Last subscription on this socket: close it instead of keeping an idle connection
+                    await connection.websocket.close()
+            except Exception as e:
+                print(f"[WebSocketManager] Error unsubscribing {handle.key}: {e}")
+
+    async def _connection_with_capacity(self) -> _Connection:
+        for connection in self._connections:
+            if connection.accepting and len(connection.subscriptions) < self.max_subscriptions_per_connection:
+                return connection
+        if len(self._connections) >= self.max_connections:
+            raise RuntimeError(f"WebSocket subscription limit reached "
+                               f"({self.max_connections} x {self.max_subscriptions_per_connection})")
+
+        websocket = await websockets.connect(self.ws_url)
+        connection = _Connection(next(self._connection_ids), websocket)
+        connection.runner = asyncio.create_task(self._run_connection(connection))
+        self._connections.append(connection)
+        print(f"[WebSocketManager] Opened connection {connection.conn_id} to {self.ws_url}")
+        return connection
+
+    async def _run_connection(self, connection: _Connection):
+        """Receive, heartbeat and reconnect loop for one connection."""
+        attempt = 0
+        try:
+            while True:
+                heartbeat = asyncio.create_task(self._heartbeat(connection))
+                try:
+                    error = await self._read(connection)
+                finally:
+                    heartbeat.cancel()
+
+                print(f"[WebSocketManager] Connection {connection.conn_id} lost: {error}")
+                self._fail_handles(connection, error, unsupervised_only=True)
+                if not connection.subscriptions:
+                    self._drop_connection(connection, error)
+                    return
+
+                connection.reconnecting = True
+                if self.loop.time() - connection.connected_at >= STABLE_CONNECTION_SECONDS:
+                    attempt = 0
+                while not await self._reconnect(connection, attempt):
+                    attempt += 1
+                    if not connection.subscriptions:
+                        self._drop_connection(connection, error)
+                        return
+                attempt += 1
+                self._notify_reconnected(connection)
+        except asyncio.CancelledError:
+            self._drop_connection(connection, ConnectionError("WebSocket manager closed"))
+            raise
+
+    async def _reconnect(self, connection: _Connection, attempt: int) -> bool:
+        """One reconnect attempt after a backoff delay; resubscribes everything still registered."""
+        delay = backoff_delay(attempt)
+        print(f"[WebSocketManager] Reconnecting connection {connection.conn_id} in {delay:.1f}s (attempt {attempt + 1})")
+        await asyncio.sleep(delay)
+        if not connection.subscriptions:
+            return False
+
+        try:
+            websocket = await websockets.connect(self.ws_url)
+        except Exception as e:
+            print(f"[WebSocketManager] Reconnect of connection {connection.conn_id} failed: {e}")
+            return False
+
+        async with self._lock:
+            try:
+                for sub in list(connection.subscriptions.values()):
+                    await websocket.send(dumps({"method": "subscribe", "subscription": sub.payload}))
+            except Exception as e:
+                print(f"[WebSocketManager] Resubscribe on connection {connection.conn_id} failed: {e}")
+                await websocket.close()
+                return False
+            connection.websocket = websocket
+            connection.reconnecting = False
+            connection.reconnects += 1
+            connection.connected_at = connection.last_message_at = self.loop.time()
+        print(f"[WebSocketManager] Connection {connection.conn_id} restored with "
+              f"{len(connection.subscriptions)} subscriptions")
+        return True
+
+    async def _read(self, connection: _Connection) -> BaseException:
+        """Receive frames until the socket fails; returns the error that ended it."""
+        try:
+            while True:
+                message = await connection.websocket.recv()
+                connection.last_message_at = self.loop.time()
+                await self._enqueue(connection, message)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            return e
+
+    async def _heartbeat(self, connection: _Connection):
+        """Ping periodically and close the socket if the server has gone silent."""
+        while True:
+            await asyncio.sleep(PING_INTERVAL)
+            silent_for = self.loop.time() - connection.last_message_at
+            try:
+                if silent_for > HEARTBEAT_TIMEOUT and not connection.enqueue_blocked:
+                    print(f"[WebSocketManager] Connection {connection.conn_id} silent for {silent_for:.0f}s; closing")
+                    await connection.websocket.close()
+                    return
+                await connection.websocket.send(dumps({"method": "ping"}))
+            except Exception:
+                return  # The reader sees the failure and handles it
+
+    def _fail_handles(self, connection: _Connection, error: BaseException, unsupervised_only: bool = False):
+        for key, sub in list(connection.subscriptions.items()):
+            for handler_id, handle in list(sub.handles.items()):
+                if unsupervised_only and handle.supervised:
+                    continue
+                del sub.handles[handler_id]
+                handle._fail(error)
+            if not sub.handles:
+                del connection.subscriptions[key]
+                if self._subscriptions.get(key) is sub:
+                    del self._subscriptions[key]
+
+    def _drop_connection(self, connection: _Connection, error: BaseException):
+        connection.closed = True
+        if connection in self._connections:
+            self._connections.remove(connection)
+        self._fail_handles(connection, error)
+
+    def _notify_reconnected(self, connection: _Connection):
+        for sub in list(connection.subscriptions.values()):
+            for handle in list(sub.handles.values()):
+                if handle.on_reconnect is None:
+                    continue
+                try:
+                    result = handle.on_reconnect()
+                    if asyncio.iscoroutine(result):
+                        asyncio.create_task(self._run_hook(result, handle.description))
+                except Exception as e:
+                    print(f"[WebSocketManager] Reconnect hook failed for {handle.description}: {e}")
+
+    @staticmethod
+    async def _run_hook(coroutine: Awaitable[None], description: str):
+        try:
+            await coroutine
+        except Exception as e:
+            print(f"[WebSocketManager] Reconnect hook failed for {description}: {e}")
+
+    async def _enqueue(self, connection: _Connection, raw_message: Any):
+        """Route a frame from a peek at its raw text and hand it to its consumer's queue."""
+        frame = LazyFrame(raw_message)
+        try:
+            if frame.channel == "pong":
+                return
+            key = frame.routing_key(_decode_routing_key)
+        except ValueError as e_json:  # json/orjson JSONDecodeError
+            print(f"[WebSocketManager] JSONDecodeError on connection {connection.conn_id}: {e_json}. Raw message: {raw_message}")
+            return
+
+        queue = self._queue_for(key)
+        connection.enqueue_blocked = True
+        try:
+            await queue.put(QueuedFrame(connection, key, frame))
+        finally:
+            connection.enqueue_blocked = False
+
+    def _queue_for(self, key: SubscriptionKey) -> FrameQueue:
+        # Same key -> same consumer, so frames of one subscription are handled in order
+        return self._queues[hash(key) % len(self._queues)]
+
+    async def _consume(self, queue: FrameQueue):
+        """Consumer task: route queued frames and run their handlers on the handler pool."""
+        while True:
+            frame = await queue.get()
+            targets = self._route(frame)
+            if not targets:
+                continue
+            if await self.loop.run_in_executor(self._handler_pool, self._run_handlers, targets, frame):
+                await self._remember_snapshot(frame, targets)
+
+    async def _remember_snapshot(self, frame: QueuedFrame, targets: List[SubscriptionHandle]):
+        """Keep a snapshot frame for later handles, and deliver it to any that joined while it was handled."""
+        sub = frame.connection.subscriptions.get(frame.key)
+        if sub is None:
+            return
+        sub.snapshot = frame.payload
+        late = [handle for handle in sub.handles.values() if handle not in targets]
+        for handle in late:
+            handle.replay = frame.payload
+        if late:
+            await self.loop.run_in_executor(self._handler_pool, self._run_handlers, late,
+                                            QueuedFrame(frame.connection, frame.key, None))
+
+    def _route(self, frame: QueuedFrame) -> List[SubscriptionHandle]:
+        subscriptions = frame.connection.subscriptions
+        sub = subscriptions.get(frame.key)
+        if sub is not None:
+            return list(sub.handles.values())
+        if frame.key[1] is None:
+            # Frames without a coin/user go to every subscription of that channel on this socket
+            return [h for s in subscriptions.values() if s.key[0] == frame.key[0] for h in s.handles.values()]
+        return []  # Late frame for a subscription that was just removed
+
+    def _run_handlers(self, targets: List[SubscriptionHandle], queued: QueuedFrame) -> bool:
+        """
+        Deliver a frame (None for a replay-only entry) to its handles, each preceded by any
+        snapshot still owed to that handle. A frame that fails to decode still reaches the lazy
+        handles, and every handle still gets its owed replay.
+
+        Returns:
+            bool: Whether the frame is a snapshot to keep for handles that join later
+        """
+        frame: Optional[LazyFrame] = queued.payload
+        undecodable = False
+        for handle in targets:
+            replay, handle.replay = handle.replay, None
+            if replay is not None:
+                WebSocketManager._deliver(handle, replay)
+            if frame is None or (undecodable and not handle.lazy):
+                continue  # Decoding again would only fail again
+            if not WebSocketManager._deliver(handle, frame):
+                undecodable = True
+        if undecodable:
+            self.decode_errors += 1
+            return False
+        if frame is None or queued.channel not in SNAPSHOT_CHANNELS:
+            return False
+        try:
+            data = frame.get("data")
+        except ValueError:
+            return False
+        return isinstance(data, dict) and bool(data.get("isSnapshot"))
+
+    @staticmethod
+    def _deliver(handle: SubscriptionHandle, frame: LazyFrame) -> bool:
+        """Run one handler; False if the frame could not be decoded."""
+        try:
+            message = frame if handle.lazy else frame.parsed
+        except ValueError as e_json:
+            print(f"[WebSocketManager] JSONDecodeError for {handle.description}: {e_json}. Raw message: {frame.raw}")
+            return False
+        try:
+            handle.handler(message, handle.description, frame.raw)
+        except Exception as e_callback:
+            print(f"[WebSocketManager] Error in handler for {handle.description}: {e_callback}")
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """Connection and subscription counts for diagnostics."""
+        return {
+            "connections": len(self._connections),
+            "subscriptions": len(self._subscriptions),
+            "per_connection": {c.conn_id: len(c.subscriptions) for c in self._connections},
+            "reconnects": {c.conn_id: c.reconnects for c in self._connections},
+            "reconnecting": [c.conn_id for c in self._connections if c.reconnecting],
+            "queue_depth": sum(len(queue) for queue in self._queues),
+            "decode_errors": self.decode_errors,
+            "queues": [queue.stats() for queue in self._queues]
+        }
+
+    async def close(self):
+        """Close every connection; waiting subscribers see the connection as closed."""
+        for connection in list(self._connections):
+            if connection.runner is not None:
+                connection.runner.cancel()
+            try:
+                await connection.websocket.close()
+            except Exception:
+                pass
+        for consumer in self._consumers:
+            consumer.cancel()
+        self._handler_pool.shutdown(wait=False)
+
+
+_managers: Dict[str, WebSocketManager] = {}
+
+
+def get_ws_manager(ws_url: str) -> WebSocketManager:
+    """
+    Returns the shared manager for a WebSocket URL in the running event loop, creating it
+    on first use (a new loop gets a fresh manager).
+    """
+    manager = _managers.get(ws_url)
+    if manager is None or manager.loop is not asyncio.get_running_loop() or manager.loop.is_closed():
+        manager = WebSocketManager(ws_url)
+        _managers[ws_url] = manager
+    return manager
+
+
+def get_ws_manager_stats() -> Dict[str, Any]:
+    """Stats for every live manager, keyed by URL, without creating new ones."""
+    return {url: manager.stats() for url, manager in _managers.items() if not manager.loop.is_closed()}
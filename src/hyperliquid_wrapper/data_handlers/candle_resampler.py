@@ -0,0 +1,123 @@
+"""
+Vectorized OHLCV candle resampling.
+
+Coarser candles (5m, 1h, 4h, 1d, ...) are derived from finer ones that are already stored,
+so switching chart intervals does not need another upstream candleSnapshot call. Buckets are
+aligned to the Unix epoch like Hyperliquid's own candles, and a bucket is flagged ``partial``
+when it is still open or some of its source candles are missing.
+
+Usage:
+    source = select_source_interval("4h", span_ms)
+    candles = store.get_candles(network, "BTC", source, start_ms, end_ms, fetch=...)
+    four_hour = resample_candles(candles, source, "4h")
+"""
+
+import time
+from typing import Dict, List, Optional, Any
+
+import numpy as np
+
+from ..database_handlers.candle_store import INTERVAL_MS, interval_to_ms
+
+MAX_SOURCE_CANDLES = 5000  # Hyperliquid returns at most this many candles per candleSnapshot
+
+# Intervals that resample cleanly from epoch-aligned sources. 3d/1w buckets are anchored
+# differently upstream, so they are always fetched directly.
+RESAMPLABLE_INTERVALS = ("1m", "3m", "5m", "15m", "30m", "1h", "2h", "4h", "8h", "12h", "1d")
+
+
+def can_resample(source_interval: str, target_interval: str) -> bool:
+    """Whether target buckets are whole multiples of the source interval."""
+    if source_interval not in RESAMPLABLE_INTERVALS or target_interval not in RESAMPLABLE_INTERVALS:
+        return False
+    return INTERVAL_MS[target_interval] % INTERVAL_MS[source_interval] == 0
+
+
+def select_source_interval(target_interval: str, span_ms: int, max_candles: int = MAX_SOURCE_CANDLES) -> str:
+    """
+    Pick the finest interval that divides target_interval and covers span_ms in at most
+    max_candles candles. Finer sources let more chart intervals share one stored series.
+
+    Args:
+        target_interval: Interval the caller wants to display
+        span_ms: Length of the requested window in milliseconds
+        max_candles: Upstream per-request candle limit
+
+    Returns:
+        Source interval name (target_interval itself if it can't be resampled)
+    """
+    if target_interval not in RESAMPLABLE_INTERVALS:
+        return target_interval
+    for source in RESAMPLABLE_INTERVALS:
+        if can_resample(source, target_interval) and span_ms // INTERVAL_MS[source] <= max_candles:
+            return source
+    return target_interval
+
+
+def resample_candles(candles: List[Dict[str, Any]], source_interval: str, target_interval: str,
+                     now_ms: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Aggregate source candles into target_interval buckets.
+
+    open is the first source open, close the last source close, high/low the extremes and
+    volume/trade count the sums. Each output candle carries ``partial=True`` if its bucket
+    has not closed yet or fewer source candles than expected were available.
+
+    Args:
+        candles: Source candles ({"t", "o", "h", "l", "c", "v", "n"}), sorted by open time
+        source_interval: Interval of the input candles
+        target_interval: Interval to produce (must be a multiple of source_interval)
+        now_ms: Current time in ms, used to detect the still-open bucket (defaults to now)
+
+    Returns:
+        List of candle dicts in Hyperliquid's shape plus a ``partial`` flag
+    """
+    if not can_resample(source_interval, target_interval):
+        raise ValueError(f"Cannot resample {source_interval} candles into {target_interval}")
+    if not candles:
+        return []
+
+    source_step = interval_to_ms(source_interval)
+    target_step = interval_to_ms(target_interval)
+    now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+
+    open_times = np.fromiter((c["t"] for c in candles), dtype=np.int64, count=len(candles))
+    opens = np.fromiter((c["o"] for c in candles), dtype=np.float64, count=len(candles))
+    highs = np.fromiter((c["h"] for c in candles), dtype=np.float64, count=len(candles))
+    lows = np.fromiter((c["l"] for c in candles), dtype=np.float64, count=len(candles))
+    closes = np.fromiter((c["c"] for c in candles), dtype=np.float64, count=len(candles))
+    volumes = np.fromiter((c.get("v", 0) for c in candles), dtype=np.float64, count=len(candles))
+    trades = np.fromiter((c.get("n", 0) for c in candles), dtype=np.int64, count=len(candles))
+
+    buckets = (open_times // target_step) * target_step
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(candles)]
+
+    bucket_times = buckets[starts]
+    bucket_opens = opens[starts]
+    bucket_closes = closes[ends - 1]
+    bucket_highs = np.maximum.reduceat(highs, starts)
+    bucket_lows = np.minimum.reduceat(lows, starts)
+    bucket_volumes = np.add.reduceat(volumes, starts)
+    bucket_trades = np.add.reduceat(trades, starts)
+
+    expected = target_step // source_step
+    partial = ((ends - starts) < expected) | (bucket_times + target_step > now_ms)
+
+    coin = candles[0].get("s")
+    return [
+        {
+            "t": int(bucket_times[i]),
+            "T": int(bucket_times[i]) + target_step - 1,
+            "s": coin,
+            "i": target_interval,
+            "o": float(bucket_opens[i]),
+            "h": float(bucket_highs[i]),
+            "l": float(bucket_lows[i]),
+            "c": float(bucket_closes[i]),
+            "v": float(bucket_volumes[i]),
+            "n": int(bucket_trades[i]),
+            "partial": bool(partial[i])
+        }
+        for i in range(len(starts))
+    ]
@@ -1,5 +1,6 @@
 import json
-from ..database_handlers.database_manager import add_trade, initialize_database, remove_open_order
+from ..database_handlers.database_manager import initialize_database
+from ..database_handlers.db_writer import get_db_writer
 
 # Ensure database is initialized when this handler is loaded 
 # (though typically main script should handle initialization)
@@ -9,7 +10,9 @@ from ..database_handlers.database_manager import add_trade, initialize_database,
 def user_fill_handler(fill_message_data):
     """
     Handles raw WebSocket messages for 'userFills' subscriptions.
-    Parses the message and passes individual fills to add_trade.
+    Parses the message and queues all its fills on the database writer as one command, which
+    also removes the filled orders from open_orders_tracking. Returns without waiting for the
+    commit; the returned future resolves with the number of new fills once it is durable.
 
     Args:
         fill_message_data (dict or list): The 'data' part of a WebSocket message 
@@ -17,8 +20,6 @@ def user_fill_handler(fill_message_data):
                                          Can be a dict with a 'fills' list, or sometimes
                                          just a list of fills (though API usually wraps in dict).
     """
-    print(f"[FillHandler] Received data: {json.dumps(fill_message_data, indent=2, default=str)}")
-
     fills_to_process = []
 
     if isinstance(fill_message_data, dict):
@@ -50,34 +51,33 @@ def user_fill_handler(fill_message_data):
         print("[FillHandler] No fills found in the received data to process.")
         return
 
+    valid_fills = []
+    required_fields = ['tid', 'oid', 'coin', 'side', 'px', 'sz', 'time']
     for fill_data in fills_to_process:
         if not isinstance(fill_data, dict):
             print(f"[FillHandler] Skipping non-dict item in fills list: {fill_data}")
             continue
-        try:
-            # Ensure necessary fields are present for the database
-            required_fields = ['tid', 'oid', 'coin', 'side', 'px', 'sz', 'time']
-            if not all(key in fill_data for key in required_fields):
-                print(f"[FillHandler] Skipping fill due to missing required fields: {fill_data}")
-                continue
-
-            order_id_from_fill = fill_data.get('oid')
-            print(f"[FillHandler] Processing fill: Trade ID {fill_data.get('tid')} for Order ID {order_id_from_fill}, Coin {fill_data.get('coin')}")
-            
-            add_trade(fill_data) # This will call the function from database_manager
-            print(f"[FillHandler] Successfully processed and attempted to add trade ID {fill_data.get('tid')} to DB.")
-
-            # After successfully adding the trade, remove it from open_orders_tracking
-            if order_id_from_fill:
-                remove_open_order(order_id_from_fill)
-            else:
-                print(f"[FillHandler] Could not determine Order ID from fill to remove from tracking. Fill data: {fill_data}")
+        # Ensure necessary fields are present for the database
+        if not all(key in fill_data for key in required_fields):
+            print(f"[FillHandler] Skipping fill due to missing required fields: {fill_data}")
+            continue
+        valid_fills.append(fill_data)
+
+    if not valid_fills:
+        return
+
+    def report(future):
+        error = future.exception()
+        if error is not None:
+            print(f"[FillHandler] Error adding fills to DB: {error}")
+            print(f"  Problematic batch: {len(valid_fills)} fills, trade IDs {[fill.get('tid') for fill in valid_fills[:10]]}...")
+        else:
+            print(f"[FillHandler] Processed {len(valid_fills)} fills ({future.result()} new).")
 
-        except Exception as e:
-            print(f"[FillHandler] Error processing fill data or adding to DB: {e}")
-            print(f"  Problematic fill_data: {fill_data}")
-            # Optionally, re-raise or handle more gracefully
-            # raise
+    # One write command for the whole message, committed by the writer thread
+    future = get_db_writer().add_fills(valid_fills)
+    future.add_done_callback(report)
+    return future
 
 def handle_cancel_order_response(cancel_result: dict, order_id: int):
     """
@@ -0,0 +1,120 @@
+"""
+Process-wide cache of Hyperliquid allMids snapshots.
+
+One cache exists per API base URL (mainnet/testnet). A background ``allMids`` WebSocket
+subscription keeps it current via ``handle_all_mids_message``; when the stream is down or
+the snapshot is older than the caller allows, clients fall back to an HTTP ``allMids`` fetch
+and store the result here.
+
+Snapshots are stored as compact ``MidsSnapshot`` price vectors (see price_vector.py).
+
+Usage:
+    cache = get_mids_cache("https://api.hyperliquid.xyz")
+    if cache.is_fresh(max_staleness=1.0):
+        btc = cache.get("BTC")
+"""
+
+import threading
+import time
+from typing import Dict, Optional, Any
+
+from .price_vector import SymbolTable, MidsSnapshot
+
+DEFAULT_TTL = 2.0  # Seconds an HTTP/WS snapshot is served before a refetch
+
+
+class MidsCache:
+    """Thread-safe holder for the latest allMids snapshot of one network."""
+
+    def __init__(self, ttl: float = DEFAULT_TTL):
+        """
+        Args:
+            ttl: Default maximum snapshot age in seconds when callers don't specify one
+        """
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # Serializes HTTP refreshes so concurrent misses trigger a single fetch
+        self.refresh_lock = threading.Lock()
+        self.symbols = SymbolTable()
+        self._snapshot = MidsSnapshot.empty(self.symbols)
+        self._updated_at: Optional[float] = None
+        self._source: Optional[str] = None
+
+    def update(self, mids: Dict[str, Any], source: str = "http", timestamp: Optional[float] = None):
+        """
+        Replace the snapshot.
+
+        Args:
+            mids: {symbol: price} as returned by Hyperliquid (prices may be strings)
+            source: "ws" or "http", kept for diagnostics
+            timestamp: Snapshot time (defaults to now)
+        """
+        snapshot = MidsSnapshot.from_mids(self.symbols, mids, timestamp)
+        with self._lock:
+            self._snapshot = snapshot
+            self._updated_at = snapshot.timestamp
+            self._source = source
+
+    def age(self) -> Optional[float]:
+        """Seconds since the last update, or None if never populated."""
+        updated_at = self._updated_at
+        if updated_at is None:
+            return None
+        return time.time() - updated_at
+
+    def is_fresh(self, max_staleness: Optional[float] = None) -> bool:
+        """Whether the snapshot is no older than max_staleness (defaults to the TTL)."""
+        age = self.age()
+        if age is None:
+            return False
+        return age <= (self.ttl if max_staleness is None else max_staleness)
+
+    def get(self, symbol: str) -> Optional[float]:
+        """O(1) lookup of one mid price from the current snapshot (None if unknown)."""
+        return self._snapshot.get(symbol)
+
+    def snapshot(self) -> MidsSnapshot:
+        """Returns the current immutable snapshot."""
+        return self._snapshot
+
+    @property
+    def updated_at(self) -> Optional[float]:
+        return self._updated_at
+
+    def stats(self) -> Dict[str, Any]:
+        """Diagnostics for health/timing endpoints."""
+        return {
+            "symbols": len(self._snapshot),
+            "age_seconds": self.age(),
+            "source": self._source,
+            "ttl": self.ttl
+        }
+
+    def handle_all_mids_message(self, parsed_message: Any):
+        """
+        WebSocket callback for the ``allMids`` channel.
+
+        Expects {"channel": "allMids", "data": {"mids": {symbol: price}}}; other frames
+        (e.g. subscriptionResponse) are ignored.
+        """
+        if not isinstance(parsed_message, dict) or parsed_message.get("channel") != "allMids":
+            return
+        data = parsed_message.get("data")
+        if isinstance(data, dict) and isinstance(data.get("mids"), dict):
+            self.update(data["mids"], source="ws")
+
+
+_caches: Dict[str, MidsCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_mids_cache(base_url: str) -> MidsCache:
+    """Returns the process-wide cache for an API base URL, creating it on first use."""
+    cache = _caches.get(base_url)
+    if cache is None:
+        with _caches_lock:
+            cache = _caches.get(base_url)
+            if cache is None:
+                cache = MidsCache()
+                _caches[base_url] = cache
+    return cache
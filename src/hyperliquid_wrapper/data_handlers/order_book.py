@@ -0,0 +1,189 @@
+"""
+Locally maintained L2 order books fed by the ``l2Book`` WebSocket channel.
+
+Hyperliquid publishes each l2Book frame as a complete snapshot of the aggregated levels
+(not incremental deltas), so every frame replaces the book wholesale. Prices are kept in
+sorted arrays with cumulative sizes, which makes best bid/ask and top-N O(1) and
+depth-at-price a single binary search.
+
+Usage:
+    books = get_order_books(base_url)
+    books.handle_l2_book_message(parsed_ws_frame)
+    book = books.live_book("BTC")
+    if book is not None:
+        book.best_bid_ask()
+        book.depth_at_price(67000.0)
+"""
+
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from typing import Dict, List, Optional, Any
+
+BOOK_STALE_AFTER = 5.0  # Seconds without an update before a book is resynced from REST
+
+
+class OrderBook:
+    """Sorted bid/ask levels for one coin."""
+
+    def __init__(self, coin: str):
+        self.coin = coin
+        self._lock = threading.Lock()
+        # Bids descending, asks ascending; each entry is the raw level {"px", "sz", "n"}
+        self._bids: List[Dict[str, Any]] = []
+        self._asks: List[Dict[str, Any]] = []
+        # Parallel search keys (bid prices negated so both sides ascend) and cumulative sizes
+        self._bid_keys: List[float] = []
+        self._ask_keys: List[float] = []
+        self._bid_cum: List[float] = []
+        self._ask_cum: List[float] = []
+        self.updated_at: Optional[float] = None
+        self.exchange_time: Optional[int] = None
+        self.live = False
+
+    def apply_snapshot(self, levels: List[List[Dict[str, Any]]], exchange_time: Optional[int] = None):
+        """
+        Replace the book with a full [bids, asks] level snapshot.
+
+        Args:
+            levels: [[bid levels], [ask levels]] as sent by l2Book (REST or WebSocket)
+            exchange_time: Exchange timestamp of the snapshot in ms, if known
+        """
+        bids = sorted(levels[0], key=lambda level: float(level["px"]), reverse=True)
+        asks = sorted(levels[1], key=lambda level: float(level["px"]))
+        bid_keys = [-float(level["px"]) for level in bids]
+        ask_keys = [float(level["px"]) for level in asks]
+        bid_cum = list(accumulate(float(level["sz"]) for level in bids))
+        ask_cum = list(accumulate(float(level["sz"]) for level in asks))
+
+        with self._lock:
+            if exchange_time is not None and self.exchange_time is not None and exchange_time < self.exchange_time:
+                return  # Out-of-order frame (e.g. REST resync racing the stream)
+            self._bids, self._asks = bids, asks
+            self._bid_keys, self._ask_keys = bid_keys, ask_keys
+            self._bid_cum, self._ask_cum = bid_cum, ask_cum
+            self.updated_at = time.time()
+            if exchange_time is not None:
+                self.exchange_time = exchange_time
+
+    def age(self) -> Optional[float]:
+        """Seconds since the last snapshot, or None if the book was never populated."""
+        return None if self.updated_at is None else time.time() - self.updated_at
+
+    def is_stale(self, max_age: float = BOOK_STALE_AFTER) -> bool:
+        age = self.age()
+        return age is None or age > max_age
+
+    def best_bid_ask(self) -> Dict[str, Optional[float]]:
+        """Best bid/ask and spread in the same shape as best_bid_ask_from_book."""
+        with self._lock:
+            best_bid = -self._bid_keys[0] if self._bid_keys else None
+            best_ask = self._ask_keys[0] if self._ask_keys else None
+
+        spread = None
+        if best_bid is not None and best_ask is not None:
+            spread = best_ask - best_bid
+
+        return {
+            "bid": best_bid,
+            "ask": best_ask,
+            "spread": spread,
+            "spread_percentage": (spread / best_bid * 100) if best_bid and spread else None
+        }
+
+    def spread(self) -> Optional[float]:
+        return self.best_bid_ask()["spread"]
+
+    def depth_at_price(self, price: float) -> Dict[str, float]:
+        """
+        Resting size between the top of the book and a price.
+
+        Returns:
+            dict: {"bid_depth": total bid size at or above price,
+                   "ask_depth": total ask size at or below price}
+        """
+        with self._lock:
+            bid_count = bisect_right(self._bid_keys, -price)
+            ask_count = bisect_right(self._ask_keys, price)
+            return {
+                "bid_depth": self._bid_cum[bid_count - 1] if bid_count else 0.0,
+                "ask_depth": self._ask_cum[ask_count - 1] if ask_count else 0.0
+            }
+
+    def size_at_price(self, price: float) -> Dict[str, float]:
+        """Size resting exactly at a price level on each side (0.0 if no such level)."""
+        with self._lock:
+            return {
+                "bid_size": self._level_size(self._bids, self._bid_keys, -price),
+                "ask_size": self._level_size(self._asks, self._ask_keys, price)
+            }
+
+    @staticmethod
+    def _level_size(levels: List[Dict[str, Any]], keys: List[float], key: float) -> float:
+        idx = bisect_left(keys, key)
+        if idx < len(keys) and keys[idx] == key:
+            return float(levels[idx]["sz"])
+        return 0.0
+
+    def top_n(self, n: int = 10) -> Dict[str, List[Dict[str, Any]]]:
+        """The best n levels per side in parse_l2_book format."""
+        with self._lock:
+            return {"bids": self._bids[:n], "asks": self._asks[:n]}
+
+    def to_book(self) -> Dict[str, List[Dict[str, Any]]]:
+        """The full book in parse_l2_book format."""
+        with self._lock:
+            return {"bids": list(self._bids), "asks": list(self._asks)}
+
+
+class OrderBookManager:
+    """Per-coin OrderBooks for one network."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._books: Dict[str, OrderBook] = {}
+
+    def get(self, coin: str) -> OrderBook:
+        """Returns the book for a coin, creating an empty one on first use."""
+        book = self._books.get(coin)
+        if book is None:
+            with self._lock:
+                book = self._books.setdefault(coin, OrderBook(coin))
+        return book
+
+    def live_book(self, coin: str, max_staleness: float = BOOK_STALE_AFTER) -> Optional[OrderBook]:
+        """The book for a coin if it is streaming and fresh, otherwise None (caller uses REST)."""
+        book = self._books.get(coin)
+        if book is None or not book.live or book.is_stale(max_staleness):
+            return None
+        return book
+
+    def handle_l2_book_message(self, parsed_message: Any):
+        """
+        WebSocket callback for the ``l2Book`` channel.
+
+        Expects {"channel": "l2Book", "data": {"coin", "time", "levels": [[bids], [asks]]}};
+        other frames are ignored.
+        """
+        if not isinstance(parsed_message, dict) or parsed_message.get("channel") != "l2Book":
+            return
+        data = parsed_message.get("data")
+        if not isinstance(data, dict) or not isinstance(data.get("levels"), list) or len(data["levels"]) != 2:
+            return
+        book = self.get(data.get("coin"))
+        book.apply_snapshot(data["levels"], data.get("time"))
+        book.live = True
+
+
+_managers: Dict[str, OrderBookManager] = {}
+_managers_lock = threading.Lock()
+
+
+def get_order_books(base_url: str) -> OrderBookManager:
+    """Returns the process-wide book manager for an API base URL, creating it on first use."""
+    manager = _managers.get(base_url)
+    if manager is None:
+        with _managers_lock:
+            manager = _managers.setdefault(base_url, OrderBookManager())
+    return manager
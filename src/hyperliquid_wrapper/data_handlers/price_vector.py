@@ -0,0 +1,137 @@
+"""
+Compact mid-price snapshots.
+
+A ``SymbolTable`` interns each symbol to a stable integer index; a ``MidsSnapshot`` stores
+one ``array('d')`` of prices aligned to that table. Lookups are a dict probe plus an array
+read, bulk reads return contiguous doubles, and pandas/NumPy views are only built when a
+caller explicitly asks for them.
+
+Usage:
+    table = SymbolTable()
+    snapshot = MidsSnapshot.from_mids(table, {"BTC": "67000.5", "ETH": "3500.1"})
+    snapshot["BTC"]                  # 67000.5
+    snapshot.take(["BTC", "ETH"])    # array('d', [67000.5, 3500.1])
+    snapshot.to_series()             # pandas.Series, imported on demand
+"""
+
+import math
+import threading
+import time
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Any, Tuple
+
+_NAN = float("nan")
+
+
+class SymbolTable:
+    """Append-only symbol -> index intern table shared by successive snapshots."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.index: Dict[str, int] = {}
+        self.symbols: List[str] = []
+
+    def intern(self, symbol: str) -> int:
+        """Return the index for a symbol, assigning the next free one if it is new."""
+        idx = self.index.get(symbol)
+        if idx is None:
+            with self._lock:
+                idx = self.index.get(symbol)
+                if idx is None:
+                    idx = len(self.symbols)
+                    self.symbols.append(symbol)
+                    self.index[symbol] = idx
+        return idx
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+
+class MidsSnapshot:
+    """
+    Immutable mid-price vector aligned to a SymbolTable.
+
+    Symbols known to the table but absent from this snapshot hold NaN and are treated as missing.
+    """
+
+    __slots__ = ("table", "prices", "timestamp", "_size")
+
+    def __init__(self, table: SymbolTable, prices: array, timestamp: Optional[float] = None):
+        self.table = table
+        self.prices = prices
+        self.timestamp = timestamp if timestamp is not None else time.time()
+        self._size = sum(1 for price in prices if not math.isnan(price))
+
+    @classmethod
+    def from_mids(cls, table: SymbolTable, mids: Dict[str, Any], timestamp: Optional[float] = None) -> "MidsSnapshot":
+        """Build a snapshot from a {symbol: price} map (prices may be strings, as in allMids)."""
+        indexed = [(table.intern(symbol), float(price)) for symbol, price in mids.items()]
+        prices = array("d", [_NAN]) * len(table)
+        for idx, price in indexed:
+            prices[idx] = price
+        return cls(table, prices, timestamp)
+
+    @classmethod
+    def empty(cls, table: SymbolTable) -> "MidsSnapshot":
+        return cls(table, array("d"), timestamp=0.0)
+
+    def _index_of(self, symbol: str) -> Optional[int]:
+        idx = self.table.index.get(symbol)
+        if idx is None or idx >= len(self.prices) or math.isnan(self.prices[idx]):
+            return None
+        return idx
+
+    def get(self, symbol: str, default: Optional[float] = None) -> Optional[float]:
+        """O(1) price lookup."""
+        idx = self._index_of(symbol)
+        return default if idx is None else self.prices[idx]
+
+    def __getitem__(self, symbol: str) -> float:
+        idx = self._index_of(symbol)
+        if idx is None:
+            raise KeyError(symbol)
+        return self.prices[idx]
+
+    def __contains__(self, symbol: str) -> bool:
+        return self._index_of(symbol) is not None
+
+    def __len__(self) -> int:
+        return self._size
+
+    def keys(self) -> Iterator[str]:
+        symbols = self.table.symbols
+        for idx in range(len(self.prices)):
+            if not math.isnan(self.prices[idx]):
+                yield symbols[idx]
+
+    __iter__ = keys
+
+    def items(self) -> Iterator[Tuple[str, float]]:
+        symbols = self.table.symbols
+        for idx, price in enumerate(self.prices):
+            if not math.isnan(price):
+                yield symbols[idx], price
+
+    def take(self, symbols: Iterable[str]) -> array:
+        """Bulk read: prices for the given symbols in order, NaN where missing."""
+        prices = self.prices
+        limit = len(prices)
+        index = self.table.index
+        out = array("d")
+        for symbol in symbols:
+            idx = index.get(symbol)
+            out.append(prices[idx] if idx is not None and idx < limit else _NAN)
+        return out
+
+    def as_numpy(self):
+        """Zero-copy NumPy view of the full price vector (NaN for absent symbols)."""
+        import numpy as np
+        return np.frombuffer(self.prices, dtype=np.float64)
+
+    def to_dict(self) -> Dict[str, float]:
+        return dict(self.items())
+
+    def to_series(self):
+        """pandas.Series view indexed by symbol with the snapshot timestamp as name."""
+        import pandas as pd
+        return pd.Series(self.to_dict(), name=self.timestamp, dtype="float64")
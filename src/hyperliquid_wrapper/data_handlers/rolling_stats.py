@@ -0,0 +1,210 @@
+"""
+Rolling 24h statistics maintained incrementally from the trades stream.
+
+Each coin keeps one-minute buckets covering the last 24 hours:
+    - high/low come from monotonic deques, so the window extreme is always at the front
+    - volume is a running sum (bucket volume is subtracted as it leaves the window)
+    - the 24h-ago price is the open of the oldest bucket still inside the window
+
+The window is seeded from 1m candles and then advanced by ``trades`` WebSocket frames, so
+answering a stats query is amortized O(1) and needs no HTTP call.
+
+Usage:
+    registry = get_rolling_stats(base_url)
+    stats = registry.get("BTC")
+    stats.seed(one_minute_candles)
+    registry.handle_trades_message(parsed_ws_frame)
+    if stats.live:
+        stats.snapshot()
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Any
+
+WINDOW_MS = 24 * 60 * 60 * 1000
+BUCKET_MS = 60 * 1000  # One-minute buckets, matching the 1m seed candles
+
+
+class RollingWindowStats:
+    """24h high/low/volume/change for one coin, updated per trade."""
+
+    def __init__(self, coin: str, window_ms: int = WINDOW_MS, bucket_ms: int = BUCKET_MS):
+        self.coin = coin
+        self.window_ms = window_ms
+        self.bucket_ms = bucket_ms
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        # [bucket_time, open, high, low, close, volume], oldest first
+        self._buckets: deque = deque()
+        # (bucket_time, value) with values decreasing (highs) / increasing (lows) front to back
+        self._highs: deque = deque()
+        self._lows: deque = deque()
+        self._volume = 0.0
+        self._seeded_until = 0
+        self.seeded = False
+        self.live = False
+        self.last_trade_time: Optional[int] = None
+
+    def seed(self, candles: List[Dict[str, Any]], now_ms: Optional[int] = None):
+        """
+        Rebuild the window from 1m candles.
+
+        The still-open minute is skipped: trades replayed by the subscription rebuild it, which
+        avoids counting its volume twice.
+        """
+        now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        open_bucket = (now_ms // self.bucket_ms) * self.bucket_ms
+        with self._lock:
+            self._reset()
+            for candle in sorted(candles, key=lambda c: c["t"]):
+                bucket_time = int(candle["t"])
+                if bucket_time >= open_bucket:
+                    continue
+                self._append_bucket(bucket_time, float(candle["o"]), float(candle["h"]),
+                                    float(candle["l"]), float(candle["c"]), float(candle.get("v", 0)))
+            self._seeded_until = open_bucket
+            self._expire(now_ms)
+            self.seeded = True
+
+    def add_trade(self, price: float, size: float, trade_time: int):
+        """Fold one trade into its minute bucket. Trades already covered by the seed are ignored."""
+        with self._lock:
+            if trade_time < self._seeded_until:
+                return
+            bucket_time = (trade_time // self.bucket_ms) * self.bucket_ms
+            last = self._buckets[-1] if self._buckets else None
+
+            if last is None or bucket_time > last[0]:
+                self._append_bucket(bucket_time, price, price, price, price, size)
+            elif bucket_time == last[0]:
+                last[4] = price
+                last[5] += size
+                self._volume += size
+                if price > last[2]:
+                    last[2] = price
+                    self._push_high(bucket_time, price)
+                if price < last[3]:
+                    last[3] = price
+                    self._push_low(bucket_time, price)
+            else:
+                # Late trade for an older bucket: count its volume, extremes are best effort
+                self._volume += size
+                for bucket in self._buckets:
+                    if bucket[0] == bucket_time:
+                        bucket[5] += size
+                        break
+
+            self.last_trade_time = max(self.last_trade_time or 0, trade_time)
+            self._expire(trade_time)
+
+    def snapshot(self, now_ms: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Current 24h stats in the same shape as compute_24h_stats.
+
+        Returns an empty dict if nothing is in the window.
+        """
+        now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        with self._lock:
+            self._expire(now_ms)
+            if not self._buckets:
+                return {}
+
+            price_24h_ago = self._buckets[0][1]
+            current_price = self._buckets[-1][4]
+            price_change = current_price - price_24h_ago
+            return {
+                "high_24h": self._highs[0][1],
+                "low_24h": self._lows[0][1],
+                "volume_24h": max(self._volume, 0.0),
+                "price_24h_ago": price_24h_ago,
+                "current_price": current_price,
+                "price_change": price_change,
+                "price_change_percent": (price_change / price_24h_ago * 100) if price_24h_ago else 0
+            }
+
+    def _append_bucket(self, bucket_time: int, open_: float, high: float, low: float, close: float, volume: float):
+        self._buckets.append([bucket_time, open_, high, low, close, volume])
+        self._volume += volume
+        self._push_high(bucket_time, high)
+        self._push_low(bucket_time, low)
+
+    def _push_high(self, bucket_time: int, high: float):
+        while self._highs and self._highs[-1][1] <= high:
+            self._highs.pop()
+        self._highs.append((bucket_time, high))
+
+    def _push_low(self, bucket_time: int, low: float):
+        while self._lows and self._lows[-1][1] >= low:
+            self._lows.pop()
+        self._lows.append((bucket_time, low))
+
+    def _expire(self, now_ms: int):
+        """Drop buckets that ended before the window start."""
+        window_start = now_ms - self.window_ms
+        while self._buckets and self._buckets[0][0] + self.bucket_ms <= window_start:
+            self._volume -= self._buckets.popleft()[5]
+        while self._highs and self._highs[0][0] + self.bucket_ms <= window_start:
+            self._highs.popleft()
+        while self._lows and self._lows[0][0] + self.bucket_ms <= window_start:
+            self._lows.popleft()
+        if not self._buckets:
+            self._volume = 0.0  # Clear accumulated float error once the window empties
+
+
+class RollingStatsRegistry:
+    """Per-coin RollingWindowStats for one network."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[str, RollingWindowStats] = {}
+
+    def get(self, coin: str) -> RollingWindowStats:
+        """Returns the stats engine for a coin, creating it on first use."""
+        stats = self._stats.get(coin)
+        if stats is None:
+            with self._lock:
+                stats = self._stats.setdefault(coin, RollingWindowStats(coin))
+        return stats
+
+    def live_snapshot(self, coin: str) -> Optional[Dict[str, Any]]:
+        """Stats for a coin if its stream is live, otherwise None (caller falls back to HTTP)."""
+        stats = self._stats.get(coin)
+        if stats is None or not (stats.seeded and stats.live):
+            return None
+        return stats.snapshot() or None
+
+    def tracked_coins(self) -> List[str]:
+        return [coin for coin, stats in self._stats.items() if stats.live]
+
+    def handle_trades_message(self, parsed_message: Any):
+        """
+        WebSocket callback for the ``trades`` channel.
+
+        Expects {"channel": "trades", "data": [{"coin", "px", "sz", "time", ...}]}; other frames
+        are ignored. Coins are only updated once they have been seeded.
+        """
+        if not isinstance(parsed_message, dict) or parsed_message.get("channel") != "trades":
+            return
+        for trade in parsed_message.get("data") or []:
+            stats = self._stats.get(trade.get("coin"))
+            if stats is None or not stats.seeded:
+                continue
+            stats.add_trade(float(trade["px"]), float(trade["sz"]), int(trade["time"]))
+            stats.live = True
+
+
+_registries: Dict[str, RollingStatsRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def get_rolling_stats(base_url: str) -> RollingStatsRegistry:
+    """Returns the process-wide registry for an API base URL, creating it on first use."""
+    registry = _registries.get(base_url)
+    if registry is None:
+        with _registries_lock:
+            registry = _registries.setdefault(base_url, RollingStatsRegistry())
+    return registry
@@ -0,0 +1,256 @@
+"""
+Async database access for FastAPI routes, backed by aiosqlite.
+
+AsyncDBManager exposes the same operations as DBManager as awaitables. Writes are submitted
+to the process-wide DatabaseWriter (the single owner of the write connection) and awaited
+until committed; reads are spread over a small pool of aiosqlite reader connections. With the
+database in WAL mode, readers never wait for the writer, and none of the sqlite work runs on
+the event loop.
+
+Usage:
+    db = AsyncDBManager()
+    await db.add_conversation_message(session_id, "user", text)
+    history = await db.get_conversation_history(session_id)
+    await db.close()
+"""
+
+import asyncio
+import sqlite3
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+
+import aiosqlite
+
+from . import database_manager
+from .conversation_cache import get_conversation_cache
+from .conversation_retention import get_conversation_retention
+from .database_manager import (
+    CONNECTION_PRAGMAS, CONVERSATION_HISTORY_SQL, DEFAULT_TRADE_PAGE_SIZE, SESSIONS_SQL, STATEMENT_CACHE_SIZE,
+    _build_trade_aggregate, _build_trade_query, _message_from_row, _trade_page, _trade_summary, get_current_network, initialize_database
+)
+from .db_writer import DatabaseWriter, get_db_writer
+from .position_book import get_position_book
+
+READER_POOL_SIZE = 4
+
+
+class AsyncDBManager:
+    """Awaitable counterpart of DBManager: writes via DatabaseWriter, reads from a connection pool."""
+
+    def __init__(self, readers: int = READER_POOL_SIZE, writer: Optional[DatabaseWriter] = None):
+        """
+        Initialize the database manager and ensure tables exist.
+
+        Args:
+            readers: Number of aiosqlite reader connections
+            writer: Writer to submit writes to (defaults to the process-wide one)
+        """
+        initialize_database()
+        self.reader_count = readers
+        self._writer = writer
+        self._readers: List[aiosqlite.Connection] = []
+        self._idle_readers: Optional[asyncio.Queue] = None
+        self._open_lock: Optional[asyncio.Lock] = None
+
+    async def _connect(self) -> aiosqlite.Connection:
+        conn = await aiosqlite.connect(database_manager.DATABASE_NAME, cached_statements=STATEMENT_CACHE_SIZE)
+        conn.row_factory = aiosqlite.Row
+        for pragma in CONNECTION_PRAGMAS:
+            await conn.execute(pragma)
+        return conn
+
+    async def _ensure_open(self):
+        """Open the reader connections on first use (on the running loop)."""
+        if self._idle_readers is not None:
+            return
+        if self._open_lock is None:
+            self._open_lock = asyncio.Lock()
+        async with self._open_lock:
+            if self._idle_readers is not None:
+                return
+            readers = [await self._connect() for _ in range(self.reader_count)]
+            idle_readers = asyncio.Queue()
+            for conn in readers:
+                idle_readers.put_nowait(conn)
+            self._readers, self._idle_readers = readers, idle_readers
+            print(f"[AsyncDBManager] Opened {len(readers)} reader connections.")
+
+    @asynccontextmanager
+    async def _reader(self):
+        await self._ensure_open()
+        conn = await self._idle_readers.get()
+        try:
+            yield conn
+        finally:
+            self._idle_readers.put_nowait(conn)
+
+    async def _write(self, command_future) -> Any:
+        """Await a DatabaseWriter future (resolves once the write has committed)."""
+        return await asyncio.wrap_future(command_future)
+
+    @property
+    def writer(self) -> DatabaseWriter:
+        return self._writer if self._writer is not None else get_db_writer()
+
+    async def _fetch_all(self, query: str, params: tuple = ()) -> List[Dict[str, Any]]:
+        async with self._reader() as conn:
+            async with conn.execute(query, params) as cursor:
+                return [dict(row) for row in await cursor.fetchall()]
+
+    async def close(self):
+        """Close the reader connections. Pending writes are flushed by the writer's own shutdown."""
+        connections = self._readers
+        self._readers, self._idle_readers = [], None
+        for conn in connections:
+            try:
+                await conn.close()
+            except Exception as e:
+                print(f"[AsyncDBManager] Error closing connection: {e}")
+
+    # Trades and positions
+
+    async def add_trade(self, trade_data: dict, network: str = None):
+        """Add a trade to the database and update its position."""
+        return await self.add_trades_bulk([trade_data], network)
+
+    async def add_trades_bulk(self, fills: list, network: str = None) -> int:
+        """Add a batch of fills in one write command (see database_manager.add_trades_bulk)."""
+        if not fills:
+            return 0
+        added = await self._write(self.writer.add_fills(fills, network))
+        print(f"[AsyncDBManager] Added {added} of {len(fills)} fills")
+        return added
+
+    async def get_current_positions(self, network: str = None) -> List[Dict[str, Any]]:
+        """Get all current positions (from the in-memory position book)."""
+        if network is None:
+            network = get_current_network()
+        # positions() waits on the book lock, which the writer holds across a whole batch commit,
+        # and its first use per network replays trades from sqlite; keep both off the event loop
+        return await asyncio.get_running_loop().run_in_executor(None, get_position_book().positions, network)
+
+    async def get_all_trades(self, network: str = None) -> List[Dict[str, Any]]:
+        """Get all trades."""
+        if network is None:
+            network = get_current_network()
+        return await self._fetch_all("SELECT * FROM trades WHERE network = ? ORDER BY timestamp DESC", (network,))
+
+    async def query_trades(self, network: str = None, coin: str = None, side: str = None, start_time: int = None,
+                           end_time: int = None, columns: List[str] = None, limit: int = DEFAULT_TRADE_PAGE_SIZE,
+                           cursor: str = None, ascending: bool = False) -> Dict[str, Any]:
+        """Get one page of trades (see database_manager.query_trades)."""
+        if network is None:
+            network = get_current_network()
+        sql, params, columns, limit = _build_trade_query(network, coin, side, start_time, end_time, columns, limit,
+                                                         cursor, ascending)
+        async with self._reader() as conn:
+            async with conn.execute(sql, params) as db_cursor:
+                return _trade_page(await db_cursor.fetchall(), columns, limit)
+
+    async def aggregate_trades(self, network: str = None, coin: str = None, side: str = None,
+                               start_time: int = None, end_time: int = None) -> Dict[str, Any]:
+        """Get per-coin trade aggregates plus totals (see database_manager.aggregate_trades)."""
+        if network is None:
+            network = get_current_network()
+        sql, params = _build_trade_aggregate(network, coin, side, start_time, end_time)
+        return _trade_summary(await self._fetch_all(sql, tuple(params)))
+
+    async def get_last_trade_timestamp(self, network: str = None) -> Optional[int]:
+        """Get the newest persisted fill time (ms)."""
+        if network is None:
+            network = get_current_network()
+        async with self._reader() as conn:
+            async with conn.execute("SELECT MAX(timestamp) FROM trades WHERE network = ?", (network,)) as cursor:
+                return (await cursor.fetchone())[0]
+
+    # Open order tracking
+
+    async def add_open_order(self, order_details: dict, network: str = None):
+        """Add an open order to tracking."""
+        try:
+            await self._write(self.writer.add_open_order(order_details, network))
+            print(f"[AsyncDBManager] Added to open_orders_tracking: Order ID {order_details['order_id']} for {order_details['symbol']}")
+        except sqlite3.IntegrityError as e:
+            if "UNIQUE constraint failed" in str(e):
+                print(f"[AsyncDBManager] Order ID {order_details['order_id']} already in open_orders_tracking. Skipping.")
+            else:
+                print(f"[AsyncDBManager] Error adding to open_orders_tracking: {e}")
+        except Exception as e:
+            print(f"[AsyncDBManager] Unexpected error adding to open_orders_tracking: {e}")
+
+    async def remove_open_order(self, order_id: int, network: str = None):
+        """Remove an open order from tracking."""
+        try:
+            removed = await self._write(self.writer.remove_open_order(order_id, network))
+            if removed > 0:
+                print(f"[AsyncDBManager] Removed Order ID {order_id} from open_orders_tracking.")
+            else:
+                print(f"[AsyncDBManager] Order ID {order_id} not found in open_orders_tracking for removal.")
+        except Exception as e:
+            print(f"[AsyncDBManager] Error removing Order ID {order_id} from open_orders_tracking: {e}")
+
+    async def get_tracked_open_orders(self, network: str = None) -> List[Dict[str, Any]]:
+        """Get all tracked open orders."""
+        if network is None:
+            network = get_current_network()
+        return await self._fetch_all("SELECT order_id, symbol, side, order_type, price, size, timestamp_placed FROM open_orders_tracking WHERE network = ? ORDER BY timestamp_placed DESC",
+                                     (network,))
+
+    # Conversation history
+
+    async def add_conversation_message(self, session_id: str, role: str, content: str, tool_calls: dict = None):
+        """Add a message to conversation history."""
+        try:
+            await self._write(self.writer.add_conversation_message(session_id, role, content, tool_calls))
+            print(f"[AsyncDBManager] Added {role} message to conversation {session_id[:8]}...")
+        except Exception as e:
+            print(f"[AsyncDBManager] Error adding conversation message: {e}")
+            raise
+
+    async def get_conversation_history(self, session_id: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """Get conversation history for a session, oldest message first (cached per session, rehydrated if archived)."""
+        cache = get_conversation_cache()
+        messages = cache.get(session_id, limit)
+        if messages is not None:
+            return messages
+
+        cacheable = limit <= cache.window
+        rows = cache.window if cacheable else limit
+        rehydrated = False
+        while True:
+            token = cache.load_token()
+            archived = False
+            async with self._reader() as conn:
+                async with conn.execute(CONVERSATION_HISTORY_SQL, (session_id, rows)) as cursor:
+                    messages = [_message_from_row(row) for row in await cursor.fetchall()]
+                if not rehydrated and len(messages) < rows:
+                    async with conn.execute("SELECT 1 FROM conversation_archive WHERE session_id = ? LIMIT 1", (session_id,)) as cursor:
+                        archived = await cursor.fetchone() is not None
+            if not archived:
+                break
+            # Older messages were archived and the live rows fall short: bring them back (once)
+            await asyncio.get_running_loop().run_in_executor(None, get_conversation_retention().rehydrate_session, session_id)
+            rehydrated = True
+        messages.reverse()
+        if cacheable:
+            cache.fill(session_id, messages, token)
+        return messages[-limit:] if limit > 0 else []
+
+    async def get_all_sessions(self) -> List[Dict[str, Any]]:
+        """Get all conversation sessions (from the sessions summary table)."""
+        return await self._fetch_all(SESSIONS_SQL)
+
+    async def clear_session_history(self, session_id: str) -> int:
+        """Clear history for a session."""
+        try:
+            deleted_count = await self._write(self.writer.clear_session_history(session_id))
+            print(f"[AsyncDBManager] Cleared {deleted_count} messages from session {session_id[:8]}...")
+            return deleted_count
+        except Exception as e:
+            print(f"[AsyncDBManager] Error clearing session history: {e}")
+            raise
+
+    def generate_session_id(self):
+        """Generate a new session ID."""
+        return str(uuid.uuid4())
@@ -0,0 +1,370 @@
+"""
+Local candle store with incremental gap-fill.
+
+Candles are persisted in the trading database keyed by (network, coin, interval, open_time).
+A coverage table records which time ranges of *closed* candles have already been fetched,
+so a request only goes upstream for the missing gaps plus the still-open tail candle.
+
+Usage:
+    store = CandleStore()
+    candles = store.get_candles("mainnet", "BTC", "1h", start_ms, end_ms,
+                                fetch=lambda a, b: client.get_candles("BTC", "1h", a, b))
+
+    # From async code (database work runs in the default executor):
+    candles = await store.aget_candles("mainnet", "BTC", "1h", start_ms, end_ms,
+                                       fetch=lambda a, b: async_client.get_candles("BTC", "1h", a, b))
+
+    # Streaming, one time window at a time (gaps are fetched as their window is reached):
+    async for chunk in store.aiter_candles("mainnet", "BTC", "1h", start_ms, end_ms, fetch=...):
+        ...
+"""
+
+import asyncio
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Any, Tuple
+
+from .database_manager import get_db_connection
+from .db_writer import WriteCommand, get_db_writer
+
+INTERVAL_MS = {
+    "1m": 60_000,
+    "3m": 3 * 60_000,
+    "5m": 5 * 60_000,
+    "15m": 15 * 60_000,
+    "30m": 30 * 60_000,
+    "1h": 60 * 60_000,
+    "2h": 2 * 60 * 60_000,
+    "4h": 4 * 60 * 60_000,
+    "8h": 8 * 60 * 60_000,
+    "12h": 12 * 60 * 60_000,
+    "1d": 24 * 60 * 60_000,
+    "3d": 3 * 24 * 60 * 60_000,
+    "1w": 7 * 24 * 60 * 60_000,
+}
+
+Range = Tuple[int, int]  # [start_ms, end_ms) half-open
+
+STREAM_CHUNK_CANDLES = 1000  # Candles per window when streaming
+MAX_CANDLES_PER_REQUEST = 5000  # Hyperliquid returns at most this many candles per candleSnapshot
+
+
+def interval_to_ms(interval: str) -> int:
+    """Length of one candle in milliseconds."""
+    if interval not in INTERVAL_MS:
+        raise ValueError(f"Unsupported candle interval: {interval}")
+    return INTERVAL_MS[interval]
+
+
+def _subtract_ranges(wanted: Range, covered: List[Range]) -> List[Range]:
+    """Return the parts of `wanted` not covered by the (sorted, non-overlapping) `covered` ranges."""
+    start, end = wanted
+    gaps = []
+    cursor = start
+    for covered_start, covered_end in covered:
+        if covered_end <= cursor:
+            continue
+        if covered_start >= end:
+            break
+        if covered_start > cursor:
+            gaps.append((cursor, covered_start))
+        cursor = max(cursor, covered_end)
+        if cursor >= end:
+            break
+    if cursor < end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+def _merge_ranges(ranges: List[Range]) -> List[Range]:
+    merged: List[Range] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _record_coverage(cursor: sqlite3.Cursor, network: str, coin: str, interval: str, new_range: Range):
+    """Merge new_range into the stored coverage for this key (within the caller's transaction)."""
+    cursor.execute('''
+    SELECT start_time, end_time FROM candle_coverage
+    WHERE network = ? AND coin = ? AND interval = ? AND end_time >= ? AND start_time <= ?
+    ''', (network, coin, interval, new_range[0], new_range[1]))
+    overlapping = [(row[0], row[1]) for row in cursor.fetchall()]
+    merged = _merge_ranges(overlapping + [new_range])[0]
+    cursor.execute('''
+    DELETE FROM candle_coverage
+    WHERE network = ? AND coin = ? AND interval = ? AND end_time >= ? AND start_time <= ?
+    ''', (network, coin, interval, new_range[0], new_range[1]))
+    cursor.execute('''
+    INSERT INTO candle_coverage (network, coin, interval, start_time, end_time) VALUES (?, ?, ?, ?, ?)
+    ''', (network, coin, interval, merged[0], merged[1]))
+
+
+@dataclass
+class SaveCandles(WriteCommand):
+    """Upsert candle rows and merge a covered range into candle_coverage."""
+    network: str
+    coin: str
+    interval: str
+    candle_rows: List[tuple]
+    covered: Optional[Range] = None  # Nothing is recorded as covered when None
+
+    @property
+    def rows(self) -> int:
+        return max(len(self.candle_rows), 1)
+
+    def apply(self, cursor: sqlite3.Cursor) -> None:
+        if self.candle_rows:
+            cursor.executemany('''
+            INSERT OR REPLACE INTO candles (
+                network, coin, interval, open_time, close_time, open, high, low, close, volume, trades
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', self.candle_rows)
+        if self.covered is not None:
+            _record_coverage(cursor, self.network, self.coin, self.interval, self.covered)
+
+
+class CandleStore:
+    """Persistent OHLCV candle cache backed by the trading database."""
+
+    def __init__(self, max_candles_per_request: int = MAX_CANDLES_PER_REQUEST):
+        """
+        Initialize the store and ensure its tables exist.
+
+        Args:
+            max_candles_per_request: Upstream's per-request cap; a response this long may have been cut short
+        """
+        self.max_candles_per_request = max_candles_per_request
+        initialize_candle_tables()
+
+    # ------------------------------------------------------------------
+    # Planning and persistence
+    # ------------------------------------------------------------------
+
+    def missing_ranges(self, network: str, coin: str, interval: str, start_time: int, end_time: int,
+                       now_ms: Optional[int] = None) -> List[Range]:
+        """
+        Ranges (in aligned candle open times) that must be fetched upstream.
+
+        Closed candles inside recorded coverage are skipped; the currently open candle is
+        always refetched because it keeps changing until it closes.
+        """
+        step = interval_to_ms(interval)
+        now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        wanted = ((start_time // step) * step, (end_time // step) * step + step)
+        if wanted[0] >= wanted[1]:
+            return []
+
+        covered = self._load_coverage(network, coin, interval)
+        # Never treat the open candle as covered, even if a previous fetch included it
+        open_candle_start = (now_ms // step) * step
+        covered = [(a, min(b, open_candle_start)) for a, b in covered if a < open_candle_start]
+        return _subtract_ranges(wanted, covered)
+
+    def save_candles(self, network: str, coin: str, interval: str, fetched_range: Range,
+                     candles: List[Dict[str, Any]], now_ms: Optional[int] = None) -> int:
+        """
+        Upsert fetched candles and mark the closed part of fetched_range as covered. A complete
+        response covers the whole range, including stretches without candles (before a listing,
+        during a halt). A response that may have been cut short (it holds max_candles_per_request
+        candles) covers only up to its last candle and leaves the rest missing.
+
+        Args:
+            fetched_range: The [start, end) range that was requested upstream
+            candles: Hyperliquid candle dicts ({"t", "T", "o", "h", "l", "c", "v", "n"})
+
+        Returns:
+            int: Where the range is fetched up to: fetched_range[1] for a complete response, else
+                 the end of the last returned candle (continue from there)
+        """
+        step = interval_to_ms(interval)
+        now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        closed_until = (now_ms // step) * step
+
+        rows = [
+            (network, coin, interval, int(c["t"]), int(c.get("T", int(c["t"]) + step - 1)),
+             float(c["o"]), float(c["h"]), float(c["l"]), float(c["c"]), float(c.get("v", 0)), int(c.get("n", 0)))
+            for c in candles if c.get("t") is not None
+        ]
+
+        if len(rows) >= self.max_candles_per_request:
+            fetched_until = max(row[3] + step for row in rows)
+        else:
+            fetched_until = fetched_range[1]
+
+        covered_end = min(fetched_range[1], closed_until, fetched_until)
+        covered = (fetched_range[0], covered_end) if covered_end > fetched_range[0] else None
+        try:
+            get_db_writer().submit(SaveCandles(network, coin, interval, rows, covered)).result()
+        except Exception as e:
+            print(f"[CandleStore] Error saving {interval} candles for {coin} on {network}: {e}")
+            raise
+        return fetched_until
+
+    def load_candles(self, network: str, coin: str, interval: str, start_time: int, end_time: int) -> List[Dict[str, Any]]:
+        """Read stored candles with open time in [start_time, end_time], oldest first."""
+        step = interval_to_ms(interval)
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+        SELECT open_time, close_time, open, high, low, close, volume, trades
+        FROM candles
+        WHERE network = ? AND coin = ? AND interval = ? AND open_time BETWEEN ? AND ?
+        ORDER BY open_time
+        ''', (network, coin, interval, (start_time // step) * step, end_time))
+        candles = [
+            {"t": row[0], "T": row[1], "s": coin, "i": interval, "o": row[2], "h": row[3],
+             "l": row[4], "c": row[5], "v": row[6], "n": row[7]}
+            for row in cursor.fetchall()
+        ]
+        conn.close()
+        return candles
+
+    def _load_coverage(self, network: str, coin: str, interval: str) -> List[Range]:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+        SELECT start_time, end_time FROM candle_coverage
+        WHERE network = ? AND coin = ? AND interval = ?
+        ORDER BY start_time
+        ''', (network, coin, interval))
+        covered = [(row[0], row[1]) for row in cursor.fetchall()]
+        conn.close()
+        return covered
+
+    # ------------------------------------------------------------------
+    # Read-through helpers
+    # ------------------------------------------------------------------
+
+    def get_candles(self, network: str, coin: str, interval: str, start_time: int, end_time: int,
+                    fetch: Callable[[int, int], List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        Return candles for [start_time, end_time], fetching only missing ranges upstream.
+
+        Args:
+            fetch: Callable(start_ms, end_ms) returning Hyperliquid candles for that range
+        """
+        now_ms = int(time.time() * 1000)
+        for gap_start, gap_end in self.missing_ranges(network, coin, interval, start_time, end_time, now_ms):
+            # Truncated responses are continued from their last candle while upstream makes progress
+            while gap_start < gap_end:
+                candles = fetch(gap_start, gap_end - 1)
+                fetched_until = self.save_candles(network, coin, interval, (gap_start, gap_end), candles, now_ms)
+                if fetched_until <= gap_start:
+                    break
+                gap_start = fetched_until
+        return self.load_candles(network, coin, interval, start_time, end_time)
+
+    async def aget_candles(self, network: str, coin: str, interval: str, start_time: int, end_time: int,
+                           fetch: Callable[[int, int], Awaitable[List[Dict[str, Any]]]]) -> List[Dict[str, Any]]:
+        """
+        Async variant of get_candles. ``fetch`` is awaited; sqlite work runs in the
+        default executor so the event loop is never blocked on disk.
+        """
+        loop = asyncio.get_running_loop()
+        now_ms = int(time.time() * 1000)
+        gaps = await loop.run_in_executor(
+            None, self.missing_ranges, network, coin, interval, start_time, end_time, now_ms
+        )
+        for gap in gaps:
+            await self._afill_gap(network, coin, interval, gap, fetch, now_ms)
+        return await loop.run_in_executor(None, self.load_candles, network, coin, interval, start_time, end_time)
+
+
+    async def aiter_candles(self, network: str, coin: str, interval: str, start_time: int, end_time: int,
+                            fetch: Callable[[int, int], Awaitable[List[Dict[str, Any]]]],
+                            chunk_candles: int = STREAM_CHUNK_CANDLES,
+                            align_ms: Optional[int] = None) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Streaming variant of aget_candles: yields the candles of [start_time, end_time] in
+        consecutive time windows of about ``chunk_candles`` candles, oldest first. Missing ranges
+        are fetched upstream only when the window that needs them is reached, so the first
+        window is served without waiting for the rest of the history.
+
+        Args:
+            chunk_candles: Candles per window
+            align_ms: Make window boundaries multiples of this (e.g. a resampling target interval
+                      so no output bucket spans two windows)
+        """
+        loop = asyncio.get_running_loop()
+        step = interval_to_ms(interval)
+        now_ms = int(time.time() * 1000)
+        gaps = await loop.run_in_executor(
+            None, self.missing_ranges, network, coin, interval, start_time, end_time, now_ms
+        )
+
+        align = max(step, align_ms or step)
+        span = max(1, (chunk_candles * step) // align) * align
+        window_start = (start_time // align) * align
+        while window_start <= end_time:
+            window_end = window_start + span
+            while gaps and gaps[0][0] < window_end:
+                gap_start, gap_end = gaps.pop(0)
+                # Fetch only this window's part of the gap; the rest waits for its own window
+                gap = (max(gap_start, window_start), min(gap_end, window_end))
+                if gap_end > window_end:
+                    gaps.insert(0, (window_end, gap_end))
+                await self._afill_gap(network, coin, interval, gap, fetch, now_ms)
+            chunk = await loop.run_in_executor(
+                None, self.load_candles, network, coin, interval, max(window_start, start_time),
+                min(window_end - 1, end_time)
+            )
+            if chunk:
+                yield chunk
+            window_start = window_end
+
+    async def _afill_gap(self, network: str, coin: str, interval: str, gap: Range,
+                         fetch: Callable[[int, int], Awaitable[List[Dict[str, Any]]]], now_ms: int):
+        """Fetch and save one missing range, continuing truncated responses while upstream makes progress."""
+        loop = asyncio.get_running_loop()
+        gap_start, gap_end = gap
+        while gap_start < gap_end:
+            candles = await fetch(gap_start, gap_end - 1)
+            fetched_until = await loop.run_in_executor(
+                None, self.save_candles, network, coin, interval, (gap_start, gap_end), candles, now_ms
+            )
+            if fetched_until <= gap_start:
+                break
+            gap_start = fetched_until
+
+
+def initialize_candle_tables():
+    """Create the candle and coverage tables if they don't exist."""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS candles (
+        network TEXT NOT NULL,                 -- 'mainnet' or 'testnet'
+        coin TEXT NOT NULL,
+        interval TEXT NOT NULL,                -- '1m', '1h', '1d', ...
+        open_time INTEGER NOT NULL,            -- Candle open time (ms)
+        close_time INTEGER NOT NULL,           -- Candle close time (ms)
+        open REAL NOT NULL,
+        high REAL NOT NULL,
+        low REAL NOT NULL,
+        close REAL NOT NULL,
+        volume REAL NOT NULL DEFAULT 0,
+        trades INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (network, coin, interval, open_time)
+    ) WITHOUT ROWID
+    ''')
+
+    # Fetched ranges of closed candles: [start_time, end_time) per (network, coin, interval)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS candle_coverage (
+        network TEXT NOT NULL,
+        coin TEXT NOT NULL,
+        interval TEXT NOT NULL,
+        start_time INTEGER NOT NULL,
+        end_time INTEGER NOT NULL,
+        PRIMARY KEY (network, coin, interval, start_time)
+    )
+    ''')
+
+    conn.commit()
+    conn.close()
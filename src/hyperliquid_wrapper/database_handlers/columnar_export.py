@@ -0,0 +1,418 @@
+"""
+Columnar export of trades, position history and stored candles for offline analytics.
+
+Each dataset is written as Parquet (or Arrow IPC / Feather) files in hive-style partitions,
+so pandas, polars, DuckDB and pyarrow.dataset read the whole tree as one table:
+
+    <export dir>/trades/network=mainnet/coin=BTC/date=2024-05-01/data.parquet
+    <export dir>/positions_history/network=mainnet/coin=BTC/date=2024-05-01/data.parquet
+    <export dir>/candles/network=mainnet/coin=BTC/interval=1h/date=2024-05-01/data.parquet
+
+``positions_history`` is the position after every fill (net size, average entry, cost basis,
+realized PnL), replayed from the trades table with position_replay.replay_fills.
+
+Exports are incremental. ``_manifest.json`` in the export directory records the row count
+and high-water mark (trades.id, candle open time) of every partition written; a run compares
+them with the current per-partition stats (read from the covering indexes) and writes only
+new or changed partitions. A late fill also rewrites the position history of every later
+day of its coin. Candle partitions are written once all their candles have closed.
+
+Memory stays bounded: partitions are streamed from sqlite in ``chunk_rows`` batches, each
+written as its own row group. Position history holds one coin's fills at a time (the replay
+needs the coin's whole history).
+
+Requires pyarrow (optional dependency).
+
+Usage:
+    exporter = ColumnarExporter("/data/exports")
+    exporter.export()                                    # All datasets, all networks
+    exporter.export(["trades"], network="mainnet")
+
+    python -m src.hyperliquid_wrapper.database_handlers.columnar_export --out /data/exports [--full]
+"""
+
+import json
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import quote
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Optional dependency
+    pa = None
+
+from . import database_manager
+from .candle_store import INTERVAL_MS
+from .database_manager import get_db_connection
+from .position_replay import replay_fills
+
+DATASETS = ("trades", "positions_history", "candles")
+FORMATS = {"parquet": "data.parquet", "arrow": "data.arrow"}
+CHUNK_ROWS = 50_000     # Rows per sqlite fetch and per row group
+DAY_MS = 24 * 60 * 60_000
+MANIFEST_NAME = "_manifest.json"
+
+PartitionKey = Tuple[Any, ...]      # (network, coin, day) or (network, coin, interval, day)
+PartitionStats = Tuple[int, int]    # (rows, high-water mark)
+
+
+def _schemas() -> Dict[str, "pa.Schema"]:
+    """File schemas; partition keys (network, coin, interval, date) live in the paths."""
+    timestamp = pa.timestamp("ms", tz="UTC")
+    return {
+        "trades": pa.schema([
+            ("id", pa.int64()), ("trade_id", pa.int64()), ("order_id", pa.int64()), ("side", pa.string()),
+            ("price", pa.float64()), ("size", pa.float64()), ("fee", pa.float64()), ("timestamp", timestamp),
+            ("closed_pnl", pa.float64()), ("hash", pa.string()), ("crossed", pa.bool_()),
+            ("start_position", pa.string()), ("dir", pa.string()), ("fee_token", pa.string()),
+            ("builder_fee", pa.float64()), ("received_at", pa.string())
+        ]),
+        "positions_history": pa.schema([
+            ("id", pa.int64()), ("timestamp", timestamp), ("side", pa.string()), ("price", pa.float64()),
+            ("size", pa.float64()), ("net_size", pa.float64()), ("average_entry_price", pa.float64()),
+            ("total_cost", pa.float64()), ("realized_pnl", pa.float64()), ("fee", pa.float64()),
+            ("exchange_closed_pnl", pa.float64())
+        ]),
+        "candles": pa.schema([
+            ("open_time", timestamp), ("close_time", timestamp), ("open", pa.float64()), ("high", pa.float64()),
+            ("low", pa.float64()), ("close", pa.float64()), ("volume", pa.float64()), ("trades", pa.int64())
+        ])
+    }
+
+
+TRADE_EXPORT_SQL = '''
+SELECT id, trade_id, order_id, side, price, size, fee, timestamp, closed_pnl, hash, crossed,
+       start_position, dir, fee_token, builder_fee, received_at
+FROM trades
+WHERE network = ? AND coin = ? AND timestamp >= ? AND timestamp < ?
+ORDER BY timestamp, id
+'''
+
+CANDLE_EXPORT_SQL = '''
+SELECT open_time, close_time, open, high, low, close, volume, trades
+FROM candles
+WHERE network = ? AND coin = ? AND interval = ? AND open_time >= ? AND open_time < ?
+ORDER BY open_time
+'''
+
+
+def _default_export_dir() -> str:
+    return os.path.join(os.path.dirname(database_manager.DATABASE_NAME), "exports")
+
+
+def _day(day_number: int) -> str:
+    return datetime.fromtimestamp(day_number * DAY_MS / 1000, tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+def _column_array(values: Sequence[Any], arrow_type: "pa.DataType") -> "pa.Array":
+    """sqlite stores BOOLEAN columns as 0/1 integers, which pyarrow will not convert directly."""
+    if arrow_type == pa.bool_():
+        return pa.array(values, type=pa.int8()).cast(arrow_type)
+    return pa.array(values, type=arrow_type)
+
+
+def _network_filter(network: Optional[str]) -> Tuple[str, tuple]:
+    return ("WHERE network = ?", (network,)) if network else ("", ())
+
+
+class ColumnarExporter:
+    """Writes partitioned Parquet/Arrow snapshots of the trading database, incrementally."""
+
+    def __init__(self, export_dir: Optional[str] = None, file_format: str = "parquet", chunk_rows: int = CHUNK_ROWS,
+                 compression: str = "zstd"):
+        """
+        Args:
+            export_dir: Root of the partition tree (defaults to exports/ next to the database)
+            file_format: 'parquet' or 'arrow' (Arrow IPC / Feather v2)
+            chunk_rows: Rows fetched from sqlite and written per row group / record batch
+            compression: Codec for both formats ('zstd', 'lz4', 'snappy' (parquet only) or 'none')
+        """
+        if pa is None:
+            raise RuntimeError("Columnar export requires pyarrow (pip install pyarrow)")
+        if file_format not in FORMATS:
+            raise ValueError(f"Unsupported export format: {file_format}. Use one of {', '.join(FORMATS)}")
+        self.export_dir = export_dir or _default_export_dir()
+        self.file_format = file_format
+        self.chunk_rows = chunk_rows
+        self.compression = compression
+        self.schemas = _schemas()
+        self._manifest_path = os.path.join(self.export_dir, MANIFEST_NAME)
+        self._manifest: Dict[str, Dict[str, Any]] = self._load_manifest()
+
+    # ------------------------------------------------------------------
+    # Manifest and files
+    # ------------------------------------------------------------------
+
+    def _load_manifest(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self._manifest_path, "r") as f:
+                return json.load(f).get("partitions", {})
+        except FileNotFoundError:
+            return {}
+
+    def _save_manifest(self):
+        os.makedirs(self.export_dir, exist_ok=True)
+        tmp_path = self._manifest_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": 1, "partitions": self._manifest}, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self._manifest_path)
+
+    def _partition_path(self, dataset: str, key: PartitionKey) -> str:
+        """Relative hive path; coin names such as 'PURR/USDC' or '@107' are URI-encoded."""
+        names = ("network", "coin", "interval") if dataset == "candles" else ("network", "coin")
+        parts = [f"{name}={quote(str(value), safe='')}" for name, value in zip(names, key[:-1])]
+        return "/".join([dataset, *parts, f"date={_day(key[-1])}"])
+
+    def _is_current(self, partition: str, stats: PartitionStats) -> bool:
+        entry = self._manifest.get(partition)
+        return (entry is not None and entry.get("format") == self.file_format
+                and (entry["rows"], entry["high_water"]) == tuple(stats)
+                and os.path.exists(os.path.join(self.export_dir, partition, FORMATS[self.file_format])))
+
+    def _write_partition(self, dataset: str, partition: str, batches: Iterator["pa.RecordBatch"],
+                         stats: PartitionStats) -> int:
+        """Stream record batches into one partition file (written to a temp file, then renamed)."""
+        directory = os.path.join(self.export_dir, partition)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, FORMATS[self.file_format])
+        tmp_path = path + ".tmp"
+        schema = self.schemas[dataset]
+        compression = None if self.compression == "none" else self.compression
+
+        rows = 0
+        try:
+            if self.file_format == "parquet":
+                with pq.ParquetWriter(tmp_path, schema, compression=compression) as writer:
+                    for batch in batches:
+                        writer.write_batch(batch)
+                        rows += batch.num_rows
+            else:
+                options = pa.ipc.IpcWriteOptions(compression=compression)
+                with pa.OSFile(tmp_path, "wb") as sink, pa.ipc.new_file(sink, schema, options=options) as writer:
+                    for batch in batches:
+                        writer.write_batch(batch)
+                        rows += batch.num_rows
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        self._manifest[partition] = {
+            "rows": stats[0], "high_water": stats[1], "format": self.file_format,
+            "exported_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        }
+        return rows
+
+    def _batches(self, dataset: str, sql: str, params: tuple) -> Iterator["pa.RecordBatch"]:
+        """Run a query and yield its rows as record batches of at most chunk_rows."""
+        schema = self.schemas[dataset]
+        conn = get_db_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(self.chunk_rows)
+                if not rows:
+                    break
+                columns = list(zip(*rows))
+                yield pa.RecordBatch.from_arrays(
+                    [_column_array(column, field.type) for column, field in zip(columns, schema)], schema=schema)
+        finally:
+            conn.close()
+
+    # ------------------------------------------------------------------
+    # Partition stats (covering index scans)
+    # ------------------------------------------------------------------
+
+    def _trade_partitions(self, network: Optional[str]) -> Dict[PartitionKey, PartitionStats]:
+        where, params = _network_filter(network)
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute(f'''
+        SELECT network, coin, timestamp / {DAY_MS} AS day, COUNT(*), MAX(id)
+        FROM trades {where}
+        GROUP BY network, coin, day
+        ''', params)
+        partitions = {(row[0], row[1], row[2]): (row[3], row[4]) for row in cursor.fetchall()}
+        conn.close()
+        return partitions
+
+    def _candle_partitions(self, network: Optional[str], now_ms: int) -> Dict[PartitionKey, PartitionStats]:
+        """Per-day candle partitions whose candles have all closed."""
+        where, params = _network_filter(network)
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'candles'")
+        if cursor.fetchone() is None:  # The candle store was never used
+            conn.close()
+            return {}
+        cursor.execute(f'''
+        SELECT network, coin, interval, open_time / {DAY_MS} AS day, COUNT(*), MAX(open_time)
+        FROM candles {where}
+        GROUP BY network, coin, interval, day
+        ''', params)
+        partitions = {
+            (row[0], row[1], row[2], row[3]): (row[4], row[5]) for row in cursor.fetchall()
+            if row[5] + INTERVAL_MS.get(row[2], DAY_MS) <= now_ms
+        }
+        conn.close()
+        return partitions
+
+    # ------------------------------------------------------------------
+    # Datasets
+    # ------------------------------------------------------------------
+
+    def export_trades(self, network: Optional[str] = None, full: bool = False,
+                      partitions: Optional[Dict[PartitionKey, PartitionStats]] = None) -> Dict[str, int]:
+        """Write trades partitions that are new or have grown since the last export."""
+        partitions = partitions if partitions is not None else self._trade_partitions(network)
+        written = rows = 0
+        for key, stats in sorted(partitions.items()):
+            partition = self._partition_path("trades", key)
+            if not full and self._is_current(partition, stats):
+                continue
+            net, coin, day = key
+            rows += self._write_partition("trades", partition, self._batches(
+                "trades", TRADE_EXPORT_SQL, (net, coin, day * DAY_MS, (day + 1) * DAY_MS)), stats)
+            written += 1
+        return {"partitions": written, "rows": rows, "skipped": len(partitions) - written}
+
+    def export_positions_history(self, network: Optional[str] = None, full: bool = False,
+                                 partitions: Optional[Dict[PartitionKey, PartitionStats]] = None) -> Dict[str, int]:
+        """
+        Write the position after every fill, per coin and day. A coin is replayed only if one of
+        its trades partitions changed; its days from the first changed one onwards are rewritten.
+        """
+        partitions = partitions if partitions is not None else self._trade_partitions(network)
+        days_by_coin: Dict[Tuple[str, str], List[int]] = {}
+        for net, coin, day in sorted(partitions):
+            days_by_coin.setdefault((net, coin), []).append(day)
+
+        written = rows = 0
+        for (net, coin), days in days_by_coin.items():
+            stale = [day for day in days if full or not self._is_current(
+                self._partition_path("positions_history", (net, coin, day)), partitions[(net, coin, day)])]
+            if not stale:
+                continue
+            first_stale = stale[0]
+
+            history = self._replay_coin(net, coin)
+            day_numbers = history["timestamp"] // DAY_MS
+            for day in days:
+                if day < first_stale:
+                    continue
+                lo, hi = np.searchsorted(day_numbers, [day, day + 1])
+                columns = [history[field.name][lo:hi] for field in self.schemas["positions_history"]]
+                rows += self._write_partition(
+                    "positions_history", self._partition_path("positions_history", (net, coin, day)),
+                    self._array_batches("positions_history", columns), partitions[(net, coin, day)])
+                written += 1
+        return {"partitions": written, "rows": rows, "skipped": len(partitions) - written}
+
+    def _replay_coin(self, network: str, coin: str) -> Dict[str, np.ndarray]:
+        """One coin's fills in replay order with the position after each fill."""
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+        SELECT id, timestamp, side, price, size, COALESCE(fee, 0), COALESCE(closed_pnl, 0)
+        FROM trades
+        WHERE network = ? AND coin = ?
+        ORDER BY timestamp, trade_id
+        ''', (network, coin))
+        ids, timestamps, sides, prices, sizes, fees, closed_pnls = zip(*cursor.fetchall())
+        conn.close()
+
+        history = {
+            "id": np.array(ids, dtype=np.int64),
+            "timestamp": np.array(timestamps, dtype=np.int64),
+            "side": np.array(sides, dtype="<U1"),
+            "price": np.array(prices, dtype=np.float64),
+            "size": np.array(sizes, dtype=np.float64),
+            "fee": np.array(fees, dtype=np.float64),
+            "exchange_closed_pnl": np.array(closed_pnls, dtype=np.float64)
+        }
+        history.update(replay_fills(history["side"], history["price"], history["size"]))
+        return history
+
+    def _array_batches(self, dataset: str, columns: Sequence[np.ndarray]) -> Iterator["pa.RecordBatch"]:
+        schema = self.schemas[dataset]
+        for start in range(0, len(columns[0]), self.chunk_rows):
+            yield pa.RecordBatch.from_arrays(
+                [pa.array(column[start:start + self.chunk_rows], type=field.type) for column, field in zip(columns, schema)],
+                schema=schema)
+
+    def export_candles(self, network: Optional[str] = None, full: bool = False,
+                       now_ms: Optional[int] = None) -> Dict[str, int]:
+        """Write stored candle partitions (per interval and day) once all their candles have closed."""
+        now_ms = now_ms if now_ms is not None else int(datetime.now(timezone.utc).timestamp() * 1000)
+        partitions = self._candle_partitions(network, now_ms)
+        written = rows = 0
+        for key, stats in sorted(partitions.items()):
+            partition = self._partition_path("candles", key)
+            if not full and self._is_current(partition, stats):
+                continue
+            net, coin, interval, day = key
+            rows += self._write_partition("candles", partition, self._batches(
+                "candles", CANDLE_EXPORT_SQL, (net, coin, interval, day * DAY_MS, (day + 1) * DAY_MS)), stats)
+            written += 1
+        return {"partitions": written, "rows": rows, "skipped": len(partitions) - written}
+
+    def export(self, datasets: Sequence[str] = DATASETS, network: Optional[str] = None,
+               full: bool = False) -> Dict[str, Dict[str, int]]:
+        """
+        Export the given datasets and save the manifest.
+
+        Args:
+            datasets: Any of 'trades', 'positions_history', 'candles'
+            network: Only this network (default: every network in the database)
+            full: Rewrite every partition instead of only new or changed ones
+
+        Returns:
+            dict: dataset -> {"partitions": written, "rows": written, "skipped": unchanged}
+        """
+        unknown = set(datasets) - set(DATASETS)
+        if unknown:
+            raise ValueError(f"Unknown export datasets: {', '.join(sorted(unknown))}")
+
+        results = {}
+        trade_partitions = None
+        try:
+            for dataset in datasets:
+                if dataset == "candles":
+                    results[dataset] = self.export_candles(network, full)
+                    continue
+                if trade_partitions is None:
+                    trade_partitions = self._trade_partitions(network)
+                if dataset == "trades":
+                    results[dataset] = self.export_trades(network, full, trade_partitions)
+                else:
+                    results[dataset] = self.export_positions_history(network, full, trade_partitions)
+        finally:
+            self._save_manifest()  # Keep what was written even if a later partition failed
+
+        for dataset, result in results.items():
+            print(f"[ColumnarExport] {dataset}: wrote {result['partitions']} partitions ({result['rows']} rows), "
+                  f"{result['skipped']} unchanged")
+        return results
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export trades, position history and candles to partitioned Parquet/Arrow")
+    parser.add_argument("--out", default=None, help="Export directory (default: exports/ next to the database)")
+    parser.add_argument("--datasets", nargs="+", choices=DATASETS, default=list(DATASETS))
+    parser.add_argument("--network", choices=["mainnet", "testnet"], default=None, help="Default: all networks")
+    parser.add_argument("--format", choices=list(FORMATS), default="parquet")
+    parser.add_argument("--compression", default="zstd")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--full", action="store_true", help="Rewrite every partition")
+    args = parser.parse_args()
+
+    exporter = ColumnarExporter(args.out, file_format=args.format, chunk_rows=args.chunk_rows, compression=args.compression)
+    exporter.export(args.datasets, network=args.network, full=args.full)
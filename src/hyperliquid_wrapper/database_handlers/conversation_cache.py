@@ -0,0 +1,190 @@
+"""
+In-memory LRU cache of recent conversation messages per session.
+
+Each cached session holds a window of its last ``window`` messages (oldest first), in the same
+shape get_conversation_history returns. Committed writes update cached windows in place:
+appends push onto the window, clearing a session drops it. Reads of up to ``window`` messages
+are served from memory; only a miss (or a larger limit) reads sqlite, and the loaded window is
+then cached. Sessions are evicted least recently used first once the estimated size of all
+cached messages exceeds ``max_bytes``.
+
+A load races with writes that commit while its query runs, so loads take a token before
+querying and fill() discards the result if the session changed after that token. A load that
+starts after a commit but before that write's append() already holds the new row, so append()
+skips messages whose conversations.id is already in the window.
+
+Usage:
+    cache = get_conversation_cache()
+    token = cache.load_token()
+    messages = cache.get(session_id, limit)
+    if messages is None:
+        messages = load_from_sqlite(session_id, cache.window)
+        cache.fill(session_id, messages, token)
+    cache.append(session_id, message)      # After the insert has committed
+    cache.invalidate(session_id)           # After the session's rows were deleted
+"""
+
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Optional
+
+from . import database_manager
+
+DEFAULT_WINDOW = 50                    # Matches get_conversation_history's default limit
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024   # Estimated memory for all cached windows
+MESSAGE_OVERHEAD_BYTES = 256           # Dict, keys and timestamp of one cached message
+MAX_TRACKED_MUTATIONS = 10000          # Sessions whose last write sequence is remembered
+
+
+def _message_size(message: Dict[str, Any]) -> int:
+    tool_calls = message.get("tool_calls")
+    return len(message.get("content") or "") + (len(str(tool_calls)) if tool_calls else 0) + MESSAGE_OVERHEAD_BYTES
+
+
+class _SessionWindow:
+    __slots__ = ("messages", "size")
+
+    def __init__(self, window: int):
+        self.messages: Deque[Dict[str, Any]] = deque(maxlen=window)
+        self.size = 0
+
+    def contains(self, message_id: Optional[int]) -> bool:
+        return message_id is not None and any(message.get("id") == message_id for message in self.messages)
+
+    def push(self, message: Dict[str, Any]) -> int:
+        """Append a message; returns the change in estimated size."""
+        before = self.size
+        if len(self.messages) == self.messages.maxlen:
+            self.size -= _message_size(self.messages[0])
+        self.messages.append(message)
+        self.size += _message_size(message)
+        return self.size - before
+
+
+class ConversationCache:
+    """LRU of per-session message windows, bounded by estimated memory."""
+
+    def __init__(self, window: int = DEFAULT_WINDOW, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Args:
+            window: Most recent messages kept per session
+            max_bytes: Estimated size of all cached messages before sessions are evicted
+        """
+        self.window = window
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._sessions: "OrderedDict[str, _SessionWindow]" = OrderedDict()
+        self._bytes = 0
+        self._sequence = 0
+        self._mutated_at: "OrderedDict[str, int]" = OrderedDict()  # session_id -> sequence of last write
+        self._forgotten_before = 0  # Writes older than this may be missing from _mutated_at
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def load_token(self) -> int:
+        """Take before querying sqlite for a miss; pass to fill()."""
+        with self._lock:
+            return self._sequence
+
+    def get(self, session_id: str, limit: int = DEFAULT_WINDOW) -> Optional[List[Dict[str, Any]]]:
+        """The last `limit` messages of a cached session (oldest first), or None on a miss."""
+        with self._lock:
+            session = self._sessions.get(session_id) if limit <= self.window else None
+            if session is None:
+                self.misses += 1
+                return None
+            self._sessions.move_to_end(session_id)
+            self.hits += 1
+            messages = list(session.messages)
+        return [dict(message) for message in messages[-limit:]] if limit > 0 else []
+
+    def fill(self, session_id: str, messages: List[Dict[str, Any]], token: int):
+        """
+        Cache a session loaded from sqlite with a limit of at least ``window`` (oldest first).
+        Ignored if the session was written after `token` was taken.
+        """
+        with self._lock:
+            if token < self._forgotten_before or self._mutated_at.get(session_id, -1) > token:
+                return
+            session = _SessionWindow(self.window)
+            for message in messages[-self.window:]:
+                session.push(dict(message))
+            previous = self._sessions.pop(session_id, None)
+            if previous is not None:
+                self._bytes -= previous.size
+            self._sessions[session_id] = session
+            self._bytes += session.size
+            self._evict()
+
+    def append(self, session_id: str, message: Dict[str, Any]):
+        """
+        Record a committed message. Uncached sessions stay uncached (the next read loads them),
+        and a message a fill already loaded is not added twice.
+        """
+        with self._lock:
+            self._record_mutation(session_id)
+            session = self._sessions.get(session_id)
+            if session is None or session.contains(message.get("id")):
+                return
+            self._bytes += session.push(dict(message))
+            self._sessions.move_to_end(session_id)
+            self._evict()
+
+    def invalidate(self, session_id: str):
+        """Drop a session after its rows were deleted or rewritten."""
+        with self._lock:
+            self._record_mutation(session_id)
+            session = self._sessions.pop(session_id, None)
+            if session is not None:
+                self._bytes -= session.size
+
+    def clear(self):
+        """Drop every cached session (e.g. after bulk deletes)."""
+        with self._lock:
+            self._sequence += 1
+            self._forgotten_before = self._sequence
+            self._mutated_at.clear()
+            self._sessions.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "estimated_bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
+
+    def _record_mutation(self, session_id: str):
+        self._sequence += 1
+        self._mutated_at[session_id] = self._sequence
+        self._mutated_at.move_to_end(session_id)
+        while len(self._mutated_at) > MAX_TRACKED_MUTATIONS:
+            _, sequence = self._mutated_at.popitem(last=False)
+            self._forgotten_before = max(self._forgotten_before, sequence + 1)
+
+    def _evict(self):
+        while self._bytes > self.max_bytes and len(self._sessions) > 1:
+            _, session = self._sessions.popitem(last=False)
+            self._bytes -= session.size
+            self.evictions += 1
+
+
+_caches: Dict[str, ConversationCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_conversation_cache() -> ConversationCache:
+    """Returns the process-wide conversation cache for the current database file, creating it on first use."""
+    path = database_manager.DATABASE_NAME
+    cache = _caches.get(path)
+    if cache is None:
+        with _caches_lock:
+            cache = _caches.get(path)
+            if cache is None:
+                cache = _caches[path] = ConversationCache()
+    return cache
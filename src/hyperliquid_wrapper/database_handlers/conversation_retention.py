@@ -0,0 +1,464 @@
+"""
+Retention, archival and compaction for the conversations table.
+
+The hot ``conversations`` table (and its idx_session_timestamp index) only keeps recent
+sessions. A retention pass:
+
+    - archives whole sessions whose last activity is older than ``retention_days``
+    - archives the oldest messages of any session beyond ``max_messages_per_session``
+    - runs PRAGMA incremental_vacuum to hand freed pages back to the filesystem
+
+Archived messages are appended to a gzip JSONL segment per UTC day under
+``<database dir>/archive/conversations/`` and recorded per session in the
+``conversation_archive`` table. A segment is written and fsynced before the rows are deleted,
+so a crash can at worst leave messages both archived and live (rehydration skips ids that are
+already present). Rehydrating a session reads back its segments and re-inserts the messages
+with their original ids; get_conversation_history does this on demand for archived sessions.
+
+The background loop only runs a pass while the DatabaseWriter has been idle for a while, and
+each pass works in bounded batches so it never holds the write lock for long. Every write
+(archive batches, rehydrations, vacuum steps) is a command on the DatabaseWriter.
+
+Usage:
+    retention = get_conversation_retention()
+    retention.run_once()                       # Archive, cap and vacuum now
+    retention.rehydrate_session(session_id)    # Bring an archived session back
+    retention.start()                          # Periodic passes while idle
+
+    python -m src.hyperliquid_wrapper.database_handlers.conversation_retention [--rehydrate SESSION]
+"""
+
+import gzip
+import json
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from . import database_manager
+from .conversation_cache import DEFAULT_WINDOW, get_conversation_cache
+from .database_manager import SQLITE_MAX_PARAMS, get_db_connection
+from .db_writer import WriteCommand, get_db_writer
+
+RETENTION_DAYS = 30                # Sessions idle for longer are archived
+MAX_MESSAGES_PER_SESSION = 2000    # Older messages beyond this are archived
+MIN_MESSAGES_PER_SESSION = DEFAULT_WINDOW  # Caps below the history read window would be undone by every read
+BATCH_MESSAGES = 5000              # Messages archived per transaction
+VACUUM_PAGES = 2000                # Pages freed per incremental_vacuum step
+RETENTION_INTERVAL = 15 * 60       # Seconds between background passes
+IDLE_SECONDS = 30                  # Writer idle time required before a background pass
+
+ARCHIVE_COLUMNS = ("id", "session_id", "role", "content", "tool_calls", "timestamp")
+
+
+def _archive_dir() -> str:
+    return os.path.join(os.path.dirname(database_manager.DATABASE_NAME), "archive", "conversations")
+
+
+def _default_is_idle(idle_seconds: float) -> bool:
+    """True when the process-wide DatabaseWriter has not committed for `idle_seconds`."""
+    from . import db_writer
+
+    writer = db_writer._writer
+    return writer is None or writer.idle_for() >= idle_seconds
+
+
+@dataclass
+class ArchiveMessages(WriteCommand):
+    """Index messages written to an archive segment and delete them. Result: messages archived."""
+    segment: str
+    messages: List[Any]  # conversations rows (ARCHIVE_COLUMNS), as written to the segment
+
+    @property
+    def rows(self) -> int:
+        return max(len(self.messages), 1)
+
+    def apply(self, cursor: sqlite3.Cursor) -> int:
+        per_session: Dict[str, List[Any]] = {}
+        for row in self.messages:
+            per_session.setdefault(row["session_id"], []).append(row)
+        ids = [row["id"] for row in self.messages]
+
+        # Index only messages that are still live: a session cleared after its rows were read
+        # must not come back through the archive
+        live: Dict[str, int] = {}
+        for start in range(0, len(ids), SQLITE_MAX_PARAMS):
+            chunk = ids[start:start + SQLITE_MAX_PARAMS]
+            cursor.execute(f'''
+            SELECT session_id, COUNT(*) AS messages FROM conversations
+            WHERE id IN ({','.join('?' * len(chunk))})
+            GROUP BY session_id
+            ''', chunk)
+            for row in cursor.fetchall():
+                live[row["session_id"]] = live.get(row["session_id"], 0) + row["messages"]
+        index_rows = [(session_id, self.segment, messages, min(row["timestamp"] for row in per_session[session_id]),
+                       max(row["timestamp"] for row in per_session[session_id]))
+                      for session_id, messages in live.items()]
+        cursor.executemany('''
+        INSERT INTO conversation_archive (session_id, segment, message_count, first_activity, last_activity)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(session_id, segment) DO UPDATE SET
+            message_count = message_count + excluded.message_count,
+            first_activity = MIN(first_activity, excluded.first_activity),
+            last_activity = MAX(last_activity, excluded.last_activity),
+            archived_at = CURRENT_TIMESTAMP
+        ''', index_rows)
+        for start in range(0, len(ids), SQLITE_MAX_PARAMS):
+            chunk = ids[start:start + SQLITE_MAX_PARAMS]
+            cursor.execute(f"DELETE FROM conversations WHERE id IN ({','.join('?' * len(chunk))})", chunk)
+        return len(self.messages)
+
+    def after_commit(self):
+        cache = get_conversation_cache()
+        for session_id in {row["session_id"] for row in self.messages}:
+            cache.invalidate(session_id)
+
+
+@dataclass
+class RestoreMessages(WriteCommand):
+    """Re-insert a session's archived messages and drop the index rows of the segments read. Result: messages restored."""
+    session_id: str
+    messages: List[Dict[str, Any]]  # Archived messages in id order
+    segments: List[str]             # Segments the messages were read from
+
+    @property
+    def rows(self) -> int:
+        return max(len(self.messages), 1)
+
+    def apply(self, cursor: sqlite3.Cursor) -> int:
+        cursor.executemany('''
+        INSERT OR IGNORE INTO conversations (id, session_id, role, content, tool_calls, timestamp)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ''', [tuple(message[column] for column in ARCHIVE_COLUMNS) for message in self.messages])
+        restored = cursor.rowcount
+        cursor.executemany("DELETE FROM conversation_archive WHERE session_id = ? AND segment = ?",
+                           [(self.session_id, segment) for segment in self.segments])
+        return restored
+
+    def after_commit(self):
+        get_conversation_cache().invalidate(self.session_id)
+
+
+@dataclass
+class VacuumStep(WriteCommand):
+    """Release up to `pages` free pages (auto_vacuum=INCREMENTAL). Result: pages released."""
+    pages: int
+
+    def apply(self, cursor: sqlite3.Cursor) -> int:
+        free = cursor.execute("PRAGMA freelist_count").fetchone()[0]
+        if free:
+            cursor.execute(f"PRAGMA incremental_vacuum({self.pages})").fetchall()
+        return min(free, self.pages)
+
+
+class ConversationRetention:
+    """Moves old conversation messages to compressed archive segments and compacts the database."""
+
+    def __init__(self, retention_days: float = RETENTION_DAYS, max_messages_per_session: int = MAX_MESSAGES_PER_SESSION,
+                 batch_messages: int = BATCH_MESSAGES, vacuum_pages: int = VACUUM_PAGES,
+                 archive_dir: Optional[str] = None):
+        """
+        Args:
+            retention_days: Archive sessions with no activity for this many days
+            max_messages_per_session: Keep at most this many messages of a session in sqlite (at least
+                                      MIN_MESSAGES_PER_SESSION, so default-size history reads are
+                                      served from live rows and never rehydrate a capped session)
+            batch_messages: Messages archived per transaction
+            vacuum_pages: Pages freed per incremental vacuum step
+            archive_dir: Segment directory (defaults to archive/conversations next to the database)
+        """
+        self.retention_days = retention_days
+        self.max_messages_per_session = max_messages_per_session
+        self.batch_messages = batch_messages
+        self.vacuum_pages = vacuum_pages
+        self.archive_dir = archive_dir or _archive_dir()
+        self._lock = threading.Lock()       # Serializes archive batches and rehydrations (short)
+        self._pass_lock = threading.Lock()  # One retention pass at a time
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def max_messages_per_session(self) -> int:
+        return self._max_messages_per_session
+
+    @max_messages_per_session.setter
+    def max_messages_per_session(self, value: int):
+        if value < MIN_MESSAGES_PER_SESSION:
+            raise ValueError(f"max_messages_per_session must be at least {MIN_MESSAGES_PER_SESSION} (the history "
+                             f"read window), got {value}")
+        self._max_messages_per_session = value
+
+    # Archival
+
+    def _segment_name(self) -> str:
+        day = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+        return os.path.join(day[:4], f"conversations-{day}.jsonl.gz")
+
+    def _write_segment(self, rows: List[Any]) -> str:
+        """Append rows to today's segment as a new gzip member and fsync it."""
+        segment = self._segment_name()
+        path = os.path.join(self.archive_dir, segment)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "ab") as raw:
+            with gzip.GzipFile(fileobj=raw, mode="wb") as archive:
+                for row in rows:
+                    line = json.dumps({column: row[column] for column in ARCHIVE_COLUMNS}, separators=(",", ":"))
+                    archive.write(line.encode("utf-8") + b"\n")
+            raw.flush()
+            os.fsync(raw.fileno())
+        return segment
+
+    def _archive_rows(self, rows: List[Any]) -> int:
+        """Archive the given conversations rows, then delete them in one transaction."""
+        if not rows:
+            return 0
+        with self._lock:
+            return self._archive_rows_locked(rows)
+
+    def _archive_rows_locked(self, rows: List[Any]) -> int:
+        segment = self._write_segment(rows)
+        try:
+            return get_db_writer().submit(ArchiveMessages(segment, rows)).result()
+        except Exception as e:
+            print(f"[ConversationRetention] Error archiving {len(rows)} messages: {e}")
+            raise
+
+    def archive_idle_sessions(self) -> Dict[str, int]:
+        """Archive every session whose last activity is older than retention_days."""
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=self.retention_days)).strftime("%Y-%m-%d %H:%M:%S")
+        sessions = messages = 0
+        while not self._stop.is_set():
+            conn = get_db_connection()
+            cursor = conn.cursor()
+            cursor.execute('''
+            SELECT session_id, message_count FROM sessions
+            WHERE last_activity < ? AND message_count > 0
+            ORDER BY last_activity
+            LIMIT 500
+            ''', (cutoff,))
+            batch, batch_messages = [], 0
+            for row in cursor.fetchall():
+                if batch and batch_messages + row["message_count"] > self.batch_messages:
+                    break
+                batch.append(row["session_id"])
+                batch_messages += row["message_count"]
+            rows = []
+            if batch:
+                cursor.execute(f'''
+                SELECT {', '.join(ARCHIVE_COLUMNS)} FROM conversations
+                WHERE session_id IN ({','.join('?' * len(batch))}) AND timestamp < ?
+                ORDER BY session_id, timestamp, id
+                ''', (*batch, cutoff))
+                rows = cursor.fetchall()
+            conn.close()
+            if not rows:
+                break
+            messages += self._archive_rows(rows)
+            sessions += len(batch)
+        return {"sessions": sessions, "messages": messages}
+
+    def enforce_session_caps(self) -> Dict[str, int]:
+        """Archive the oldest messages of sessions holding more than max_messages_per_session."""
+        sessions = messages = 0
+        conn = get_db_connection()
+        over_cap = conn.execute("SELECT session_id, message_count FROM sessions WHERE message_count > ?",
+                                (self.max_messages_per_session,)).fetchall()
+        conn.close()
+        for row in over_cap:
+            excess = row["message_count"] - self.max_messages_per_session
+            while excess > 0 and not self._stop.is_set():
+                conn = get_db_connection()
+                cursor = conn.cursor()
+                cursor.execute(f'''
+                SELECT {', '.join(ARCHIVE_COLUMNS)} FROM conversations
+                WHERE session_id = ?
+                ORDER BY timestamp, id
+                LIMIT ?
+                ''', (row["session_id"], min(excess, self.batch_messages)))
+                rows = cursor.fetchall()
+                conn.close()
+                if not rows:
+                    break
+                excess -= self._archive_rows(rows)
+                messages += len(rows)
+            sessions += 1
+        return {"sessions": sessions, "messages": messages}
+
+    # Compaction
+
+    def incremental_vacuum(self, max_steps: int = 50) -> int:
+        """
+        Release free pages in steps of vacuum_pages (requires auto_vacuum=INCREMENTAL).
+
+        Returns:
+            int: Pages released
+        """
+        conn = get_db_connection()
+        auto_vacuum = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+        conn.close()
+        if auto_vacuum != 2:
+            return 0
+        released = 0
+        for _ in range(max_steps):
+            if self._stop.is_set():
+                break
+            step = get_db_writer().submit(VacuumStep(self.vacuum_pages)).result()
+            if step == 0:
+                break
+            released += step
+        return released
+
+    def enable_incremental_vacuum(self):
+        """
+        Switch an existing database to auto_vacuum=INCREMENTAL. Runs a full VACUUM once; VACUUM
+        cannot run inside the writer's transactions, so this is an offline, one-off step.
+        """
+        conn = get_db_connection()
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+            return
+        print("[ConversationRetention] Converting database to incremental auto-vacuum (full VACUUM)...")
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("VACUUM")
+        print("[ConversationRetention] Incremental auto-vacuum enabled.")
+
+    # Rehydration
+
+    def is_archived(self, session_id: str) -> bool:
+        conn = get_db_connection()
+        row = conn.execute("SELECT 1 FROM conversation_archive WHERE session_id = ? LIMIT 1", (session_id,)).fetchone()
+        conn.close()
+        return row is not None
+
+    def rehydrate_session(self, session_id: str) -> int:
+        """
+        Move an archived session's messages back into the conversations table.
+
+        Only the index rows of segments that were read back are removed; a missing segment
+        keeps its index row (so it can be restored once the file is back) and is reported.
+
+        Returns:
+            int: Messages restored
+        """
+        with self._lock:
+            conn = get_db_connection()
+            cursor = conn.cursor()
+            cursor.execute("SELECT segment FROM conversation_archive WHERE session_id = ?", (session_id,))
+            segments = [row["segment"] for row in cursor.fetchall()]
+            conn.close()
+            if not segments:
+                return 0
+
+            needle = json.dumps({"session_id": session_id}, separators=(",", ":"))[1:-1].encode("utf-8")
+            messages = {}
+            read_segments, missing = [], []
+            for segment in segments:
+                path = os.path.join(self.archive_dir, segment)
+                if not os.path.exists(path):
+                    missing.append(path)
+                    continue
+                read_segments.append(segment)
+                with gzip.open(path, "rb") as archive:
+                    for line in archive:
+                        if needle in line:
+                            message = json.loads(line)
+                            if message["session_id"] == session_id:
+                                messages[message["id"]] = message
+
+            try:
+                restored = get_db_writer().submit(RestoreMessages(
+                    session_id, [message for _, message in sorted(messages.items())], read_segments)).result()
+            except Exception as e:
+                print(f"[ConversationRetention] Error rehydrating session {session_id[:8]}...: {e}")
+                raise
+
+        print(f"[ConversationRetention] Rehydrated {restored} messages of session {session_id[:8]}...")
+        if missing:
+            print(f"[ConversationRetention] {len(missing)} archive segments of session {session_id[:8]}... are missing "
+                  f"and stay indexed: {', '.join(missing)}")
+        return restored
+
+    # Scheduling
+
+    def run_once(self) -> Dict[str, Any]:
+        """One full pass: archive idle sessions, enforce per-session caps, then vacuum."""
+        with self._pass_lock:
+            archived = self.archive_idle_sessions()
+            capped = self.enforce_session_caps()
+            released = self.incremental_vacuum()
+        if archived["messages"] or capped["messages"] or released:
+            print(f"[ConversationRetention] Archived {archived['sessions']} idle sessions ({archived['messages']} messages), "
+                  f"trimmed {capped['sessions']} sessions ({capped['messages']} messages), released {released} pages.")
+        return {"archived": archived, "capped": capped, "released_pages": released}
+
+    def start(self, interval: float = RETENTION_INTERVAL, idle_seconds: float = IDLE_SECONDS,
+              is_idle: Optional[Callable[[], bool]] = None):
+        """
+        Run passes in the background every `interval` seconds, skipping while the database is busy.
+
+        Args:
+            interval: Seconds between passes
+            idle_seconds: Writer idle time required before a pass (used by the default is_idle)
+            is_idle: Returns True when a pass may run
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        idle = is_idle if is_idle is not None else (lambda: _default_is_idle(idle_seconds))
+        self._stop.clear()
+
+        def loop():
+            while not self._stop.wait(interval):
+                if not idle():
+                    continue
+                try:
+                    self.run_once()
+                except Exception as e:
+                    print(f"[ConversationRetention] Retention pass failed: {e}")
+
+        self._thread = threading.Thread(target=loop, name="ConversationRetention", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background passes (an in-flight batch finishes first)."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+
+
+_retention: Dict[str, ConversationRetention] = {}
+_retention_lock = threading.Lock()
+
+
+def get_conversation_retention() -> ConversationRetention:
+    """Returns the process-wide retention engine for the current database file, creating it on first use."""
+    path = database_manager.DATABASE_NAME
+    retention = _retention.get(path)
+    if retention is None:
+        with _retention_lock:
+            retention = _retention.get(path)
+            if retention is None:
+                retention = _retention[path] = ConversationRetention()
+    return retention
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Archive old conversations and compact the database")
+    parser.add_argument("--rehydrate", metavar="SESSION_ID", help="Restore an archived session instead of running a pass")
+    parser.add_argument("--retention-days", type=float, default=RETENTION_DAYS)
+    parser.add_argument("--max-messages", type=int, default=MAX_MESSAGES_PER_SESSION)
+    parser.add_argument("--enable-incremental-vacuum", action="store_true",
+                        help="Convert an existing database to incremental auto-vacuum first (full VACUUM)")
+    args = parser.parse_args()
+
+    database_manager.initialize_database()
+    retention = ConversationRetention(retention_days=args.retention_days, max_messages_per_session=args.max_messages)
+    if args.rehydrate:
+        retention.rehydrate_session(args.rehydrate)
+    else:
+        if args.enable_incremental_vacuum:
+            retention.enable_incremental_vacuum()
+        print(json.dumps(retention.run_once(), indent=2))
@@ -1,6 +1,8 @@
 import sqlite3
 import os
-from datetime import datetime
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
 
 # Import network context
 import sys
@@ -10,13 +12,92 @@ from src.network_context import get_current_network
 DATABASE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'database')
 DATABASE_NAME = os.path.join(DATABASE_DIR, 'trading_data.db')
 
+TRADE_INSERT_SQL = '''
+INSERT INTO trades (
+    trade_id, order_id, coin, side, price, size, fee, timestamp,
+    closed_pnl, hash, crossed, start_position, dir, fee_token, builder_fee, network
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+SQLITE_MAX_PARAMS = 900  # Stay under SQLite's default bound-parameter limit for IN (...) lookups
+
+# Columns query_trades can project (also the whitelist interpolated into its SELECT)
+TRADE_COLUMNS = (
+    "id", "trade_id", "order_id", "coin", "side", "price", "size", "fee", "timestamp", "closed_pnl",
+    "hash", "crossed", "start_position", "dir", "fee_token", "builder_fee", "network", "received_at"
+)
+TRADE_SIDES = {"b": "B", "buy": "B", "a": "A", "sell": "A"}
+DEFAULT_TRADE_PAGE_SIZE = 100
+MAX_TRADE_PAGE_SIZE = 1000
+
+# Applied once to every persistent connection. WAL lets readers run while a writer commits;
+# synchronous=NORMAL is durable across application crashes in WAL mode (only an OS crash can
+# lose the last commits) and saves an fsync per transaction.
+CONNECTION_PRAGMAS = (
+    "PRAGMA auto_vacuum=INCREMENTAL",  # Must precede WAL to apply to a new file; existing files need one VACUUM
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-16000",      # 16 MB page cache per connection
+    "PRAGMA mmap_size=268435456",    # Map up to 256 MB of the file for reads
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=5000",      # Wait up to 5s for a competing writer instead of failing
+)
+STATEMENT_CACHE_SIZE = 256  # Prepared statements kept per connection (sqlite3 default is 128)
+
+class PersistentConnection(sqlite3.Connection):
+    """
+    A thread's long-lived connection. close() only hands the connection back: any transaction a
+    caller left open is rolled back, but the connection (and its prepared statements) stays
+    open for the next call on this thread. close_all_connections() closes it for real.
+    """
+
+    closed = False
+
+    def close(self):
+        if not self.closed and self.in_transaction:
+            self.rollback()
+
+    def close_permanently(self):
+        self.closed = True
+        sqlite3.Connection.close(self)
+
+_local = threading.local()
+_all_connections = []  # Every persistent connection, so shutdown can close them from any thread
+_all_connections_lock = threading.Lock()
+
 def get_db_connection():
-    """Establishes a connection to the SQLite database."""
-    os.makedirs(DATABASE_DIR, exist_ok=True)
-    conn = sqlite3.connect(DATABASE_NAME)
+    """
+    Returns this thread's persistent connection to the SQLite database, opening it on first use.
+    Callers keep the usual connect/commit/close pattern; close() does not close the connection.
+    """
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    conn = connections.get(DATABASE_NAME)
+    if conn is None or conn.closed:
+        os.makedirs(DATABASE_DIR, exist_ok=True)
+        conn = sqlite3.connect(DATABASE_NAME, factory=PersistentConnection, check_same_thread=False,
+                               cached_statements=STATEMENT_CACHE_SIZE)
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        connections[DATABASE_NAME] = conn
+        with _all_connections_lock:
+            _all_connections.append(conn)
     conn.row_factory = sqlite3.Row # Access columns by name
     return conn
 
+def close_all_connections():
+    """Closes every persistent connection (all threads). Call on application shutdown."""
+    with _all_connections_lock:
+        connections = list(_all_connections)
+        _all_connections.clear()
+    for conn in connections:
+        try:
+            conn.close_permanently()
+        except sqlite3.Error as e:
+            print(f"[DBManager] Error closing connection: {e}")
+    # Threads that ask for a connection after this reopen one
+    print(f"[DBManager] Closed {len(connections)} database connections.")
+
 def initialize_database():
     """
     Initializes the database by creating necessary tables if they don't exist.
@@ -67,6 +148,16 @@ def initialize_database():
     ''')
     print("[DBManager] 'positions' table initialized or already exists.")
 
+    # Watermark of the positions checkpoint: trades up to last_trade_id are reflected in positions
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS position_checkpoints (
+        network TEXT PRIMARY KEY,
+        last_trade_id INTEGER NOT NULL DEFAULT 0,   -- Highest trades.id folded into positions
+        checkpointed_at TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+    print("[DBManager] 'position_checkpoints' table initialized or already exists.")
+
     # Create open_orders_tracking table with network column
     cursor.execute('''
     CREATE TABLE IF NOT EXISTS open_orders_tracking (
@@ -96,6 +187,20 @@ def initialize_database():
     )
     ''')
     print("[DBManager] 'conversations' table initialized or already exists.")
+
+    # Where archived conversation messages went: one row per session per archive segment file
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS conversation_archive (
+        session_id TEXT NOT NULL,
+        segment TEXT NOT NULL,                 -- Segment file, relative to the archive directory
+        message_count INTEGER NOT NULL DEFAULT 0,
+        first_activity DATETIME,
+        last_activity DATETIME,
+        archived_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (session_id, segment)
+    )
+    ''')
+    print("[DBManager] 'conversation_archive' table initialized or already exists.")
     
     # Create index for efficient session queries
     cursor.execute('''
@@ -103,12 +208,85 @@ def initialize_database():
     ON conversations(session_id, timestamp)
     ''')
     
+    # Per-session summary for get_all_sessions, kept current by triggers on conversations so every
+    # insert and delete path (including bulk deletes) updates it in the same transaction. A session
+    # whose messages were all archived keeps its row (message_count 0) while it is indexed in
+    # conversation_archive, so it stays listed and can be rehydrated
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS sessions (
+        session_id TEXT PRIMARY KEY,
+        message_count INTEGER NOT NULL DEFAULT 0,
+        first_activity DATETIME,
+        last_activity DATETIME
+    )
+    ''')
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_sessions_last_activity
+    ON sessions(last_activity)
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS trg_conversations_insert_session
+    AFTER INSERT ON conversations
+    BEGIN
+        INSERT INTO sessions (session_id, message_count, first_activity, last_activity)
+        VALUES (NEW.session_id, 1, NEW.timestamp, NEW.timestamp)
+        ON CONFLICT(session_id) DO UPDATE SET
+            message_count = message_count + 1,
+            first_activity = MIN(first_activity, excluded.first_activity),
+            last_activity = MAX(last_activity, excluded.last_activity);
+    END
+    ''')
+    cursor.execute("DROP TRIGGER IF EXISTS trg_conversations_delete_session")  # Replaces the pre-archive version
+    cursor.execute('''
+    CREATE TRIGGER trg_conversations_delete_session
+    AFTER DELETE ON conversations
+    BEGIN
+        UPDATE sessions SET
+            message_count = message_count - 1,
+            first_activity = (SELECT MIN(activity) FROM (
+                SELECT MIN(timestamp) AS activity FROM conversations WHERE session_id = OLD.session_id
+                UNION ALL
+                SELECT MIN(first_activity) FROM conversation_archive WHERE session_id = OLD.session_id)),
+            last_activity = (SELECT MAX(activity) FROM (
+                SELECT MAX(timestamp) AS activity FROM conversations WHERE session_id = OLD.session_id
+                UNION ALL
+                SELECT MAX(last_activity) FROM conversation_archive WHERE session_id = OLD.session_id))
+        WHERE session_id = OLD.session_id;
+        DELETE FROM sessions WHERE session_id = OLD.session_id AND message_count <= 0
+            AND NOT EXISTS (SELECT 1 FROM conversation_archive WHERE session_id = OLD.session_id);
+    END
+    ''')
+    # Backfill once for databases created before the summary table existed
+    cursor.execute('''
+    INSERT INTO sessions (session_id, message_count, first_activity, last_activity)
+    SELECT session_id, COUNT(*), MIN(timestamp), MAX(timestamp)
+    FROM conversations
+    WHERE NOT EXISTS (SELECT 1 FROM sessions)
+    GROUP BY session_id
+    ''')
+    if cursor.rowcount > 0:
+        print(f"[DBManager] Backfilled {cursor.rowcount} sessions into the 'sessions' summary table.")
+    # Sessions archived in full before archived sessions kept their summary row
+    cursor.execute('''
+    INSERT OR IGNORE INTO sessions (session_id, message_count, first_activity, last_activity)
+    SELECT session_id, 0, MIN(first_activity), MAX(last_activity)
+    FROM conversation_archive
+    GROUP BY session_id
+    ''')
+    print("[DBManager] 'sessions' table initialized or already exists.")
+    
     # Create indexes for network-based queries
     cursor.execute('''
     CREATE INDEX IF NOT EXISTS idx_trades_network_timestamp 
     ON trades(network, timestamp)
     ''')
     
+    # Coin-filtered trade queries page through (timestamp, id) within one coin
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_trades_network_coin_timestamp
+    ON trades(network, coin, timestamp)
+    ''')
+
     cursor.execute('''
     CREATE INDEX IF NOT EXISTS idx_positions_network 
     ON positions(network)
@@ -123,77 +301,45 @@ def initialize_database():
     conn.close()
     print("[DBManager] Database initialization complete.")
 
+def _trade_row(trade_data: dict, network: str) -> tuple:
+    """Column values for TRADE_INSERT_SQL from a Hyperliquid fill."""
+    return (
+        trade_data.get('tid'), trade_data.get('oid'), trade_data.get('coin'), trade_data.get('side'),
+        trade_data.get('px'), trade_data.get('sz'), trade_data.get('fee'), trade_data.get('time'),
+        trade_data.get('closedPnl'), trade_data.get('hash'), trade_data.get('crossed'),
+        trade_data.get('startPosition'), trade_data.get('dir'), trade_data.get('feeToken'),
+        trade_data.get('builderFee'), network
+    )
+
 def add_trade(trade_data: dict, network: str = None):
     """
-    Adds a trade fill to the trades table and updates the positions table.
+    Adds a trade fill to the trades table and applies it to the in-memory position book.
     'trade_data' is expected to be a dictionary matching Hyperliquid's fill structure.
     If network is not provided, uses the current network context.
+    The write is queued on the database writer; this blocks until it has committed.
     """
+    from .db_writer import get_db_writer
+
     if network is None:
         network = get_current_network()
-        
-    conn = get_db_connection()
-    cursor = conn.cursor()
 
     try:
-        cursor.execute('''
-        INSERT INTO trades (
-            trade_id, order_id, coin, side, price, size, fee, timestamp,
-            closed_pnl, hash, crossed, start_position, dir, fee_token, builder_fee, network
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            trade_data.get('tid'), trade_data.get('oid'), trade_data.get('coin'), trade_data.get('side'),
-            trade_data.get('px'), trade_data.get('sz'), trade_data.get('fee'), trade_data.get('time'),
-            trade_data.get('closedPnl'), trade_data.get('hash'), trade_data.get('crossed'),
-            trade_data.get('startPosition'), trade_data.get('dir'), trade_data.get('feeToken'),
-            trade_data.get('builderFee'), network
-        ))
-        print(f"[DBManager] Added trade for {trade_data.get('coin')} on {network}: {trade_data.get('dir')} {trade_data.get('sz')} @ {trade_data.get('px')}")
-
-        # Update positions table
-        update_position(cursor, trade_data, network)
-
-        conn.commit()
-    except sqlite3.IntegrityError as e:
-        if "UNIQUE constraint failed" in str(e):
-            print(f"[DBManager] Trade with ID {trade_data.get('tid')} already exists on {network}. Skipping.")
-        else:
-            print(f"[DBManager] Error adding trade: {e}")
-            raise
+        added = get_db_writer().add_fills([trade_data], network).result()
     except Exception as e:
         print(f"[DBManager] Unexpected error adding trade: {e}")
-        conn.rollback() # Rollback on other errors
         raise
-    finally:
-        conn.close()
+    if added:
+        print(f"[DBManager] Added trade for {trade_data.get('coin')} on {network}: {trade_data.get('dir')} {trade_data.get('sz')} @ {trade_data.get('px')}")
+    else:
+        print(f"[DBManager] Trade with ID {trade_data.get('tid')} already exists on {network}. Skipping.")
 
-def update_position(cursor: sqlite3.Cursor, trade_data: dict, network: str = None):
+def _apply_fill_to_position(position: tuple, side: str, trade_price: float, trade_size: float) -> tuple:
     """
-    Updates the net position for a coin based on a new trade.
+    Folds one fill into a (net_size, average_entry_price, total_cost) position and returns the new one.
     This is a simplified position update logic. More sophisticated logic might be needed
     for accurate PnL, average entry of mixed long/short, etc.
-    Assumes trade_data contains 'coin', 'side', 'px' (price), 'sz' (size).
-    If network is not provided, uses the current network context.
     """
-    if network is None:
-        network = get_current_network()
-        
-    coin = trade_data['coin']
-    trade_price = float(trade_data['px'])
-    trade_size = float(trade_data['sz'])
-    trade_side = trade_data['side'] # 'B' for Buy, 'A' for Sell
-
-    cursor.execute("SELECT net_size, average_entry_price, total_cost FROM positions WHERE coin = ? AND network = ?", (coin, network))
-    row = cursor.fetchone()
-
-    current_net_size = 0
-    current_avg_entry = 0
-    current_total_cost = 0
-
-    if row:
-        current_net_size = row['net_size']
-        current_avg_entry = row['average_entry_price']
-        current_total_cost = row['total_cost']
+    current_net_size, current_avg_entry, current_total_cost = position
 
     new_net_size = current_net_size
     new_avg_entry = current_avg_entry
@@ -201,7 +347,7 @@ def update_position(cursor: sqlite3.Cursor, trade_data: dict, network: str = Non
 
     trade_value = trade_price * trade_size
 
-    if trade_side == 'B': # Buy
+    if side == 'B': # Buy
         new_total_cost = current_total_cost + trade_value
         new_net_size = current_net_size + trade_size
         if new_net_size != 0: # Avoid division by zero if position closes to zero then reopens
@@ -214,7 +360,7 @@ def update_position(cursor: sqlite3.Cursor, trade_data: dict, network: str = Non
                 else: # Reducing short, avg_entry of short doesn't change with a buy-to-cover
                     new_avg_entry = current_avg_entry if current_net_size != 0 else 0
 
-    elif trade_side == 'A': # Sell
+    elif side == 'A': # Sell
         new_total_cost = current_total_cost - trade_value # Cost basis reduces for longs, or becomes more negative for shorts
         new_net_size = current_net_size - trade_size
         if new_net_size != 0:
@@ -233,31 +379,101 @@ def update_position(cursor: sqlite3.Cursor, trade_data: dict, network: str = Non
         new_total_cost = 0
         new_net_size = 0
 
-    if row:
-        cursor.execute('''
-        UPDATE positions SET net_size = ?, average_entry_price = ?, total_cost = ?, last_updated = CURRENT_TIMESTAMP
-        WHERE coin = ? AND network = ?
-        ''', (new_net_size, new_avg_entry, new_total_cost, coin, network))
-    else:
-        cursor.execute('''
-        INSERT INTO positions (coin, network, net_size, average_entry_price, total_cost, last_updated)
-        VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-        ''', (coin, network, new_net_size, new_avg_entry, new_total_cost))
+    return new_net_size, new_avg_entry, new_total_cost
+
+def _fold_fills(position: tuple, fills: list) -> tuple:
+    """Applies fills (already in time order) to a position with _apply_fill_to_position."""
+    for fill in fills:
+        position = _apply_fill_to_position(position, fill['side'], float(fill['px']), float(fill['sz']))
+    return position
+
+def _dedupe_fills(fills: list) -> dict:
+    """Fills keyed by trade ID, keeping the first occurrence of each."""
+    unique_fills = {}
+    for fill in fills:
+        unique_fills.setdefault(fill.get('tid'), fill)
+    return unique_fills
+
+def _group_fills_by_coin(fills: list) -> dict:
+    """Fills grouped per coin, each group in fill-time order."""
+    fills_by_coin = {}
+    for fill in sorted(fills, key=lambda fill: int(fill.get('time') or 0)):
+        fills_by_coin.setdefault(fill['coin'], []).append(fill)
+    return fills_by_coin
+
+def _write_fills(cursor: sqlite3.Cursor, fills: list, network: str) -> tuple:
+    """
+    Writes fills within the caller's transaction: skips stored and repeated trade IDs, inserts
+    the rest and clears their open orders. Positions are not touched here; once the transaction
+    commits, pass the result to PositionBook.apply_fills.
+
+    Returns:
+        tuple: (new fills written, highest trades.id after the insert)
+    """
+    unique_fills = _dedupe_fills(fills)
+    order_ids = {fill.get('oid') for fill in unique_fills.values() if fill.get('oid')}
+
+    trade_ids = list(unique_fills)
+    existing = set()
+    for i in range(0, len(trade_ids), SQLITE_MAX_PARAMS):
+        chunk = trade_ids[i:i + SQLITE_MAX_PARAMS]
+        cursor.execute(f"SELECT trade_id FROM trades WHERE network = ? AND trade_id IN ({','.join('?' * len(chunk))})",
+                       (network, *chunk))
+        existing.update(row[0] for row in cursor.fetchall())
+
+    new_fills = [fill for tid, fill in unique_fills.items() if tid not in existing]
+    cursor.executemany(TRADE_INSERT_SQL, [_trade_row(fill, network) for fill in new_fills])
+
+    last_trade_id = 0
+    if new_fills:
+        cursor.execute("SELECT MAX(id) FROM trades")
+        last_trade_id = cursor.fetchone()[0]
+
+    if order_ids:
+        cursor.executemany("DELETE FROM open_orders_tracking WHERE order_id = ? AND network = ?",
+                           [(order_id, network) for order_id in order_ids])
+    return new_fills, last_trade_id
+
+def add_trades_bulk(fills: list, network: str = None) -> int:
+    """
+    Adds a batch of fills (e.g. one userFills message) in a single transaction.
+    Fills already stored, or repeated within the batch, are skipped on (trade_id, network).
+    The filled orders are removed from open_orders_tracking in the same transaction, and the
+    new fills are folded into the in-memory position book once it commits.
+    The write is queued on the database writer; this blocks until it has committed.
+    If network is not provided, uses the current network context.
+
+    Args:
+        fills: Hyperliquid fill dicts (each needs 'tid', 'oid', 'coin', 'side', 'px', 'sz', 'time')
+        network: 'mainnet' or 'testnet'
+
+    Returns:
+        int: Number of new fills written
+    """
+    from .db_writer import get_db_writer
 
-    print(f"[DBManager] Updated position for {coin} on {network}: Net Size: {new_net_size:.4f}, Avg Entry: {new_avg_entry:.2f}")
+    if network is None:
+        network = get_current_network()
+    if not fills:
+        return 0
+
+    try:
+        added = get_db_writer().add_fills(fills, network).result()
+    except Exception as e:
+        print(f"[DBManager] Error adding trades in bulk: {e}")
+        raise
+    print(f"[DBManager] Added {added} of {len(fills)} fills on {network} ({len(fills) - added} duplicates skipped)")
+    return added
 
 def get_current_positions(network: str = None):
-    """Retrieves all current positions from the positions table for a specific network.
+    """Retrieves all open positions for a specific network from the in-memory position book.
     If network is not provided, uses the current network context."""
+    from .position_book import get_position_book
+
     if network is None:
         network = get_current_network()
         
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT coin, net_size, average_entry_price, total_cost, last_updated FROM positions WHERE net_size != 0 AND network = ?", (network,))
-    positions = [dict(row) for row in cursor.fetchall()]
-    conn.close()
-    return positions
+    return get_position_book().positions(network)
 
 def get_all_trades(network: str = None):
     """Retrieves all trades from the trades table for a specific network.
@@ -272,32 +488,177 @@ def get_all_trades(network: str = None):
     conn.close()
     return trades
 
-def add_open_order(order_details: dict, network: str = None):
+def _parse_trade_cursor(cursor: str) -> Tuple[int, int]:
+    """Decode a next_cursor returned by query_trades ("<timestamp>:<id>")."""
+    try:
+        timestamp, trade_row_id = cursor.split(":")
+        return int(timestamp), int(trade_row_id)
+    except (AttributeError, ValueError):
+        raise ValueError(f"Invalid trade cursor: {cursor!r}")
+
+def _trade_filters(network: str, coin: Optional[str] = None, side: Optional[str] = None,
+                   start_time: Optional[int] = None, end_time: Optional[int] = None) -> Tuple[List[str], List[Any]]:
+    """WHERE clauses and parameters shared by the trade queries."""
+    clauses, params = ["network = ?"], [network]
+    if coin:
+        clauses.append("coin = ?")
+        params.append(coin)
+    if side:
+        normalized = TRADE_SIDES.get(side.lower())
+        if normalized is None:
+            raise ValueError(f"Invalid side: {side!r} (expected 'B'/'buy' or 'A'/'sell')")
+        clauses.append("side = ?")
+        params.append(normalized)
+    if start_time is not None:
+        clauses.append("timestamp >= ?")
+        params.append(int(start_time))
+    if end_time is not None:
+        clauses.append("timestamp < ?")
+        params.append(int(end_time))
+    return clauses, params
+
+def _build_trade_query(network: str, coin: Optional[str] = None, side: Optional[str] = None,
+                       start_time: Optional[int] = None, end_time: Optional[int] = None,
+                       columns: Optional[List[str]] = None, limit: int = DEFAULT_TRADE_PAGE_SIZE,
+                       cursor: Optional[str] = None, ascending: bool = False) -> Tuple[str, List[Any], List[str], int]:
     """
-    Adds an order to the open_orders_tracking table.
-    'order_details' should contain: order_id, symbol, side, order_type, price (optional), size, timestamp_placed.
+    Build one page of a trade query. Returns (sql, params, columns, limit); the query selects
+    limit + 1 rows so the caller can tell whether another page exists.
+    """
+    columns = list(columns) if columns else list(TRADE_COLUMNS)
+    unknown = [column for column in columns if column not in TRADE_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown trade columns: {unknown}")
+    # The keyset cursor needs both sort keys
+    selected = columns + [column for column in ("timestamp", "id") if column not in columns]
+    limit = max(1, min(int(limit), MAX_TRADE_PAGE_SIZE))
+
+    clauses, params = _trade_filters(network, coin, side, start_time, end_time)
+    if cursor:
+        clauses.append("(timestamp, id) > (?, ?)" if ascending else "(timestamp, id) < (?, ?)")
+        params.extend(_parse_trade_cursor(cursor))
+    direction = "ASC" if ascending else "DESC"
+    sql = (f"SELECT {', '.join(selected)} FROM trades WHERE {' AND '.join(clauses)} "
+           f"ORDER BY timestamp {direction}, id {direction} LIMIT ?")
+    params.append(limit + 1)
+    return sql, params, columns, limit
+
+def _trade_page(rows: list, columns: List[str], limit: int) -> Dict[str, Any]:
+    """Shape limit + 1 fetched rows into {"trades", "next_cursor"}."""
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = f"{rows[-1]['timestamp']}:{rows[-1]['id']}" if has_more else None
+    return {"trades": [{column: row[column] for column in columns} for row in rows], "next_cursor": next_cursor}
+
+def _build_trade_aggregate(network: str, coin: Optional[str] = None, side: Optional[str] = None,
+                           start_time: Optional[int] = None, end_time: Optional[int] = None) -> Tuple[str, List[Any]]:
+    clauses, params = _trade_filters(network, coin, side, start_time, end_time)
+    sql = f'''
+    SELECT
+        coin,
+        COUNT(*) AS trade_count,
+        SUM(CASE WHEN side = 'B' THEN 1 ELSE 0 END) AS buy_count,
+        SUM(CASE WHEN side = 'A' THEN 1 ELSE 0 END) AS sell_count,
+        SUM(size) AS size,
+        SUM(price * size) AS volume,
+        SUM(COALESCE(fee, 0)) AS fees,
+        SUM(COALESCE(closed_pnl, 0)) AS realized_pnl,
+        SUM(CASE WHEN closed_pnl > 0 THEN 1 ELSE 0 END) AS winning_trades,
+        SUM(CASE WHEN closed_pnl != 0 THEN 1 ELSE 0 END) AS closing_trades,
+        MIN(timestamp) AS first_trade,
+        MAX(timestamp) AS last_trade
+    FROM trades
+    WHERE {' AND '.join(clauses)}
+    GROUP BY coin
+    ORDER BY volume DESC
+    '''
+    return sql, params
+
+def _trade_summary(by_coin: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Add totals across coins to the per-coin aggregates."""
+    total = {field: sum(row[field] for row in by_coin) for field in
+             ("trade_count", "buy_count", "sell_count", "volume", "fees", "realized_pnl", "winning_trades", "closing_trades")}
+    total["first_trade"] = min((row["first_trade"] for row in by_coin), default=None)
+    total["last_trade"] = max((row["last_trade"] for row in by_coin), default=None)
+    return {"by_coin": by_coin, "total": total}
+
+def query_trades(network: str = None, coin: str = None, side: str = None, start_time: int = None,
+                 end_time: int = None, columns: List[str] = None, limit: int = DEFAULT_TRADE_PAGE_SIZE,
+                 cursor: str = None, ascending: bool = False) -> Dict[str, Any]:
+    """
+    Returns one page of trades, newest first (or oldest first if ascending), paginated on
+    (timestamp, id). If network is not provided, uses the current network context.
+
+    Args:
+        network: 'mainnet' or 'testnet'
+        coin: Only trades of this coin
+        side: 'B'/'buy' or 'A'/'sell'
+        start_time: Inclusive lower bound on the fill time (ms)
+        end_time: Exclusive upper bound on the fill time (ms)
+        columns: Columns to return (subset of TRADE_COLUMNS); all columns if omitted
+        limit: Page size, capped at MAX_TRADE_PAGE_SIZE
+        cursor: next_cursor of the previous page
+
+    Returns:
+        dict: {"trades": [...], "next_cursor": str or None}
+    """
+    if network is None:
+        network = get_current_network()
+    sql, params, columns, limit = _build_trade_query(network, coin, side, start_time, end_time, columns, limit,
+                                                     cursor, ascending)
+    conn = get_db_connection()
+    db_cursor = conn.cursor()
+    db_cursor.execute(sql, params)
+    page = _trade_page(db_cursor.fetchall(), columns, limit)
+    conn.close()
+    return page
+
+def aggregate_trades(network: str = None, coin: str = None, side: str = None, start_time: int = None,
+                     end_time: int = None) -> Dict[str, Any]:
+    """
+    Returns trade count, volume, fees and realized PnL per coin plus totals, computed in sqlite.
     If network is not provided, uses the current network context.
+
+    Returns:
+        dict: {"by_coin": [...], "total": {...}}
     """
+    if network is None:
+        network = get_current_network()
+    sql, params = _build_trade_aggregate(network, coin, side, start_time, end_time)
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(sql, params)
+    by_coin = [dict(row) for row in cursor.fetchall()]
+    conn.close()
+    return _trade_summary(by_coin)
+
+def get_last_trade_timestamp(network: str = None):
+    """Returns the newest persisted fill time (ms) for a network, or None if there are no trades.
+    If network is not provided, uses the current network context."""
     if network is None:
         network = get_current_network()
         
     conn = get_db_connection()
     cursor = conn.cursor()
+    cursor.execute("SELECT MAX(timestamp) FROM trades WHERE network = ?", (network,))
+    last_timestamp = cursor.fetchone()[0]
+    conn.close()
+    return last_timestamp
+
+def add_open_order(order_details: dict, network: str = None):
+    """
+    Adds an order to the open_orders_tracking table.
+    'order_details' should contain: order_id, symbol, side, order_type, price (optional), size, timestamp_placed.
+    If network is not provided, uses the current network context.
+    The write is queued on the database writer; this blocks until it has committed.
+    """
+    from .db_writer import get_db_writer
+
+    if network is None:
+        network = get_current_network()
+
     try:
-        cursor.execute('''
-        INSERT INTO open_orders_tracking (order_id, symbol, side, order_type, price, size, network, timestamp_placed)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            order_details['order_id'],
-            order_details['symbol'],
-            order_details['side'],
-            order_details['order_type'],
-            order_details.get('price'), # Optional, will be None if not present
-            order_details['size'],
-            network,
-            order_details['timestamp_placed']
-        ))
-        conn.commit()
+        get_db_writer().add_open_order(order_details, network).result()
         print(f"[DBManager] Added to open_orders_tracking: Order ID {order_details['order_id']} for {order_details['symbol']} on {network}")
     except sqlite3.IntegrityError as e:
         if "UNIQUE constraint failed" in str(e):
@@ -307,34 +668,28 @@ def add_open_order(order_details: dict, network: str = None):
             # raise # Optionally re-raise
     except Exception as e:
         print(f"[DBManager] Unexpected error adding to open_orders_tracking: {e}")
-        conn.rollback()
         # raise # Optionally re-raise
-    finally:
-        conn.close()
 
 def remove_open_order(order_id: int, network: str = None):
     """
     Removes an order from the open_orders_tracking table, typically after it's filled or confirmed closed.
     If network is not provided, uses the current network context.
+    The write is queued on the database writer; this blocks until it has committed.
     """
+    from .db_writer import get_db_writer
+
     if network is None:
         network = get_current_network()
-        
-    conn = get_db_connection()
-    cursor = conn.cursor()
+
     try:
-        cursor.execute("DELETE FROM open_orders_tracking WHERE order_id = ? AND network = ?", (order_id, network))
-        conn.commit()
-        if cursor.rowcount > 0:
+        removed = get_db_writer().remove_open_order(order_id, network).result()
+        if removed > 0:
             print(f"[DBManager] Removed Order ID {order_id} from open_orders_tracking on {network}.")
         else:
             print(f"[DBManager] Order ID {order_id} not found in open_orders_tracking for removal on {network} (might have been removed already or never added).")
     except Exception as e:
         print(f"[DBManager] Error removing Order ID {order_id} from open_orders_tracking: {e}")
-        conn.rollback()
         # raise # Optionally re-raise
-    finally:
-        conn.close()
 
 def get_tracked_open_orders(network: str = None):
     """Retrieves all orders currently in the open_orders_tracking table for a specific network.
@@ -350,9 +705,18 @@ def get_tracked_open_orders(network: str = None):
     return open_orders
 
 # Conversation history functions
+def _sqlite_timestamp() -> str:
+    """UTC time in sqlite CURRENT_TIMESTAMP format."""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+def _conversation_message(message_id: int, role: str, content: str, tool_calls: dict, timestamp: str) -> dict:
+    """A message in the shape get_conversation_history returns."""
+    return {"id": message_id, "role": role, "content": content, "tool_calls": tool_calls or None, "timestamp": timestamp}
+
 def add_conversation_message(session_id: str, role: str, content: str, tool_calls: dict = None):
     """
     Adds a message to the conversation history.
+    The write is queued on the database writer; this blocks until it has committed.
     
     Args:
         session_id: Unique identifier for the conversation session
@@ -360,29 +724,39 @@ def add_conversation_message(session_id: str, role: str, content: str, tool_call
         content: The message content
         tool_calls: Optional dict of tool calls made by the assistant
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    import json
-    tool_calls_json = json.dumps(tool_calls) if tool_calls else None
-    
+    from .db_writer import get_db_writer
+
     try:
-        cursor.execute('''
-        INSERT INTO conversations (session_id, role, content, tool_calls)
-        VALUES (?, ?, ?, ?)
-        ''', (session_id, role, content, tool_calls_json))
-        conn.commit()
+        get_db_writer().add_conversation_message(session_id, role, content, tool_calls).result()
         print(f"[DBManager] Added {role} message to conversation {session_id[:8]}...")
     except Exception as e:
         print(f"[DBManager] Error adding conversation message: {e}")
-        conn.rollback()
         raise
-    finally:
-        conn.close()
+
+def _message_from_row(row) -> dict:
+    """A conversations row as a dict, with tool_calls parsed from JSON if present."""
+    msg = dict(row)
+    if msg['tool_calls']:
+        import json
+        try:
+            msg['tool_calls'] = json.loads(msg['tool_calls'])
+        except:
+            msg['tool_calls'] = None
+    return msg
+
+CONVERSATION_HISTORY_SQL = '''
+SELECT id, role, content, tool_calls, timestamp
+FROM conversations
+WHERE session_id = ?
+ORDER BY timestamp DESC, id DESC
+LIMIT ?
+'''
 
 def get_conversation_history(session_id: str, limit: int = 50):
     """
     Retrieves conversation history for a given session.
+    Served from the conversation cache; sqlite is read only when the session is not cached,
+    and archived messages are rehydrated when the live rows fall short of the limit.
     
     Args:
         session_id: Unique identifier for the conversation session
@@ -391,75 +765,87 @@ def get_conversation_history(session_id: str, limit: int = 50):
     Returns:
         List of message dictionaries ordered by timestamp
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-    SELECT role, content, tool_calls, timestamp 
-    FROM conversations 
-    WHERE session_id = ? 
-    ORDER BY timestamp DESC 
-    LIMIT ?
-    ''', (session_id, limit))
-    
-    messages = []
-    for row in cursor.fetchall():
-        msg = dict(row)
-        # Parse tool_calls JSON if present
-        if msg['tool_calls']:
-            import json
-            try:
-                msg['tool_calls'] = json.loads(msg['tool_calls'])
-            except:
-                msg['tool_calls'] = None
-        messages.append(msg)
-    
-    conn.close()
+    from .conversation_cache import get_conversation_cache
+    from .conversation_retention import get_conversation_retention
+
+    cache = get_conversation_cache()
+    messages = cache.get(session_id, limit)
+    if messages is not None:
+        return messages
+
+    cacheable = limit <= cache.window
+    rows = cache.window if cacheable else limit
+    retention = get_conversation_retention()
+    rehydrated = False
+    while True:
+        token = cache.load_token()
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute(CONVERSATION_HISTORY_SQL, (session_id, rows))
+        messages = [_message_from_row(row) for row in cursor.fetchall()]
+        conn.close()
+
+        # Older messages may have been archived; bring them back (once) when the live rows fall short
+        if rehydrated or len(messages) >= rows or not retention.is_archived(session_id):
+            break
+        retention.rehydrate_session(session_id)
+        rehydrated = True
     
     # Reverse to get chronological order
-    return list(reversed(messages))
+    messages.reverse()
+    if cacheable:
+        cache.fill(session_id, messages, token)
+    return messages[-limit:] if limit > 0 else []
+
+SESSIONS_SQL = '''
+SELECT session_id, message_count, last_activity, first_activity,
+       (SELECT COALESCE(SUM(message_count), 0) FROM conversation_archive a
+        WHERE a.session_id = sessions.session_id) AS archived_messages
+FROM sessions
+ORDER BY last_activity DESC
+'''
 
 def get_all_sessions():
     """
-    Retrieves all unique session IDs with their message counts and last activity.
+    Retrieves all unique session IDs with their message counts and last activity,
+    from the trigger-maintained sessions summary table. message_count counts live messages;
+    archived_messages counts those moved to the archive (restored on the next history read).
     """
     conn = get_db_connection()
     cursor = conn.cursor()
     
-    cursor.execute('''
-    SELECT 
-        session_id,
-        COUNT(*) as message_count,
-        MAX(timestamp) as last_activity,
-        MIN(timestamp) as first_activity
-    FROM conversations
-    GROUP BY session_id
-    ORDER BY last_activity DESC
-    ''')
+    cursor.execute(SESSIONS_SQL)
     
     sessions = [dict(row) for row in cursor.fetchall()]
     conn.close()
     return sessions
 
+def _delete_session(cursor, session_id: str) -> int:
+    """
+    Delete a session's messages, its conversation_archive index rows and its summary row (within
+    the caller's transaction), so the archived messages are never rehydrated. Returns live
+    messages deleted.
+    """
+    cursor.execute("DELETE FROM conversation_archive WHERE session_id = ?", (session_id,))
+    cursor.execute("DELETE FROM conversations WHERE session_id = ?", (session_id,))
+    deleted_count = cursor.rowcount
+    cursor.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+    return deleted_count
+
 def clear_session_history(session_id: str):
     """
-    Deletes all messages for a given session.
+    Deletes all messages for a given session, including its archived messages.
+    The write is queued on the database writer; this blocks until it has committed.
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
+    from .db_writer import get_db_writer
+
     try:
-        cursor.execute("DELETE FROM conversations WHERE session_id = ?", (session_id,))
-        deleted_count = cursor.rowcount
-        conn.commit()
+        deleted_count = get_db_writer().clear_session_history(session_id).result()
         print(f"[DBManager] Cleared {deleted_count} messages from session {session_id[:8]}...")
         return deleted_count
     except Exception as e:
         print(f"[DBManager] Error clearing session history: {e}")
-        conn.rollback()
         raise
-    finally:
-        conn.close()
 
 class DBManager:
     """Database Manager class that wraps all database operations."""
@@ -472,6 +858,10 @@ class DBManager:
         """Add a trade to the database."""
         return add_trade(trade_data, network)
     
+    def add_trades_bulk(self, fills: list, network: str = None):
+        """Add a batch of fills in one transaction."""
+        return add_trades_bulk(fills, network)
+    
     def get_current_positions(self, network: str = None):
         """Get all current positions."""
         return get_current_positions(network)
@@ -480,6 +870,18 @@ class DBManager:
         """Get all trades."""
         return get_all_trades(network)
     
+    def query_trades(self, network: str = None, **filters):
+        """Get one page of trades (see query_trades)."""
+        return query_trades(network, **filters)
+    
+    def aggregate_trades(self, network: str = None, **filters):
+        """Get per-coin trade aggregates (see aggregate_trades)."""
+        return aggregate_trades(network, **filters)
+    
+    def get_last_trade_timestamp(self, network: str = None):
+        """Get the newest persisted fill time (ms)."""
+        return get_last_trade_timestamp(network)
+    
     def add_open_order(self, order_details: dict, network: str = None):
         """Add an open order to tracking."""
         return add_open_order(order_details, network)
@@ -508,6 +910,10 @@ class DBManager:
         """Clear history for a session."""
         return clear_session_history(session_id)
     
+    def close(self):
+        """Close all persistent database connections."""
+        return close_all_connections()
+    
     def generate_session_id(self):
         """Generate a new session ID."""
         import uuid
@@ -0,0 +1,404 @@
+"""
+Single-writer, write-behind queue for the SQLite database.
+
+One background thread owns the write connection. Callers submit typed write commands and get
+a concurrent.futures.Future back; the thread groups queued commands into one transaction.
+Every write in the package goes through here; the synchronous database_manager functions
+submit a command and block on its future.
+
+By default a batch takes whatever is queued, up to ``max_batch_rows`` rows, and commits as
+soon as the queue runs dry (group commit), so an idle writer adds no latency while a busy one
+still batches. With ``linger=True`` a batch instead keeps waiting for more commands until
+``flush_interval_ms`` has passed or ``max_batch_rows`` rows are pending. A future resolves only
+after its batch has committed, so awaiting it is a durability acknowledgement.
+
+Each command runs inside its own SAVEPOINT, so one failing command (e.g. a duplicate order ID)
+fails only its own future and the rest of the batch still commits.
+
+Usage:
+    writer = get_db_writer()
+    future = writer.add_fills(fills)                # Returns immediately
+    new_fills = future.result()                     # Blocks until committed
+    await asyncio.wrap_future(writer.add_conversation_message(session_id, "user", text))
+    shutdown_db_writer()                            # Flushes and stops the thread
+"""
+
+import atexit
+import contextlib
+import json
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from .conversation_cache import get_conversation_cache
+from .database_manager import (
+    _conversation_message, _delete_session, _sqlite_timestamp, _write_fills, get_current_network, get_db_connection
+)
+from .position_book import get_position_book
+
+FLUSH_INTERVAL_MS = 50      # Longest a lingering batch waits for more commands
+MAX_BATCH_ROWS = 1000       # Commit early once this many rows are pending
+MAX_QUEUED_COMMANDS = 10000  # Submitters block beyond this (backpressure)
+
+
+@dataclass
+class WriteCommand:
+    """Base class for queued writes. network defaults to the submitter's network context."""
+
+    locks_position_book = False  # Commit and after_commit must hold the position book's lock
+
+    def resolve(self):
+        """Fill in defaults that depend on the submitting thread's context."""
+
+    @property
+    def rows(self) -> int:
+        return 1
+
+    def apply(self, cursor: sqlite3.Cursor) -> Any:
+        raise NotImplementedError
+
+    def after_commit(self):
+        """Runs on the writer thread once the command's batch has committed."""
+
+
+@dataclass
+class AddFills(WriteCommand):
+    """Insert fills, update positions and clear filled open orders. Result: new fills written."""
+    fills: List[Dict[str, Any]]
+    network: Optional[str] = None
+
+    locks_position_book = True
+
+    def resolve(self):
+        if self.network is None:
+            self.network = get_current_network()
+
+    @property
+    def rows(self) -> int:
+        return max(len(self.fills), 1)
+
+    def apply(self, cursor: sqlite3.Cursor) -> int:
+        self._written = _write_fills(cursor, self.fills, self.network)
+        return len(self._written[0])
+
+    def after_commit(self):
+        new_fills, last_trade_id = self._written
+        if new_fills:
+            get_position_book().apply_fills(new_fills, self.network, last_trade_id)
+
+
+@dataclass
+class AddOpenOrder(WriteCommand):
+    """Track an open order. Fails with sqlite3.IntegrityError if it is already tracked."""
+    order_details: Dict[str, Any]
+    network: Optional[str] = None
+
+    def resolve(self):
+        if self.network is None:
+            self.network = get_current_network()
+
+    def apply(self, cursor: sqlite3.Cursor) -> int:
+        details = self.order_details
+        cursor.execute('''
+        INSERT INTO open_orders_tracking (order_id, symbol, side, order_type, price, size, network, timestamp_placed)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (details['order_id'], details['symbol'], details['side'], details['order_type'],
+              details.get('price'), details['size'], self.network, details['timestamp_placed']))
+        return cursor.rowcount
+
+
+@dataclass
+class RemoveOpenOrder(WriteCommand):
+    """Stop tracking an order. Result: rows removed (0 if it was not tracked)."""
+    order_id: int
+    network: Optional[str] = None
+
+    def resolve(self):
+        if self.network is None:
+            self.network = get_current_network()
+
+    def apply(self, cursor: sqlite3.Cursor) -> int:
+        cursor.execute("DELETE FROM open_orders_tracking WHERE order_id = ? AND network = ?",
+                       (self.order_id, self.network))
+        return cursor.rowcount
+
+
+@dataclass
+class AddConversationMessage(WriteCommand):
+    """Append a chat message to a session's history (and to its cached window once committed)."""
+    session_id: str
+    role: str
+    content: str
+    tool_calls: Optional[Dict[str, Any]] = None
+    timestamp: Optional[str] = None
+    message_id: Optional[int] = None  # conversations.id, set by apply()
+
+    def resolve(self):
+        if self.timestamp is None:
+            self.timestamp = _sqlite_timestamp()
+
+    def apply(self, cursor: sqlite3.Cursor) -> int:
+        cursor.execute('''
+        INSERT INTO conversations (session_id, role, content, tool_calls, timestamp)
+        VALUES (?, ?, ?, ?, ?)
+        ''', (self.session_id, self.role, self.content, json.dumps(self.tool_calls) if self.tool_calls else None,
+              self.timestamp))
+        self.message_id = cursor.lastrowid
+        return self.message_id
+
+    def after_commit(self):
+        get_conversation_cache().append(
+            self.session_id,
+            _conversation_message(self.message_id, self.role, self.content, self.tool_calls, self.timestamp))
+
+
+@dataclass
+class ClearSessionHistory(WriteCommand):
+    """Delete a session's messages and archive index. Result: live messages deleted."""
+    session_id: str
+
+    def apply(self, cursor: sqlite3.Cursor) -> int:
+        return _delete_session(cursor, self.session_id)
+
+    def after_commit(self):
+        get_conversation_cache().invalidate(self.session_id)
+
+
+@dataclass
+class CheckpointPositions(WriteCommand):
+    """Checkpoint the position book after the fills queued before it have been applied."""
+
+    def apply(self, cursor: sqlite3.Cursor) -> None:
+        return None
+
+    def after_commit(self):
+        get_position_book().checkpoint()
+
+
+@dataclass
+class _Flush(WriteCommand):
+    """Barrier: resolves once every command queued before it has committed."""
+
+    def apply(self, cursor: sqlite3.Cursor) -> None:
+        return None
+
+
+@dataclass
+class _Pending:
+    command: WriteCommand
+    future: Future = field(default_factory=Future)
+
+
+class DatabaseWriter:
+    """Background thread that owns the SQLite write connection and commits commands in batches."""
+
+    def __init__(self, flush_interval_ms: int = FLUSH_INTERVAL_MS, max_batch_rows: int = MAX_BATCH_ROWS,
+                 max_queued: int = MAX_QUEUED_COMMANDS, linger: bool = False):
+        """
+        Args:
+            flush_interval_ms: With linger, how long a batch waits for more commands before commit
+            max_batch_rows: Pending row count that triggers an early commit
+            max_queued: Queue bound; submit() blocks when it is reached
+            linger: Wait out flush_interval_ms for more commands even when the queue is empty,
+                    instead of committing as soon as it runs dry
+        """
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_batch_rows = max_batch_rows
+        self.linger = linger
+        self._queue: "queue.Queue[Optional[_Pending]]" = queue.Queue(maxsize=max_queued)
+        self._closed = False
+        self._close_lock = threading.Lock()
+
+        self.batches = 0
+        self.commands = 0
+        self.failed = 0
+        self.last_batch_ms = 0.0
+        self.last_commit_at = time.monotonic()
+
+        self._thread = threading.Thread(target=self._run, name="DatabaseWriter", daemon=True)
+        self._thread.start()
+
+    def submit(self, command: WriteCommand) -> Future:
+        """Queue a command; the returned future resolves with its result once committed."""
+        if self._closed:
+            raise RuntimeError("DatabaseWriter is closed")
+        if threading.current_thread() is self._thread:
+            # A command or post-commit step waiting on its own queue would never be served
+            raise RuntimeError("DatabaseWriter cannot submit from its own thread")
+        command.resolve()
+        pending = _Pending(command)
+        self._queue.put(pending)
+        return pending.future
+
+    def add_fills(self, fills: List[Dict[str, Any]], network: Optional[str] = None) -> Future:
+        return self.submit(AddFills(fills, network))
+
+    def add_open_order(self, order_details: Dict[str, Any], network: Optional[str] = None) -> Future:
+        return self.submit(AddOpenOrder(order_details, network))
+
+    def remove_open_order(self, order_id: int, network: Optional[str] = None) -> Future:
+        return self.submit(RemoveOpenOrder(order_id, network))
+
+    def add_conversation_message(self, session_id: str, role: str, content: str,
+                                 tool_calls: Optional[Dict[str, Any]] = None) -> Future:
+        return self.submit(AddConversationMessage(session_id, role, content, tool_calls))
+
+    def clear_session_history(self, session_id: str) -> Future:
+        return self.submit(ClearSessionHistory(session_id))
+
+    def checkpoint_positions(self) -> Future:
+        return self.submit(CheckpointPositions())
+
+    def flush(self, timeout: Optional[float] = None):
+        """Block until everything submitted so far has been committed."""
+        self.submit(_Flush()).result(timeout)
+
+    def close(self, timeout: Optional[float] = 10.0):
+        """Flush pending commands and stop the writer thread."""
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout)
+        print(f"[DatabaseWriter] Stopped after {self.batches} batches ({self.commands} commands, {self.failed} failed).")
+
+    def idle_for(self) -> float:
+        """Seconds since the last commit, or 0 while commands are queued."""
+        if self._queue.qsize():
+            return 0.0
+        return time.monotonic() - self.last_commit_at
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self._queue.qsize(),
+            "batches": self.batches,
+            "commands": self.commands,
+            "failed": self.failed,
+            "last_batch_ms": round(self.last_batch_ms, 3)
+        }
+
+    # Writer thread
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is None:
+                break
+            batch = [first]
+            rows = first.command.rows
+            deadline = time.monotonic() + self.flush_interval
+            while rows < self.max_batch_rows:
+                try:
+                    if self.linger:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        pending = self._queue.get(timeout=remaining)
+                    else:
+                        pending = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if pending is None:
+                    stopping = True
+                    break
+                batch.append(pending)
+                rows += pending.command.rows
+            self._commit_batch(batch)
+
+        # Drain anything submitted between close() and the sentinel
+        leftover = []
+        while True:
+            try:
+                pending = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if pending is not None:
+                leftover.append(pending)
+        if leftover:
+            self._commit_batch(leftover)
+
+    def _commit_batch(self, batch: List[_Pending]):
+        start = time.perf_counter()
+        # Batches that touch positions commit and run their post-commit steps under the book's
+        # lock so the book sees trades in id order; other batches leave it to readers
+        locks_book = any(pending.command.locks_position_book for pending in batch)
+        try:
+            with get_position_book().lock if locks_book else contextlib.nullcontext():
+                results = self._apply_batch(batch)
+        except Exception as e:
+            # Fail every future and keep serving the queue rather than letting the thread die
+            print(f"[DatabaseWriter] Batch of {len(batch)} commands failed: {e}")
+            for pending in batch:
+                pending.future.set_exception(e)
+            self.failed += len(batch)
+            return
+
+        for pending, result, error in results:
+            if error is not None:
+                self.failed += 1
+                pending.future.set_exception(error)
+            else:
+                pending.future.set_result(result)
+        self.batches += 1
+        self.commands += len(batch)
+        self.last_batch_ms = (time.perf_counter() - start) * 1000
+        self.last_commit_at = time.monotonic()
+
+    def _apply_batch(self, batch: List[_Pending]) -> List[tuple]:
+        """Run a batch in one transaction, then its post-commit steps. Returns (pending, result, error) per command."""
+        conn = get_db_connection()  # This thread's persistent connection is the write connection
+        cursor = conn.cursor()
+        results = []
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            for pending in batch:
+                cursor.execute("SAVEPOINT write_command")
+                try:
+                    results.append((pending, pending.command.apply(cursor), None))
+                    cursor.execute("RELEASE write_command")
+                except Exception as e:
+                    cursor.execute("ROLLBACK TO write_command")
+                    cursor.execute("RELEASE write_command")
+                    results.append((pending, None, e))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        for pending, result, error in results:
+            if error is None:
+                try:
+                    pending.command.after_commit()
+                except Exception as e:
+                    print(f"[DatabaseWriter] Post-commit step of {type(pending.command).__name__} failed: {e}")
+        return results
+
+
+_writer: Optional[DatabaseWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_db_writer() -> DatabaseWriter:
+    """Returns the process-wide writer, starting its thread on first use."""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = DatabaseWriter()
+                atexit.register(shutdown_db_writer)
+    return _writer
+
+
+def shutdown_db_writer():
+    """Flush and stop the process-wide writer, if it was started."""
+    global _writer
+    with _writer_lock:
+        writer, _writer = _writer, None
+    if writer is not None:
+        writer.close()
@@ -0,0 +1,270 @@
+"""
+In-memory position book, checkpointed to the ``positions`` table.
+
+Positions are kept per (coin, network) and updated in O(1) per fill with the same long/short/
+flip logic as before (database_manager._apply_fill_to_position), so recording a fill no longer
+costs a SELECT plus an UPDATE/INSERT on ``positions``. The ``trades`` table stays the source
+of truth:
+
+    - ``position_checkpoints`` records, per network, the highest trades.id already folded into
+      the ``positions`` rows
+    - on first use of a network the book loads the checkpointed positions and replays only the
+      trades after that id (or every trade, if the network was never checkpointed)
+    - checkpoint() writes the positions changed since the last checkpoint plus the new
+      watermark in one transaction; it runs on an interval and at shutdown
+
+Fills are applied only after their trades have committed, together with the highest trade id
+of that write, so a checkpoint never claims trades whose positions it does not include.
+
+Usage:
+    book = get_position_book()
+    book.apply_fills(new_fills, "mainnet", last_trade_id)
+    book.positions("mainnet")
+    book.checkpoint()
+"""
+
+import atexit
+import threading
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from . import database_manager
+from .database_manager import (
+    _apply_fill_to_position, _fold_fills, _group_fills_by_coin, _sqlite_timestamp as _timestamp, get_db_connection
+)
+
+CHECKPOINT_INTERVAL = 30  # Seconds between checkpoints while positions are changing
+
+Position = Tuple[float, float, float]  # (net_size, average_entry_price, total_cost)
+
+
+class PositionBook:
+    """Per-(coin, network) positions held in memory with a trades.id watermark per network."""
+
+    def __init__(self):
+        self.lock = threading.RLock()  # Held by every writer across its commit and apply_fills
+        self._positions: Dict[Tuple[str, str], Position] = {}
+        self._updated_at: Dict[Tuple[str, str], str] = {}
+        self._last_trade_id: Dict[str, int] = {}
+        self._loaded: Set[str] = set()
+        self._dirty: Set[Tuple[str, str]] = set()
+        self._rewrite: Set[str] = set()  # Networks rebuilt from scratch: replace their rows on checkpoint
+        self._checkpoint_thread: Optional[threading.Thread] = None
+        self._stop_checkpoints = threading.Event()
+
+    def is_loaded(self, network: str) -> bool:
+        return network in self._loaded
+
+    def ensure_loaded(self, network: str):
+        """Load a network's checkpoint and replay the trades recorded after it (first use only)."""
+        if network in self._loaded:
+            return
+        with self.lock:
+            if network in self._loaded:
+                return
+            conn = get_db_connection()
+            cursor = conn.cursor()
+            cursor.execute("SELECT last_trade_id FROM position_checkpoints WHERE network = ?", (network,))
+            row = cursor.fetchone()
+            if row is not None:
+                last_trade_id = row['last_trade_id']
+                cursor.execute("SELECT coin, net_size, average_entry_price, total_cost, last_updated FROM positions WHERE network = ?",
+                               (network,))
+                for position in cursor.fetchall():
+                    key = (position['coin'], network)
+                    self._positions[key] = (position['net_size'], position['average_entry_price'], position['total_cost'])
+                    self._updated_at[key] = position['last_updated']
+            else:
+                last_trade_id = 0
+                self._rewrite.add(network)
+
+            cursor.execute('''
+            SELECT id, coin, side, price, size FROM trades
+            WHERE network = ? AND id > ?
+            ORDER BY timestamp, trade_id
+            ''', (network, last_trade_id))
+            replayed = 0
+            for trade in cursor.fetchall():
+                key = (trade['coin'], network)
+                self._positions[key] = _apply_fill_to_position(self._positions.get(key, (0, 0, 0)), trade['side'],
+                                                               float(trade['price']), float(trade['size']))
+                self._updated_at[key] = _timestamp()
+                self._dirty.add(key)
+                last_trade_id = max(last_trade_id, trade['id'])
+                replayed += 1
+            conn.close()
+
+            self._last_trade_id[network] = last_trade_id
+            self._loaded.add(network)
+            print(f"[PositionBook] Loaded {network}: {sum(1 for key in self._positions if key[1] == network)} positions, "
+                  f"{replayed} trades replayed")
+
+    def reload(self, network: str):
+        """Drop a network's in-memory positions and load them again from its checkpoint."""
+        with self.lock:
+            for key in [key for key in self._positions if key[1] == network]:
+                del self._positions[key]
+                self._updated_at.pop(key, None)
+                self._dirty.discard(key)
+            self._rewrite.discard(network)
+            self._last_trade_id.pop(network, None)
+            self._loaded.discard(network)
+            self.ensure_loaded(network)
+
+    def apply_fills(self, fills: List[Dict[str, Any]], network: str, last_trade_id: int) -> int:
+        """
+        Fold committed fills into the book.
+
+        Args:
+            fills: Fills whose trades rows have just been committed
+            network: 'mainnet' or 'testnet'
+            last_trade_id: Highest trades.id written by that commit
+
+        Returns:
+            int: Number of positions updated
+        """
+        with self.lock:
+            if network not in self._loaded:
+                self.ensure_loaded(network)  # Replays these fills too, they are already committed
+                return 0
+            if last_trade_id <= self._last_trade_id.get(network, 0):
+                return 0  # Already included by a replay
+            fills_by_coin = _group_fills_by_coin(fills)
+            now = _timestamp()
+            for coin, coin_fills in fills_by_coin.items():
+                key = (coin, network)
+                self._positions[key] = _fold_fills(self._positions.get(key, (0, 0, 0)), coin_fills)
+                self._updated_at[key] = now
+                self._dirty.add(key)
+                net_size, avg_entry, _ = self._positions[key]
+                print(f"[PositionBook] Updated position for {coin} on {network}: Net Size: {net_size:.4f}, Avg Entry: {avg_entry:.2f}")
+            self._last_trade_id[network] = last_trade_id
+            return len(fills_by_coin)
+
+    def positions(self, network: str) -> List[Dict[str, Any]]:
+        """Open positions for a network, in the same shape as the positions table rows."""
+        self.ensure_loaded(network)
+        with self.lock:
+            return [
+                {"coin": coin, "net_size": net_size, "average_entry_price": avg_entry,
+                 "total_cost": total_cost, "last_updated": self._updated_at.get((coin, net))}
+                for (coin, net), (net_size, avg_entry, total_cost) in self._positions.items()
+                if net == network and net_size != 0
+            ]
+
+    @property
+    def dirty(self) -> bool:
+        return bool(self._dirty) or bool(self._rewrite)
+
+    def checkpoint(self) -> int:
+        """
+        Write changed positions and the trades.id watermark of each changed network in one
+        transaction on the calling thread's connection.
+
+        Returns:
+            int: Number of positions written
+        """
+        with self.lock:
+            if not self.dirty:
+                return 0
+            dirty = set(self._dirty)
+            networks = {network for _, network in dirty} | set(self._rewrite)
+            rows = [(coin, network, *self._positions[(coin, network)], self._updated_at.get((coin, network)))
+                    for coin, network in dirty]
+            watermarks = [(network, self._last_trade_id.get(network, 0)) for network in networks]
+            rewrite = set(self._rewrite)
+
+            conn = get_db_connection()
+            cursor = conn.cursor()
+            try:
+                for network in rewrite:
+                    cursor.execute("DELETE FROM positions WHERE network = ?", (network,))
+                    rows.extend((coin, net, *position, self._updated_at.get((coin, net)))
+                                for (coin, net), position in self._positions.items()
+                                if net == network and (coin, net) not in dirty)
+                cursor.executemany('''
+                INSERT INTO positions (coin, network, net_size, average_entry_price, total_cost, last_updated)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(coin, network) DO UPDATE SET
+                    net_size = excluded.net_size,
+                    average_entry_price = excluded.average_entry_price,
+                    total_cost = excluded.total_cost,
+                    last_updated = excluded.last_updated
+                ''', rows)
+                cursor.executemany('''
+                INSERT INTO position_checkpoints (network, last_trade_id, checkpointed_at)
+                VALUES (?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(network) DO UPDATE SET
+                    last_trade_id = excluded.last_trade_id,
+                    checkpointed_at = excluded.checkpointed_at
+                ''', watermarks)
+                conn.commit()
+            except Exception as e:
+                print(f"[PositionBook] Checkpoint failed: {e}")
+                conn.rollback()
+                raise
+            finally:
+                conn.close()
+
+            self._dirty -= dirty
+            self._rewrite -= rewrite
+            return len(rows)
+
+    def start_checkpoints(self, submit: Optional[Callable[[], Any]] = None, interval: float = CHECKPOINT_INTERVAL):
+        """
+        Checkpoint every `interval` seconds while there are changes.
+
+        Args:
+            submit: Runs the checkpoint (e.g. queues it on the DatabaseWriter); defaults to
+                    calling checkpoint() on the timer thread
+            interval: Seconds between checkpoints
+        """
+        if self._checkpoint_thread is not None and self._checkpoint_thread.is_alive():
+            return
+        run = submit if submit is not None else self.checkpoint
+        self._stop_checkpoints.clear()
+
+        def loop():
+            while not self._stop_checkpoints.wait(interval):
+                if self.dirty:
+                    try:
+                        run()
+                    except Exception as e:
+                        print(f"[PositionBook] Periodic checkpoint failed: {e}")
+
+        self._checkpoint_thread = threading.Thread(target=loop, name="PositionCheckpoints", daemon=True)
+        self._checkpoint_thread.start()
+
+    def stop_checkpoints(self, final_checkpoint: bool = True):
+        """
+        Stop the periodic checkpoints and write a final one.
+
+        Args:
+            final_checkpoint: Write the final checkpoint now; pass False when the caller writes
+                              it later (e.g. after stopping the writer the timer submits to)
+        """
+        self._stop_checkpoints.set()
+        if self._checkpoint_thread is not None:
+            self._checkpoint_thread.join(timeout=5)
+            self._checkpoint_thread = None
+        if not final_checkpoint:
+            return
+        written = self.checkpoint()
+        if written:
+            print(f"[PositionBook] Final checkpoint wrote {written} positions.")
+
+
+_books: Dict[str, PositionBook] = {}
+_books_lock = threading.Lock()
+
+
+def get_position_book() -> PositionBook:
+    """Returns the process-wide position book for the current database file, creating it on first use."""
+    path = database_manager.DATABASE_NAME
+    book = _books.get(path)
+    if book is None:
+        with _books_lock:
+            book = _books.get(path)
+            if book is None:
+                book = _books[path] = PositionBook()
+                atexit.register(book.checkpoint)
+    return book
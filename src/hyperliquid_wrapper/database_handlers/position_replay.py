@@ -0,0 +1,347 @@
+"""
+Vectorized replay of the trades table into positions and realized PnL.
+
+Rebuilding positions by folding fills one at a time (database_manager._apply_fill_to_position)
+is a Python loop per fill. This engine loads a network's trades in columnar form and computes
+every coin's path in numpy passes, reproducing the incremental rules exactly:
+
+    - net size is a running sum of signed sizes, restarted from exactly 0 whenever the
+      position closes (|net| < 1e-9); each position's sum is its own cumsum, so closes and the
+      net path match the incremental fold bit for bit (see _running_net)
+    - the cost basis is a running sum of signed trade values, restarted from 0 on a close and
+      from price * net on a flip (long -> short or short -> long), again one cumsum per position
+    - the average entry is recomputed on trades that add to the position (|cost / net|, or
+      cost / net for buys), set to the price on a flip, and carried forward on reductions
+
+Realized PnL is booked on the reducing part of each trade against the average entry before it:
+(price - avg_entry) * closed_size for longs, the reverse for shorts. The exchange's own
+closedPnl is summed alongside for comparison.
+
+Usage:
+    from .position_replay import replay_network, verify_replay, rebuild_positions
+
+    summary = replay_network("mainnet")       # {coin: {...}}
+    verify_replay("mainnet")                  # Compare with the incremental logic
+    rebuild_positions("mainnet")              # Replace positions + checkpoint watermark
+
+    python -m src.hyperliquid_wrapper.database_handlers.position_replay --network mainnet [--rebuild]
+"""
+
+import sqlite3
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from .database_manager import _apply_fill_to_position, get_current_network, get_db_connection
+from .db_writer import WriteCommand, get_db_writer
+from .position_book import get_position_book
+
+ZERO_SIZE = 1e-9          # Same flat-position threshold as _apply_fill_to_position
+VERIFY_TOLERANCE = 1e-6   # Relative tolerance when comparing with the incremental replay
+
+
+def _forward_fill(values: np.ndarray, mask: np.ndarray, initial: float) -> np.ndarray:
+    """values[j] for the last j <= i where mask[j], or `initial` before the first such j."""
+    idx = np.where(mask, np.arange(1, len(values) + 1), 0)
+    np.maximum.accumulate(idx, out=idx)
+    return np.concatenate(([initial], values))[idx]
+
+
+def _segmented_cumsum(values: np.ndarray, starts: np.ndarray, initial: np.ndarray) -> np.ndarray:
+    """
+    Running sum of values restarted at every index in ``starts`` (sorted, beginning with 0),
+    segment k summing on from initial[k]. The additions happen left to right within each
+    segment, as a one-fill-at-a-time fold does them, so the result matches the fold bit for
+    bit: segments are laid out as rows (grouped by length, so padding at most doubles the work)
+    and summed along each row.
+    """
+    lengths = np.diff(np.append(starts, len(values)))
+    width_class = np.ceil(np.log2(lengths + 1)).astype(np.int64)  # Row width 2**class holds initial + segment
+    out = np.empty(len(values))
+    for cls in np.unique(width_class):
+        rows = np.flatnonzero(width_class == cls)
+        offsets = np.arange(2 ** int(cls) - 1)
+        valid = offsets < lengths[rows, None]
+        idx = (starts[rows, None] + offsets)[valid]
+        grid = np.zeros((len(rows), len(offsets) + 1))
+        grid[:, 0] = initial[rows]
+        grid[:, 1:][valid] = values[idx]
+        out[idx] = np.cumsum(grid, axis=1)[:, 1:][valid]
+    return out
+
+
+def _running_net(signed_size: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Net size after each fill and the mask of fills that close the position, decided as the
+    incremental fold decides them: the net restarts from exactly 0 after a close, and a close is
+    |net| < ZERO_SIZE on that restarted sum. One cumsum over all fills (whose float residue
+    carries across closes) proposes the closes; the restarted sums then confirm or correct them.
+    Every pass is exact up to its first correction, so this settles in a pass or two.
+    """
+    n = len(signed_size)
+    steps = np.arange(1, n + 1)
+    # Residue of the global sum: below ZERO_SIZE per earlier close plus the float error of both sums
+    slack = ZERO_SIZE * steps + 2 * np.finfo(np.float64).eps * steps * np.cumsum(np.abs(signed_size))
+    closes = np.abs(np.cumsum(signed_size)) < slack
+    while True:
+        starts = np.concatenate(([0], np.flatnonzero(closes[:-1]) + 1))
+        net = _segmented_cumsum(signed_size, starts, np.zeros(len(starts)))
+        flat = np.abs(net) < ZERO_SIZE
+        wrong = np.flatnonzero(flat != closes)
+        if len(wrong) == 0:
+            break
+        closes[wrong[0]:] = flat[wrong[0]:]
+    net[closes] = 0.0
+    return net, closes
+
+
+def _restarting_cumsum(values: np.ndarray, restarts: np.ndarray, restart_values: np.ndarray) -> np.ndarray:
+    """Running sum of values, set to restart_values[i] at every i in restarts and summed on from there."""
+    starts = np.flatnonzero(restarts)
+    initial = restart_values[starts]
+    if not restarts[0]:
+        starts, initial = np.concatenate(([0], starts)), np.concatenate(([0.0], initial))
+    return _segmented_cumsum(np.where(restarts, 0.0, values), starts, initial)
+
+
+def replay_fills(sides: np.ndarray, prices: np.ndarray, sizes: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Replay one coin's fills (in time order) from a flat position.
+
+    Args:
+        sides: 'B' / 'A' per fill
+        prices: Fill prices
+        sizes: Fill sizes (positive)
+
+    Returns:
+        dict of per-fill arrays after each fill: net_size, average_entry_price, total_cost,
+        realized_pnl (booked by that fill)
+    """
+    n = len(sizes)
+    if n == 0:
+        empty = np.zeros(0)
+        return {"net_size": empty, "average_entry_price": empty, "total_cost": empty, "realized_pnl": empty}
+
+    is_buy = sides == "B"
+    signed_size = np.where(is_buy, sizes, -sizes)
+    signed_value = signed_size * prices
+
+    net, closes = _running_net(signed_size)
+    prev_net = np.concatenate(([0.0], net[:-1]))
+
+    adding = np.where(is_buy, prev_net >= 0, prev_net <= 0) & ~closes
+    flips = (np.sign(net) * np.sign(prev_net) < 0) & ~closes
+
+    # Cost basis: signed value summed since the last close (from 0) or flip (from price * net)
+    cost = _restarting_cumsum(signed_value, closes | flips, np.where(flips, prices * net, 0.0))
+
+    # Average entry: recomputed when adding, price on a flip, 0 when flat, carried otherwise
+    with np.errstate(divide="ignore", invalid="ignore"):
+        adding_avg = np.where(is_buy, cost / net, np.abs(cost / net))
+    avg_set = adding | flips | closes
+    avg_value = np.where(flips, prices, np.where(closes, 0.0, adding_avg))
+    avg = _forward_fill(avg_value, avg_set, 0.0)
+
+    # Realized PnL on the part of each trade that reduces the previous position
+    prev_avg = np.concatenate(([0.0], avg[:-1]))
+    closed_size = np.where(adding, 0.0, np.minimum(sizes, np.abs(prev_net)))
+    realized = (prices - prev_avg) * closed_size * np.sign(prev_net)
+
+    return {"net_size": net, "average_entry_price": avg, "total_cost": cost, "realized_pnl": realized}
+
+
+def load_trades(network: str) -> Dict[str, np.ndarray]:
+    """
+    Load a network's trades as columns, ordered by fill time. Coins are returned as integer
+    codes into ``coins`` so grouping never sorts strings.
+    """
+    conn = get_db_connection()
+    try:
+        return _read_trades(conn.cursor(), network)
+    finally:
+        conn.close()
+
+
+def _read_trades(cursor: sqlite3.Cursor, network: str) -> Dict[str, np.ndarray]:
+    """load_trades on the caller's cursor (e.g. inside a writer transaction)."""
+    cursor.execute('''
+    SELECT id, coin, side, price, size, COALESCE(fee, 0), COALESCE(closed_pnl, 0)
+    FROM trades
+    WHERE network = ?
+    ORDER BY timestamp, trade_id
+    ''', (network,))
+    rows = cursor.fetchall()
+
+    if not rows:
+        return {"id": np.zeros(0, dtype=np.int64), "coin_code": np.zeros(0, dtype=np.int32), "coins": [],
+                "side": np.zeros(0, dtype="<U1"), "price": np.zeros(0), "size": np.zeros(0), "fee": np.zeros(0),
+                "closed_pnl": np.zeros(0)}
+    ids, coins, sides, prices, sizes, fees, closed_pnls = zip(*rows)
+    coin_codes: Dict[str, int] = {}
+    return {
+        "id": np.array(ids, dtype=np.int64),
+        "coin_code": np.array([coin_codes.setdefault(coin, len(coin_codes)) for coin in coins], dtype=np.int32),
+        "coins": list(coin_codes),
+        "side": np.array(sides, dtype="<U1"),
+        "price": np.array(prices, dtype=np.float64),
+        "size": np.array(sizes, dtype=np.float64),
+        "fee": np.array(fees, dtype=np.float64),
+        "closed_pnl": np.array(closed_pnls, dtype=np.float64)
+    }
+
+
+def replay_network(network: str = None, trades: Optional[Dict[str, np.ndarray]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Replay every trade of a network.
+    If network is not provided, uses the current network context.
+
+    Returns:
+        dict: coin -> {net_size, average_entry_price, total_cost, realized_pnl, fees,
+                       exchange_closed_pnl, trades}
+    """
+    if network is None:
+        network = get_current_network()
+    trades = trades if trades is not None else load_trades(network)
+
+    summary = {}
+    codes = trades["coin_code"]
+    if len(codes) == 0:
+        return summary
+    order = np.argsort(codes, kind="stable")  # Group by coin, keep time order within
+    boundaries = np.flatnonzero(np.diff(codes[order])) + 1
+    for idx in np.split(order, boundaries):
+        path = replay_fills(trades["side"][idx], trades["price"][idx], trades["size"][idx])
+        summary[trades["coins"][codes[idx[0]]]] = {
+            "net_size": float(path["net_size"][-1]),
+            "average_entry_price": float(path["average_entry_price"][-1]),
+            "total_cost": float(path["total_cost"][-1]),
+            "realized_pnl": float(path["realized_pnl"].sum()),
+            "fees": float(trades["fee"][idx].sum()),
+            "exchange_closed_pnl": float(trades["closed_pnl"][idx].sum()),
+            "trades": int(len(idx))
+        }
+    return summary
+
+
+def _incremental_replay(trades: Dict[str, np.ndarray]) -> Dict[str, tuple]:
+    """Reference: fold every trade through _apply_fill_to_position, one at a time."""
+    positions = {}
+    for code, side, price, size in zip(trades["coin_code"], trades["side"], trades["price"], trades["size"]):
+        positions[code] = _apply_fill_to_position(positions.get(code, (0, 0, 0)), side, float(price), float(size))
+    return {trades["coins"][code]: position for code, position in positions.items()}
+
+
+def verify_replay(network: str = None, tolerance: float = VERIFY_TOLERANCE) -> Dict[str, Any]:
+    """
+    Compare the vectorized replay with the incremental logic over a network's trades.
+    If network is not provided, uses the current network context.
+
+    Returns:
+        dict: {"ok", "coins", "trades", "mismatches": [{coin, field, vectorized, incremental}]}
+    """
+    if network is None:
+        network = get_current_network()
+    trades = load_trades(network)
+    vectorized = replay_network(network, trades)
+    incremental = _incremental_replay(trades)
+
+    mismatches = []
+    for coin, expected in incremental.items():
+        got = vectorized.get(coin, {})
+        for field, want in zip(("net_size", "average_entry_price", "total_cost"), expected):
+            have = got.get(field)
+            if have is None or not np.isclose(have, want, rtol=tolerance, atol=tolerance):
+                mismatches.append({"coin": coin, "field": field, "vectorized": have, "incremental": want})
+
+    return {"ok": not mismatches, "coins": len(incremental), "trades": int(len(trades["id"])), "mismatches": mismatches}
+
+
+@dataclass
+class RebuildPositions(WriteCommand):
+    """
+    Replay a network's trades into its positions rows and move the checkpoint watermark to the
+    newest trade. Runs on the writer, so no fill can commit between the replay and the watermark.
+    Result: the replay summary per coin.
+    """
+    network: Optional[str] = None
+
+    locks_position_book = True
+
+    def resolve(self):
+        if self.network is None:
+            self.network = get_current_network()
+
+    def apply(self, cursor: sqlite3.Cursor) -> Dict[str, Dict[str, Any]]:
+        trades = _read_trades(cursor, self.network)
+        summary = replay_network(self.network, trades)
+        last_trade_id = int(trades["id"].max()) if len(trades["id"]) else 0
+
+        cursor.execute("DELETE FROM positions WHERE network = ?", (self.network,))
+        cursor.executemany('''
+        INSERT INTO positions (coin, network, net_size, average_entry_price, total_cost, last_updated)
+        VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+        ''', [(coin, self.network, s["net_size"], s["average_entry_price"], s["total_cost"])
+              for coin, s in summary.items()])
+        cursor.execute('''
+        INSERT INTO position_checkpoints (network, last_trade_id, checkpointed_at)
+        VALUES (?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT(network) DO UPDATE SET
+            last_trade_id = excluded.last_trade_id,
+            checkpointed_at = excluded.checkpointed_at
+        ''', (self.network, last_trade_id))
+        self.trades = len(trades["id"])
+        return summary
+
+    def after_commit(self):
+        get_position_book().reload(self.network)
+
+
+def rebuild_positions(network: str = None, verify: bool = True) -> Dict[str, Dict[str, Any]]:
+    """
+    Replace a network's positions rows with a full replay of its trades and move the
+    position_checkpoints watermark to the newest trade, in one writer transaction.
+    If network is not provided, uses the current network context.
+
+    Args:
+        network: 'mainnet' or 'testnet'
+        verify: Check the replay against the incremental logic first; raises ValueError on mismatch
+
+    Returns:
+        dict: The replay summary per coin
+    """
+    if network is None:
+        network = get_current_network()
+    if verify:
+        report = verify_replay(network)
+        if not report["ok"]:
+            raise ValueError(f"Vectorized replay disagrees with incremental replay: {report['mismatches'][:5]}")
+
+    command = RebuildPositions(network)
+    try:
+        summary = get_db_writer().submit(command).result()
+    except Exception as e:
+        print(f"[PositionReplay] Error rebuilding positions for {network}: {e}")
+        raise
+
+    print(f"[PositionReplay] Rebuilt {len(summary)} positions on {network} from {command.trades} trades")
+    return summary
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Replay the trades table into positions")
+    parser.add_argument("--network", choices=["mainnet", "testnet"], default=None)
+    parser.add_argument("--rebuild", action="store_true", help="Replace the positions rows after verifying")
+    args = parser.parse_args()
+
+    report = verify_replay(args.network)
+    print(f"Verified {report['trades']} trades over {report['coins']} coins: {'OK' if report['ok'] else 'MISMATCH'}")
+    for mismatch in report["mismatches"]:
+        print(f"  {mismatch}")
+    for coin, position in replay_network(args.network).items():
+        print(f"  {coin}: net {position['net_size']:.6f} @ {position['average_entry_price']:.4f}, "
+              f"realized {position['realized_pnl']:.2f} (exchange {position['exchange_closed_pnl']:.2f}), fees {position['fees']:.2f}")
+    if args.rebuild and report["ok"]:
+        rebuild_positions(args.network, verify=False)
@@ -140,9 +140,19 @@ class ResponseManager:
         
         # Format based on function name
         if function_name == "get_all_trades_from_db":
-            trades = result.get("result", [])
+            page = result.get("result") or {}
+            trades = page.get("trades", []) if isinstance(page, dict) else page
             if isinstance(trades, list) and len(trades) > 0:
                 message = f"Found {len(trades)} trades in the database."
+                if isinstance(page, dict) and page.get("next_cursor"):
+                    message += " More trades are available."
+            else:
+                message = "No trades found in the database."
+                
+        elif function_name == "get_trade_summary_from_db":
+            total = (result.get("result") or {}).get("total", {})
+            if total.get("trade_count"):
+                message = f"Summarized {total['trade_count']} trades across {len(result['result']['by_coin'])} coins."
             else:
                 message = "No trades found in the database."
                 
@@ -7,16 +7,29 @@ and arguments provided by the LLM.
 import json
 import sys
 import os
+import time
 from typing import Dict, Any, Optional
 
 # Add parent directories to path to import from other modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
 
 from src.hyperliquid_wrapper.database_handlers.database_manager import (
-    get_all_trades, get_current_positions
+    aggregate_trades, get_current_positions, query_trades
 )
 from src.config import config
 
+# Trade columns returned to the LLM unless it asks for others, and its page size bounds
+TOOL_TRADE_COLUMNS = ["timestamp", "coin", "side", "price", "size", "fee", "closed_pnl", "dir"]
+TOOL_TRADE_PAGE_SIZE = 20
+TOOL_MAX_TRADE_PAGE_SIZE = 200
+
+
+def _lookback_start(days: Optional[float]) -> Optional[int]:
+    """Start of an N-day lookback window in ms, or None for no bound."""
+    if not days:
+        return None
+    return int((time.time() - float(days) * 86400) * 1000)
+
 
 class ToolHandler:
     """Handles the execution of tool calls from the LLM."""
@@ -26,6 +39,7 @@ class ToolHandler:
         # Map function names to their handlers
         self.tool_map = {
             "get_all_trades_from_db": self._handle_get_all_trades,
+            "get_trade_summary_from_db": self._handle_get_trade_summary,
             "get_current_positions_from_db": self._handle_get_current_positions,
         }
         
@@ -93,10 +107,24 @@ class ToolHandler:
     
     # Data tool handlers
     def _handle_get_all_trades(self, args: Dict[str, Any]) -> Any:
-        """Handle get_all_trades_from_db tool call."""
+        """Handle get_all_trades_from_db tool call: one filtered, projected page of trades."""
         # Network will be determined by the current context
-        trades = get_all_trades()
-        return trades
+        limit = min(int(args.get("limit") or TOOL_TRADE_PAGE_SIZE), TOOL_MAX_TRADE_PAGE_SIZE)
+        return query_trades(
+            coin=(args.get("coin") or "").upper() or None,
+            side=args.get("side"),
+            start_time=_lookback_start(args.get("days")),
+            columns=args.get("columns") or TOOL_TRADE_COLUMNS,
+            limit=limit,
+            cursor=args.get("cursor")
+        )
+    
+    def _handle_get_trade_summary(self, args: Dict[str, Any]) -> Any:
+        """Handle get_trade_summary_from_db tool call."""
+        return aggregate_trades(
+            coin=(args.get("coin") or "").upper() or None,
+            start_time=_lookback_start(args.get("days"))
+        )
     
     def _handle_get_current_positions(self, args: Dict[str, Any]) -> Any:
         """Handle get_current_positions_from_db tool call."""
@@ -93,7 +93,8 @@ class LLMClient:
 1. **Answer questions about trading, markets, and crypto**: You can respond to general queries and provide information about trading, markets, and the application.
 
 2. **Query the database for trade history and positions**: You can access the local database to retrieve:
-   - Trading history (get_all_trades_from_db)
+   - Trading history, one filtered page at a time (get_all_trades_from_db)
+   - Trade totals per coin: count, volume, fees, realized PnL (get_trade_summary_from_db)
    - Current positions (get_current_positions_from_db)
 
 3. **Display UI components for charts, portfolio, and trading**: You can display interactive UI components in the main panel:
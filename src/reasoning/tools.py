@@ -7,10 +7,36 @@ def get_database_query_tools():
             "type": "function",
             "function": {
                 "name": "get_all_trades_from_db",
-                "description": "Retrieves all recorded trade history from the local database, ordered by most recent first. Use this to see past trades.",
+                "description": "Retrieves one page of recorded trades from the local database, most recent first. Filter by coin, side or lookback window and request only the columns you need. If the result has a next_cursor, pass it back as 'cursor' to get the following page. For totals (count, volume, fees, PnL) use get_trade_summary_from_db instead of paging through trades.",
                 "parameters": {
                     "type": "object",
-                    "properties": {}, # No parameters for this function
+                    "properties": {
+                        "coin": {"type": "string", "description": "Only trades of this coin, e.g. 'BTC'."},
+                        "side": {"type": "string", "description": "Only buys or only sells.", "enum": ["buy", "sell"]},
+                        "days": {"type": "number", "description": "Only trades from the last N days."},
+                        "limit": {"type": "integer", "description": "Number of trades to return (default 20, max 200).", "default": 20},
+                        "cursor": {"type": "string", "description": "next_cursor from a previous call, to fetch the next page."},
+                        "columns": {
+                            "type": "array",
+                            "items": {"type": "string", "enum": ["timestamp", "coin", "side", "price", "size", "fee", "closed_pnl", "dir", "trade_id", "order_id"]},
+                            "description": "Columns to return. Defaults to timestamp, coin, side, price, size, fee, closed_pnl, dir."
+                        }
+                    },
+                    "required": []
+                }
+            }
+        },
+        {
+            "type": "function",
+            "function": {
+                "name": "get_trade_summary_from_db",
+                "description": "Summarizes recorded trades per coin (trade count, buys/sells, volume, fees, realized PnL, first and last trade time) plus overall totals, computed in the database. Use this for questions about totals or performance.",
+                "parameters": {
+                    "type": "object",
+                    "properties": {
+                        "coin": {"type": "string", "description": "Only this coin, e.g. 'BTC'."},
+                        "days": {"type": "number", "description": "Only trades from the last N days."}
+                    },
                     "required": []
                 }
             }
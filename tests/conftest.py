@@ -0,0 +1,28 @@
+"""
+Shared fixtures. Tests run against a fresh SQLite file per test; nothing touches the real
+trading database or the network.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.hyperliquid_wrapper.database_handlers import database_manager, position_book
+from src.hyperliquid_wrapper.database_handlers.db_writer import shutdown_db_writer
+
+
+@pytest.fixture
+def temp_db(tmp_path, monkeypatch):
+    """Point the database handlers at an initialized database file under tmp_path."""
+    monkeypatch.setattr(database_manager, "DATABASE_NAME", str(tmp_path / "trading_data.db"))
+    database_manager.initialize_database()
+    yield database_manager.DATABASE_NAME
+    shutdown_db_writer()  # Sync writes start the process-wide writer; commit its queue into this file
+    # Books checkpoint at exit against whatever DATABASE_NAME is then; leave this one clean
+    book = position_book._books.get(database_manager.DATABASE_NAME)
+    if book is not None:
+        book.checkpoint()
+    database_manager.close_all_connections()
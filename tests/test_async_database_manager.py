@@ -0,0 +1,42 @@
+"""Event-loop behaviour of AsyncDBManager (async_database_manager)."""
+
+import asyncio
+import threading
+
+from src.hyperliquid_wrapper.database_handlers import database_manager
+from src.hyperliquid_wrapper.database_handlers.async_database_manager import AsyncDBManager
+from src.hyperliquid_wrapper.database_handlers.position_book import get_position_book
+
+
+def test_positions_read_does_not_block_the_loop_on_the_book_lock(temp_db):
+    database_manager.add_trades_bulk([{"coin": "BTC", "side": "B", "px": "100", "sz": "2", "time": 1_700_000_000_000,
+                                        "tid": 1, "oid": 1, "fee": "0", "closedPnl": "0"}], "testnet")
+    book = get_position_book()
+    book.positions("testnet")  # Loaded: the read only has to wait for the lock
+    locked, release = threading.Event(), threading.Event()
+
+    def hold_lock():
+        # As the writer does while it commits a batch
+        with book.lock:
+            locked.set()
+            release.wait(5)
+
+    async def read_while_locked():
+        manager = AsyncDBManager(readers=1)
+        holder = threading.Thread(target=hold_lock)
+        holder.start()
+        locked.wait(5)
+        try:
+            read = asyncio.ensure_future(manager.get_current_positions("testnet"))
+            await asyncio.sleep(0.05)  # Only runs if the read is not blocking the loop
+            assert not read.done()
+            release.set()
+            return await asyncio.wait_for(read, 5)
+        finally:
+            release.set()
+            holder.join()
+            await manager.close()
+
+    positions = asyncio.run(read_while_locked())
+
+    assert [(p["coin"], p["net_size"]) for p in positions] == [("BTC", 2.0)]
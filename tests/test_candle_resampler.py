@@ -0,0 +1,64 @@
+"""Source interval selection and OHLCV resampling (candle_resampler)."""
+
+import pytest
+
+from src.hyperliquid_wrapper.data_handlers.candle_resampler import resample_candles, select_source_interval
+from src.hyperliquid_wrapper.database_handlers.candle_store import interval_to_ms
+
+HOUR = interval_to_ms("1h")
+DAY = interval_to_ms("1d")
+DAY_START = 1_600_000_000_000 // DAY * DAY  # An epoch-aligned UTC midnight
+
+
+def _candle(t, o, h, l, c, v=1.0, n=1):
+    return {"t": t, "T": t + HOUR - 1, "s": "BTC", "i": "1h", "o": o, "h": h, "l": l, "c": c, "v": v, "n": n}
+
+
+def test_select_source_interval_picks_the_finest_divisor_within_the_candle_cap():
+    assert select_source_interval("4h", 3 * DAY) == "1m"       # 4320 one-minute candles
+    assert select_source_interval("4h", 10 * DAY) == "3m"      # 14400 one-minute candles would not fit
+    assert select_source_interval("1d", 365 * DAY) == "2h"
+    assert select_source_interval("1h", 10 * 365 * DAY) == "1h"  # Nothing finer fits: fetch directly
+    assert select_source_interval("1w", DAY) == "1w"           # Not resampled
+
+
+def test_resampled_bucket_aggregates_its_source_candles():
+    candles = [
+        _candle(DAY_START, 10, 12, 9, 11, v=1.5, n=3),
+        _candle(DAY_START + HOUR, 11, 15, 10, 14, v=2.0, n=4),
+        _candle(DAY_START + 2 * HOUR, 14, 14, 7, 8, v=0.5, n=1),
+        _candle(DAY_START + 3 * HOUR, 8, 9, 8, 9, v=1.0, n=2),
+    ]
+
+    [bucket] = resample_candles(candles, "1h", "4h", now_ms=DAY_START + DAY)
+
+    assert bucket == {"t": DAY_START, "T": DAY_START + 4 * HOUR - 1, "s": "BTC", "i": "4h", "o": 10.0,
+                      "h": 15.0, "l": 7.0, "c": 9.0, "v": 5.0, "n": 10, "partial": False}
+
+
+def test_buckets_are_aligned_to_the_epoch_and_flag_missing_source_candles():
+    # Starts mid-bucket (02:00) and skips 09:00
+    hours = [2, 3, 4, 5, 6, 7, 8, 10, 11]
+    candles = [_candle(DAY_START + h * HOUR, h, h + 1, h - 1, h + 0.5) for h in hours]
+
+    buckets = resample_candles(candles, "1h", "4h", now_ms=DAY_START + DAY)
+
+    assert [b["t"] for b in buckets] == [DAY_START, DAY_START + 4 * HOUR, DAY_START + 8 * HOUR]
+    assert [b["partial"] for b in buckets] == [True, False, True]
+    assert (buckets[0]["o"], buckets[0]["c"]) == (2.0, 3.5)
+    assert (buckets[2]["o"], buckets[2]["c"]) == (8.0, 11.5)
+
+
+def test_the_open_bucket_is_partial_even_with_all_its_source_candles():
+    candles = [_candle(DAY_START + h * HOUR, 1, 2, 0.5, 1.5) for h in range(8)]
+    now = DAY_START + 7 * HOUR + HOUR // 2  # Inside the last source candle
+
+    buckets = resample_candles(candles, "1h", "4h", now_ms=now)
+
+    assert [b["partial"] for b in buckets] == [False, True]
+
+
+def test_resample_rejects_targets_that_are_not_multiples_of_the_source():
+    with pytest.raises(ValueError):
+        resample_candles([_candle(DAY_START, 1, 1, 1, 1)], "3m", "5m")
+    assert resample_candles([], "1h", "4h") == []
@@ -0,0 +1,123 @@
+"""Candle store gap planning, persistence and windowed streaming (candle_store)."""
+
+import asyncio
+
+from src.hyperliquid_wrapper.database_handlers.candle_store import CandleStore, interval_to_ms
+
+HOUR = interval_to_ms("1h")
+START = 1_600_000_000_000 // HOUR * HOUR  # Long closed: every candle in these tests is final
+
+
+class FakeUpstream:
+    """
+    Returns one candle per interval step in the requested range (at most ``limit``, from the
+    first, like Hyperliquid's per-request cap) and counts what it served.
+    """
+
+    def __init__(self, step: int = HOUR, limit: int = None, first_candle: int = None):
+        self.step = step
+        self.limit = limit
+        self.first_candle = first_candle  # No candles before this (e.g. before a listing)
+        self.calls = []
+        self.candles_served = 0
+
+    def candles(self, start: int, end: int):
+        self.calls.append((start, end))
+        t = -(-max(start, self.first_candle or start) // self.step) * self.step
+        candles = []
+        while t <= end and (self.limit is None or len(candles) < self.limit):
+            candles.append({"t": t, "T": t + self.step - 1, "o": "1", "h": "2", "l": "0.5", "c": "1.5", "v": "3", "n": 1})
+            t += self.step
+        self.candles_served += len(candles)
+        return candles
+
+    async def fetch(self, start: int, end: int):
+        return self.candles(start, end)
+
+
+def test_get_candles_fetches_only_missing_ranges(temp_db):
+    store, upstream = CandleStore(), FakeUpstream()
+    first = store.get_candles("mainnet", "BTC", "1h", START, START + 99 * HOUR, upstream.candles)
+    assert len(first) == 100 and upstream.calls == [(START, START + 100 * HOUR - 1)]
+
+    upstream.calls.clear()
+    second = store.get_candles("mainnet", "BTC", "1h", START + 50 * HOUR, START + 149 * HOUR, upstream.candles)
+    assert [c["t"] for c in second] == [START + i * HOUR for i in range(50, 150)]
+    assert upstream.calls == [(START + 100 * HOUR, START + 150 * HOUR - 1)]
+
+
+def test_truncated_response_is_continued_and_only_returned_candles_are_covered(temp_db):
+    store, upstream = CandleStore(max_candles_per_request=300), FakeUpstream(limit=300)
+
+    candles = store.get_candles("mainnet", "BTC", "1h", START, START + 999 * HOUR, upstream.candles)
+
+    assert [c["t"] for c in candles] == [START + i * HOUR for i in range(1000)]
+    assert [start for start, _ in upstream.calls] == [START + i * HOUR for i in (0, 300, 600, 900)]
+
+    upstream.limit = None
+    store.save_candles("mainnet", "BTC", "1h", (START + 1000 * HOUR, START + 2000 * HOUR),
+                       upstream.candles(START + 1000 * HOUR, START + 1499 * HOUR))
+    assert store.missing_ranges("mainnet", "BTC", "1h", START, START + 1999 * HOUR) == [
+        (START + 1500 * HOUR, START + 2000 * HOUR)]
+
+
+def test_complete_response_covers_ranges_without_candles(temp_db):
+    store, upstream = CandleStore(), FakeUpstream(first_candle=START + 50 * HOUR)
+
+    candles = store.get_candles("mainnet", "BTC", "1h", START, START + 99 * HOUR, upstream.candles)
+    assert len(candles) == 50 and len(upstream.calls) == 1
+    assert store.missing_ranges("mainnet", "BTC", "1h", START, START + 99 * HOUR) == []
+
+    # Nothing listed yet: the empty range is covered and not fetched again
+    upstream.first_candle = START + 1000 * HOUR
+    upstream.calls.clear()
+    assert store.get_candles("mainnet", "ETH", "1h", START, START + 9 * HOUR, upstream.candles) == []
+    assert store.get_candles("mainnet", "ETH", "1h", START, START + 9 * HOUR, upstream.candles) == []
+    assert len(upstream.calls) == 1
+
+
+def test_complete_response_is_covered_only_up_to_the_open_candle(temp_db):
+    store, upstream = CandleStore(), FakeUpstream()
+    now = START + 10 * HOUR + HOUR // 2  # Inside the candle opening at START + 10h
+
+    store.save_candles("mainnet", "BTC", "1h", (START, START + 20 * HOUR),
+                       upstream.candles(START, START + 10 * HOUR), now_ms=now)
+
+    assert store.missing_ranges("mainnet", "BTC", "1h", START, START + 19 * HOUR, now_ms=now) == [
+        (START + 10 * HOUR, START + 20 * HOUR)]
+
+
+def test_streaming_fetches_one_window_before_the_first_chunk(temp_db):
+    store, upstream = CandleStore(), FakeUpstream()
+
+    async def first_chunk_then_rest():
+        chunks = store.aiter_candles("mainnet", "BTC", "1h", START, START + 9999 * HOUR, upstream.fetch,
+                                     chunk_candles=500)
+        first = await chunks.__anext__()
+        served_before_first = upstream.candles_served
+        rest = [chunk async for chunk in chunks]
+        return first, served_before_first, rest
+
+    first, served_before_first, rest = asyncio.run(first_chunk_then_rest())
+
+    assert len(first) == 500 and served_before_first == 500
+    candles = first + [c for chunk in rest for c in chunk]
+    assert [c["t"] for c in candles] == [START + i * HOUR for i in range(10000)]
+    assert upstream.candles_served == 10000
+    assert store.missing_ranges("mainnet", "BTC", "1h", START, START + 9999 * HOUR) == []
+
+
+def test_streaming_serves_stored_windows_without_refetching(temp_db):
+    store, upstream = CandleStore(), FakeUpstream()
+    store.get_candles("mainnet", "BTC", "1h", START + 200 * HOUR, START + 299 * HOUR, upstream.candles)
+    upstream.calls.clear()
+
+    async def collect():
+        return [chunk async for chunk in store.aiter_candles(
+            "mainnet", "BTC", "1h", START, START + 399 * HOUR, upstream.fetch, chunk_candles=100)]
+
+    chunks = asyncio.run(collect())
+
+    assert [len(chunk) for chunk in chunks] == [100, 100, 100, 100]
+    assert upstream.calls == [(START, START + 100 * HOUR - 1), (START + 100 * HOUR, START + 200 * HOUR - 1),
+                              (START + 300 * HOUR, START + 400 * HOUR - 1)]
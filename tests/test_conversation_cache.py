@@ -0,0 +1,80 @@
+"""Per-session conversation cache (conversation_cache) and its write paths."""
+
+from src.hyperliquid_wrapper.database_handlers import database_manager
+from src.hyperliquid_wrapper.database_handlers.conversation_cache import ConversationCache, get_conversation_cache
+from src.hyperliquid_wrapper.database_handlers.db_writer import AddConversationMessage, DatabaseWriter
+
+
+def _uncached_history(session_id, limit=50):
+    conn = database_manager.get_db_connection()
+    rows = conn.execute(database_manager.CONVERSATION_HISTORY_SQL, (session_id, limit)).fetchall()
+    conn.close()
+    return [database_manager._message_from_row(row) for row in reversed(rows)]
+
+
+def test_cached_history_matches_database(temp_db):
+    for i in range(60):
+        database_manager.add_conversation_message("s", "user" if i % 2 else "assistant", f"m{i}")
+        if i % 7 == 0:
+            assert database_manager.get_conversation_history("s") == _uncached_history("s")
+
+    assert database_manager.get_conversation_history("s", 10) == _uncached_history("s", 10)
+    assert database_manager.get_conversation_history("s", 100) == _uncached_history("s", 100)
+    assert get_conversation_cache().stats()["hits"] > 0
+
+
+def test_read_between_commit_and_append_does_not_duplicate(temp_db, monkeypatch):
+    original_after_commit = AddConversationMessage.after_commit
+
+    def read_then_append(command):
+        # A reader misses the cache after the commit but before the writer's append
+        get_conversation_cache().invalidate(command.session_id)
+        database_manager.get_conversation_history(command.session_id)
+        original_after_commit(command)
+
+    monkeypatch.setattr(AddConversationMessage, "after_commit", read_then_append)
+    writer = DatabaseWriter()
+    try:
+        writer.add_conversation_message("s", "user", "hello").result(timeout=5)
+    finally:
+        writer.close()
+
+    assert [m["content"] for m in database_manager.get_conversation_history("s")] == ["hello"]
+
+
+def test_fill_older_than_a_write_is_ignored():
+    cache = ConversationCache(window=5)
+    token = cache.load_token()
+    cache.append("s", {"id": 2, "role": "user", "content": "new", "tool_calls": None, "timestamp": "t"})
+
+    cache.fill("s", [{"id": 1, "role": "user", "content": "old", "tool_calls": None, "timestamp": "t"}], token)
+
+    assert cache.get("s", 5) is None
+
+
+def test_sessions_are_evicted_least_recently_used_first():
+    cache = ConversationCache(window=5, max_bytes=3 * 300)
+    for session_id in ("a", "b", "c", "d"):
+        cache.fill(session_id, [{"id": 1, "role": "user", "content": "x", "tool_calls": None, "timestamp": "t"}],
+                   cache.load_token())
+        if session_id == "b":
+            cache.get("a", 5)
+
+    assert cache.get("b", 5) is None
+    assert cache.get("a", 5) is not None and cache.get("d", 5) is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_writer_keeps_cache_and_database_in_step(temp_db):
+    writer = DatabaseWriter()
+    try:
+        database_manager.get_conversation_history("s")  # Cache the (empty) session first
+        for i in range(20):
+            writer.add_conversation_message("s", "user", f"m{i}")
+        writer.flush(timeout=5)
+        assert database_manager.get_conversation_history("s") == _uncached_history("s")
+        writer.clear_session_history("s").result(timeout=5)
+    finally:
+        writer.close()
+
+    assert database_manager.get_conversation_history("s") == []
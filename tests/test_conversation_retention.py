@@ -0,0 +1,182 @@
+"""Archival, rehydration and clearing of conversation sessions (conversation_retention)."""
+
+from src.hyperliquid_wrapper.database_handlers import database_manager
+from src.hyperliquid_wrapper.database_handlers.conversation_retention import ConversationRetention
+
+OLD_TIMESTAMP = "2020-01-01 00:00:00"
+
+
+def _insert_messages(session_id, count, timestamp=None, prefix="m"):
+    conn = database_manager.get_db_connection()
+    conn.executemany(
+        "INSERT INTO conversations (session_id, role, content, timestamp) VALUES (?, 'user', ?, COALESCE(?, CURRENT_TIMESTAMP))",
+        [(session_id, f"{prefix}{i}", timestamp) for i in range(count)])
+    conn.commit()
+    conn.close()
+
+
+def _count(sql, *params):
+    conn = database_manager.get_db_connection()
+    value = conn.execute(sql, params).fetchone()[0]
+    conn.close()
+    return value
+
+
+def _retention(tmp_path, **kwargs):
+    return ConversationRetention(archive_dir=str(tmp_path / "archive"), **kwargs)
+
+
+def test_idle_session_is_archived_and_rehydrated_on_read(temp_db, tmp_path, monkeypatch):
+    _insert_messages("old", 120, OLD_TIMESTAMP)
+    before = [m["content"] for m in database_manager.get_conversation_history("old", 200)]
+    retention = _retention(tmp_path)
+    monkeypatch.setattr("src.hyperliquid_wrapper.database_handlers.conversation_retention.get_conversation_retention",
+                        lambda: retention)
+
+    result = retention.run_once()
+
+    assert result["archived"] == {"sessions": 1, "messages": 120}
+    assert _count("SELECT COUNT(*) FROM conversations WHERE session_id = 'old'") == 0
+    assert _count("SELECT message_count FROM sessions WHERE session_id = 'old'") == 0
+    assert retention.is_archived("old")
+
+    after = [m["content"] for m in database_manager.get_conversation_history("old", 200)]
+    assert after == before
+    assert not retention.is_archived("old")
+    assert _count("SELECT message_count FROM sessions WHERE session_id = 'old'") == 120
+
+
+def test_archived_session_is_still_listed(temp_db, tmp_path, monkeypatch):
+    import asyncio
+
+    from src.hyperliquid_wrapper.database_handlers.async_database_manager import AsyncDBManager
+
+    retention = _retention(tmp_path)
+    _insert_messages("old", 30, OLD_TIMESTAMP)
+    _insert_messages("recent", 5)
+    retention.run_once()
+
+    listed = {s["session_id"]: s for s in database_manager.get_all_sessions()}
+    assert listed["old"]["message_count"] == 0 and listed["old"]["archived_messages"] == 30
+    assert listed["old"]["first_activity"] == OLD_TIMESTAMP and listed["old"]["last_activity"] == OLD_TIMESTAMP
+    assert listed["recent"]["message_count"] == 5 and listed["recent"]["archived_messages"] == 0
+
+    async def list_async():
+        manager = AsyncDBManager(readers=1)
+        try:
+            return await manager.get_all_sessions()
+        finally:
+            await manager.close()
+
+    assert [s["session_id"] for s in asyncio.run(list_async())] == ["recent", "old"]
+    assert retention.run_once()["archived"] == {"sessions": 0, "messages": 0}  # Nothing left to archive
+
+    database_manager.clear_session_history("old")
+    assert [s["session_id"] for s in database_manager.get_all_sessions()] == ["recent"]
+
+
+def test_clear_session_drops_archived_messages(temp_db, tmp_path, monkeypatch):
+    retention = _retention(tmp_path)
+    monkeypatch.setattr("src.hyperliquid_wrapper.database_handlers.conversation_retention.get_conversation_retention",
+                        lambda: retention)
+    _insert_messages("s", 40, OLD_TIMESTAMP, prefix="old")
+    retention.run_once()
+    _insert_messages("s", 60, prefix="new")
+
+    assert database_manager.clear_session_history("s") == 60
+
+    assert not retention.is_archived("s")
+    assert database_manager.get_conversation_history("s") == []
+    assert _count("SELECT COUNT(*) FROM sessions WHERE session_id = 's'") == 0
+
+
+def test_clear_session_through_writer_drops_archived_messages(temp_db, tmp_path, monkeypatch):
+    from src.hyperliquid_wrapper.database_handlers.db_writer import DatabaseWriter
+
+    retention = _retention(tmp_path)
+    monkeypatch.setattr("src.hyperliquid_wrapper.database_handlers.conversation_retention.get_conversation_retention",
+                        lambda: retention)
+    _insert_messages("s", 40, OLD_TIMESTAMP)
+    retention.run_once()
+
+    writer = DatabaseWriter()
+    try:
+        writer.clear_session_history("s").result(timeout=5)
+    finally:
+        writer.close()
+
+    assert not retention.is_archived("s")
+    assert database_manager.get_conversation_history("s") == []
+
+
+def test_rehydrate_keeps_index_rows_of_missing_segments(temp_db, tmp_path, monkeypatch):
+    import os
+
+    retention = _retention(tmp_path)
+    _insert_messages("s", 30, OLD_TIMESTAMP, prefix="first")
+    monkeypatch.setattr(retention, "_segment_name", lambda: "first.jsonl.gz")
+    retention.run_once()
+    _insert_messages("s", 20, OLD_TIMESTAMP, prefix="second")
+    monkeypatch.setattr(retention, "_segment_name", lambda: "second.jsonl.gz")
+    retention.run_once()
+    os.remove(os.path.join(retention.archive_dir, "first.jsonl.gz"))
+
+    assert retention.rehydrate_session("s") == 20
+
+    assert _count("SELECT COUNT(*) FROM conversations WHERE session_id = 's'") == 20
+    conn = database_manager.get_db_connection()
+    segments = [row["segment"] for row in conn.execute("SELECT segment FROM conversation_archive WHERE session_id = 's'")]
+    conn.close()
+    assert segments == ["first.jsonl.gz"]
+
+
+def test_history_read_with_missing_segment_does_not_loop(temp_db, tmp_path, monkeypatch):
+    import asyncio
+    import os
+
+    from src.hyperliquid_wrapper.database_handlers.async_database_manager import AsyncDBManager
+
+    retention = _retention(tmp_path)
+    monkeypatch.setattr("src.hyperliquid_wrapper.database_handlers.conversation_retention.get_conversation_retention",
+                        lambda: retention)
+    monkeypatch.setattr("src.hyperliquid_wrapper.database_handlers.async_database_manager.get_conversation_retention",
+                        lambda: retention)
+    _insert_messages("s", 30, OLD_TIMESTAMP)
+    retention.run_once()
+    os.remove(os.path.join(retention.archive_dir, retention._segment_name()))
+    _insert_messages("s", 3, prefix="live")
+
+    assert [m["content"] for m in database_manager.get_conversation_history("s")] == ["live0", "live1", "live2"]
+
+    async def read_async():
+        manager = AsyncDBManager(readers=1)
+        try:
+            return await manager.get_conversation_history("s", 100)
+        finally:
+            await manager.close()
+
+    assert len(asyncio.run(read_async())) == 3
+    assert retention.is_archived("s")
+
+
+def test_session_cap_must_cover_the_read_window(temp_db, tmp_path):
+    import pytest
+
+    from src.hyperliquid_wrapper.database_handlers.conversation_retention import MIN_MESSAGES_PER_SESSION
+
+    with pytest.raises(ValueError):
+        _retention(tmp_path, max_messages_per_session=MIN_MESSAGES_PER_SESSION - 1)
+
+
+def test_capped_session_rehydrates_only_for_older_messages(temp_db, tmp_path, monkeypatch):
+    retention = _retention(tmp_path, max_messages_per_session=50)
+    monkeypatch.setattr("src.hyperliquid_wrapper.database_handlers.conversation_retention.get_conversation_retention",
+                        lambda: retention)
+    _insert_messages("s", 80)
+
+    assert retention.run_once()["capped"] == {"sessions": 1, "messages": 30}
+
+    assert [m["content"] for m in database_manager.get_conversation_history("s")] == [f"m{i}" for i in range(30, 80)]
+    assert retention.is_archived("s")
+    assert len(database_manager.get_conversation_history("s", 100)) == 80
+    assert not retention.is_archived("s")
@@ -0,0 +1,93 @@
+"""Batching of the single-writer queue (db_writer)."""
+
+import sqlite3
+import time
+
+import pytest
+
+from src.hyperliquid_wrapper.database_handlers import database_manager, db_writer
+from src.hyperliquid_wrapper.database_handlers.db_writer import DatabaseWriter
+from src.hyperliquid_wrapper.database_handlers.position_book import get_position_book
+
+
+def test_group_commit_does_not_wait_for_the_flush_interval(temp_db):
+    writer = DatabaseWriter(flush_interval_ms=5000)
+    try:
+        started = time.monotonic()
+        writer.add_conversation_message("s", "user", "hello").result(timeout=5)
+        assert time.monotonic() - started < 1
+    finally:
+        writer.close()
+
+
+def test_lingering_batch_waits_for_the_flush_interval(temp_db):
+    writer = DatabaseWriter(flush_interval_ms=300, linger=True)
+    try:
+        started = time.monotonic()
+        first = writer.add_conversation_message("s", "user", "one")
+        time.sleep(0.1)
+        second = writer.add_conversation_message("s", "user", "two")
+        first.result(timeout=5)
+        second.result(timeout=5)
+        assert time.monotonic() - started >= 0.3
+    finally:
+        writer.close()
+
+    assert writer.batches == 1 and writer.commands == 2
+
+
+def test_batches_are_cut_at_max_batch_rows(temp_db):
+    writer = DatabaseWriter(max_batch_rows=10, flush_interval_ms=200, linger=True)
+    try:
+        futures = [writer.add_conversation_message("s", "user", f"m{i}") for i in range(25)]
+        for future in futures:
+            future.result(timeout=5)
+    finally:
+        writer.close()
+
+    assert writer.commands == 25 and writer.batches >= 3
+
+
+def test_sync_api_writes_go_through_the_process_wide_writer(temp_db):
+    order = {"order_id": 7, "symbol": "BTC", "side": "B", "order_type": "limit", "price": 100, "size": 1,
+             "timestamp_placed": 1_700_000_000_000}
+    database_manager.add_open_order(order, "testnet")
+    database_manager.add_open_order(order, "testnet")  # Duplicate: skipped, not raised
+    database_manager.remove_open_order(7, "testnet")
+    database_manager.add_conversation_message("s", "user", "hello")
+    assert database_manager.clear_session_history("s") == 1
+
+    writer = db_writer._writer
+    assert writer is not None
+    assert writer.commands == 5 and writer.failed == 1
+    assert database_manager.get_tracked_open_orders("testnet") == []
+
+
+def test_failed_batch_setup_fails_its_futures_and_the_writer_keeps_running(temp_db, monkeypatch):
+    connect, calls = db_writer.get_db_connection, []
+
+    def unavailable_once():
+        calls.append(None)
+        if len(calls) == 1:
+            raise sqlite3.OperationalError("unable to open database file")
+        return connect()
+
+    monkeypatch.setattr(db_writer, "get_db_connection", unavailable_once)
+    writer = DatabaseWriter()
+    try:
+        with pytest.raises(sqlite3.OperationalError):
+            writer.add_conversation_message("s", "user", "lost").result(timeout=5)
+        assert writer.add_conversation_message("s", "user", "kept").result(timeout=5)
+    finally:
+        writer.close()
+
+    assert writer.failed == 1 and writer.commands == 1
+
+
+def test_batches_without_fills_do_not_take_the_position_book_lock(temp_db):
+    writer = DatabaseWriter()
+    try:
+        with get_position_book().lock:  # Held by this thread for the whole write
+            assert writer.add_conversation_message("s", "user", "hello").result(timeout=5)
+    finally:
+        writer.close()
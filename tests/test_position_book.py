@@ -0,0 +1,35 @@
+"""Position book checkpoints (position_book) and their shutdown order."""
+
+import time
+
+from src.hyperliquid_wrapper.database_handlers import database_manager, db_writer
+from src.hyperliquid_wrapper.database_handlers.db_writer import get_db_writer, shutdown_db_writer
+from src.hyperliquid_wrapper.database_handlers.position_book import get_position_book
+
+
+def _fill(trade_id, size):
+    return {"coin": "BTC", "side": "B", "px": "100", "sz": str(size), "time": 1_700_000_000_000 + trade_id,
+            "tid": trade_id, "oid": trade_id, "fee": "0", "closedPnl": "0"}
+
+
+def _stored_size():
+    conn = database_manager.get_db_connection()
+    row = conn.execute("SELECT net_size FROM positions WHERE coin = 'BTC' AND network = 'testnet'").fetchone()
+    conn.close()
+    return row[0] if row else None
+
+
+def test_shutdown_stops_the_timer_before_the_writer(temp_db):
+    book = get_position_book()
+    book.start_checkpoints(submit=lambda: get_db_writer().checkpoint_positions(), interval=0.01)
+    get_db_writer().add_fills([_fill(1, 1)], "testnet").result(timeout=5)
+
+    book.stop_checkpoints(final_checkpoint=False)
+    get_db_writer().add_fills([_fill(2, 2)], "testnet")  # Still queued when shutdown starts
+    shutdown_db_writer()
+    time.sleep(0.05)  # A live timer would have ticked and started a new writer by now
+
+    assert db_writer._writer is None
+    assert book.dirty
+    book.stop_checkpoints()
+    assert not book.dirty and _stored_size() == 3.0
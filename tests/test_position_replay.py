@@ -0,0 +1,76 @@
+"""Vectorized position replay (position_replay) against the one-fill-at-a-time fold."""
+
+import numpy as np
+import pytest
+
+from src.hyperliquid_wrapper.database_handlers import database_manager
+from src.hyperliquid_wrapper.database_handlers.database_manager import _apply_fill_to_position
+from src.hyperliquid_wrapper.database_handlers.position_book import get_position_book
+from src.hyperliquid_wrapper.database_handlers.position_replay import rebuild_positions, replay_fills
+
+FIELDS = ("net_size", "average_entry_price", "total_cost")
+
+
+def _fold(sides, prices, sizes):
+    """Per-fill positions from _apply_fill_to_position, as arrays like replay_fills returns."""
+    position, path = (0, 0, 0), []
+    for side, price, size in zip(sides, prices, sizes):
+        position = _apply_fill_to_position(position, side, float(price), float(size))
+        path.append(position)
+    return dict(zip(FIELDS, np.array(path, dtype=np.float64).T))
+
+
+def _assert_replay_matches_fold(sides, prices, sizes):
+    sides, prices, sizes = np.array(sides), np.array(prices, dtype=np.float64), np.array(sizes, dtype=np.float64)
+    replayed, folded = replay_fills(sides, prices, sizes), _fold(sides, prices, sizes)
+    for field in FIELDS:
+        np.testing.assert_allclose(replayed[field], folded[field], rtol=1e-9, atol=1e-9, err_msg=field)
+
+
+@pytest.mark.parametrize("fills", [
+    pytest.param([("B", 100, 1), ("B", 110, 1), ("A", 120, 0.5), ("A", 90, 1.5)], id="long-partial-then-close"),
+    pytest.param([("A", 100, 2), ("A", 80, 1), ("B", 70, 1), ("B", 95, 2)], id="short-partial-then-close"),
+    pytest.param([("B", 100, 1), ("A", 110, 3), ("B", 90, 4), ("A", 95, 2)], id="flips-both-ways"),
+    pytest.param([("B", 100, 0.1), ("B", 100, 0.2), ("A", 101, 0.3), ("B", 102, 0.7)], id="close-with-float-residue"),
+])
+def test_replay_matches_the_fold(fills):
+    _assert_replay_matches_fold(*zip(*fills))
+
+
+def test_replay_matches_the_fold_over_many_closes():
+    """Random paths that close (and flip) often, with sizes large enough for float residue to build up."""
+    for seed in range(20):
+        rng = np.random.default_rng(seed)
+        sides, prices, sizes, net = [], [], [], (0, 0, 0)
+        for _ in range(300):
+            side = "B" if rng.random() < 0.5 else "A"
+            size = round(float(rng.uniform(0.001, 5)) * 10 ** int(rng.integers(0, 6)), 4)
+            if net[0] and rng.random() < 0.3:  # Close exactly what the fold holds, or flip through it
+                side = "A" if net[0] > 0 else "B"
+                size = abs(net[0]) + (size if rng.random() < 0.3 else 0)
+            price = round(float(rng.uniform(1, 60000)), 2)
+            sides.append(side)
+            prices.append(price)
+            sizes.append(size)
+            net = _apply_fill_to_position(net, side, price, size)
+
+        _assert_replay_matches_fold(sides, prices, sizes)
+
+
+def test_rebuild_replaces_positions_and_reloads_the_book(temp_db):
+    fills = [{"coin": "BTC", "side": side, "px": px, "sz": sz, "time": 1_700_000_000_000 + tid, "tid": tid,
+              "oid": tid, "fee": "0", "closedPnl": "0"}
+             for tid, (side, px, sz) in enumerate([("B", "100", "2"), ("A", "110", "0.5"), ("B", "90", "1")], 1)]
+    database_manager.add_trades_bulk(fills, "testnet")
+
+    summary = rebuild_positions("testnet")
+
+    assert summary["BTC"]["net_size"] == pytest.approx(2.5)
+    conn = database_manager.get_db_connection()
+    stored = conn.execute("SELECT net_size FROM positions WHERE coin = 'BTC' AND network = 'testnet'").fetchone()
+    watermark = conn.execute("SELECT last_trade_id FROM position_checkpoints WHERE network = 'testnet'").fetchone()
+    conn.close()
+    assert stored[0] == pytest.approx(2.5) and watermark[0] == 3
+    book = get_position_book()
+    assert not book.dirty  # Reloaded from the rebuilt rows
+    assert [(p["coin"], p["net_size"]) for p in book.positions("testnet")] == [("BTC", pytest.approx(2.5))]
@@ -0,0 +1,81 @@
+"""NDJSON / json-stream formats of the history endpoints (backend/api/assets.py)."""
+
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from src.hyperliquid_wrapper.api.async_hyperliquid_client import AsyncHyperClient
+from src.hyperliquid_wrapper.database_handlers.candle_store import interval_to_ms
+from tests.test_candle_store import FakeUpstream
+
+NOW_MS = int(time.time() * 1000)
+
+
+class FakeAsyncClient:
+    """Stands in for AsyncHyperClient: synthetic candles, and 4500 fills served 2000 per page."""
+
+    def __init__(self):
+        self.upstream = FakeUpstream()
+        self.fills = [{"coin": "BTC" if i % 2 else "ETH", "time": NOW_MS - 86_400_000 + i // 3, "px": "1", "sz": "1",
+                       "side": "B", "tid": i, "oid": i} for i in range(4500)]
+
+    async def get_candles(self, symbol, interval, start, end):
+        self.upstream.step = interval_to_ms(interval)
+        return self.upstream.candles(start, end)
+
+    async def get_user_fills_by_time(self, start, end, aggregate_by_time=False):
+        return [fill for fill in self.fills if start <= fill["time"] <= end][:2000]
+
+    iter_user_fills_by_time = AsyncHyperClient.iter_user_fills_by_time
+
+
+@pytest.fixture
+def api(temp_db, monkeypatch):
+    from backend.api import assets  # Imported here so its candle store opens the test database
+
+    fake = FakeAsyncClient()
+    monkeypatch.setattr(assets, "candle_store", assets.CandleStore())
+    monkeypatch.setattr(assets, "async_client", fake)
+    app = FastAPI()
+    app.include_router(assets.router, prefix="/api")
+    return app, fake
+
+
+def _get(app, path, **params):
+    async def request():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await client.get(path, params=params)
+    return asyncio.run(request())
+
+
+def test_price_history_streams_match_the_buffered_response(api):
+    app, _ = api
+    buffered = _get(app, "/api/assets/BTC/price-history", days=60, interval="1h").json()
+
+    json_stream = _get(app, "/api/assets/BTC/price-history", days=60, interval="1h", format="json-stream")
+    ndjson = _get(app, "/api/assets/BTC/price-history", days=60, interval="1h", format="ndjson")
+
+    assert json_stream.json() == buffered
+    assert ndjson.headers["content-type"] == "application/x-ndjson"
+    assert ndjson.headers["x-interval"] == "1h"
+    assert [json.loads(line) for line in ndjson.text.splitlines()] == buffered["data"]
+
+
+def test_user_trades_stream_pages_past_one_response(api):
+    app, _ = api
+
+    json_stream = _get(app, "/api/assets/BTC/user-trades", format="json-stream").json()
+    ndjson = _get(app, "/api/assets/BTC/user-trades", format="ndjson")
+
+    assert json_stream["count"] == 2250
+    assert len({trade["trade_id"] for trade in json_stream["trades"]}) == 2250
+    assert len(ndjson.text.splitlines()) == 2250
+
+
+def test_unknown_format_is_rejected(api):
+    app, _ = api
+    assert _get(app, "/api/assets/BTC/user-trades", format="xml").status_code == 422
@@ -0,0 +1,93 @@
+"""Subscription sharing in the multiplexed WebSocket manager (ws_manager), against a local server."""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import websockets
+
+from src.hyperliquid_wrapper.api.codec import LazyFrame
+from src.hyperliquid_wrapper.api.frame_queue import QueuedFrame
+from src.hyperliquid_wrapper.api.ws_manager import SubscriptionHandle, WebSocketManager
+
+USER = "0xabc"
+
+
+async def _user_fills_server(websocket):
+    """Sends a userFills snapshot when subscribed, then a live fill per "fill" message."""
+    async for message in websocket:
+        request = json.loads(message)
+        if request["method"] == "subscribe":
+            await websocket.send(json.dumps({"channel": "userFills", "data": {
+                "user": USER, "isSnapshot": True, "fills": [{"tid": 1}, {"tid": 2}]}}))
+        elif request["method"] == "fill":
+            await websocket.send(json.dumps({"channel": "userFills", "data": {
+                "user": USER, "fills": [{"tid": request["tid"]}]}}))
+
+
+def _collector(received, name):
+    def handler(message, description, raw):
+        received.setdefault(name, []).append([fill["tid"] for fill in message["data"]["fills"]])
+    return handler
+
+
+async def _wait_for(condition, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+def test_joining_handler_gets_the_snapshot_before_newer_frames():
+    async def run():
+        received = {}
+        async with websockets.serve(_user_fills_server, "127.0.0.1", 0) as server:
+            port = server.sockets[0].getsockname()[1]
+            manager = WebSocketManager(f"ws://127.0.0.1:{port}")
+            try:
+                subscription = {"type": "userFills", "user": USER}
+                await manager.subscribe(subscription, _collector(received, "first"))
+                await _wait_for(lambda: received.get("first"))
+
+                await manager.subscribe(subscription, _collector(received, "second"))
+                await _wait_for(lambda: received.get("second"))
+                await manager._connections[0].websocket.send(json.dumps({"method": "fill", "tid": 3}))
+                await _wait_for(lambda: len(received["second"]) == 2)
+            finally:
+                await manager.close()
+        return received
+
+    received = asyncio.run(run())
+
+    assert received["first"] == [[1, 2], [3]]
+    assert received["second"] == [[1, 2], [3]]
+
+
+def test_undecodable_frame_still_reaches_lazy_handlers_and_owed_replays():
+    snapshot = {"channel": "userFills", "data": {"user": USER, "isSnapshot": True, "fills": [{"tid": 1}]}}
+    bad = LazyFrame('{"channel": "userFills", "data": {"user": "0xabc", "fills": [')
+
+    async def run():
+        received = {}
+        manager = WebSocketManager("ws://127.0.0.1:9")  # Nothing is subscribed, so it never connects
+        try:
+            subscription = SimpleNamespace(key=("userFills", USER))
+
+            def handle(handler_id, name, lazy=False):
+                return SubscriptionHandle(manager, subscription, handler_id,
+                                          lambda message, description, raw: received.setdefault(name, []).append(message),
+                                          name, False, None, lazy=lazy)
+
+            parsing, lazy, owed = handle(1, "parsing"), handle(2, "lazy", lazy=True), handle(3, "owed")
+            owed.replay = LazyFrame(json.dumps(snapshot))
+            kept = manager._run_handlers([parsing, lazy, owed], QueuedFrame(None, subscription.key, bad))
+            return kept, received, manager.stats()["decode_errors"]
+        finally:
+            await manager.close()
+
+    kept, received, decode_errors = asyncio.run(run())
+
+    assert not kept and decode_errors == 1
+    assert "parsing" not in received
+    assert received["lazy"] == [bad]
+    assert received["owed"] == [snapshot]